@@ -0,0 +1,46 @@
+"""
+Async variants of the read endpoints.
+
+Each view awaits the matching sync view on the database thread pool
+(``api.db_pool``) and renders it there too, so responses are identical to the
+sync endpoints, including pagination, sparse fieldsets and conditional GETs.
+Served through ``vendormanagement.asgi``, a worker keeps accepting requests
+while up to ASYNC_DB_POOL_SIZE of them are in the database.
+"""
+from django.http import HttpResponseNotAllowed
+
+from . import views
+from .db_pool import run_in_db_pool
+
+
+def _render(view, request, **kwargs):
+    response = view(request, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+async def _read(view, request, **kwargs):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    return await run_in_db_pool(_render, view, request, **kwargs)
+
+
+async def vendor_list(request):
+    return await _read(views.vendor_ops, request)
+
+
+async def vendor_detail(request, vendor_id):
+    return await _read(views.get_vendor_by_id, request, vendor_id=vendor_id)
+
+
+async def purchase_order_list(request):
+    return await _read(views.purchase_order_ops, request)
+
+
+async def purchase_order_detail(request, po_id):
+    return await _read(views.get_po_by_id, request, po_id=po_id)
+
+
+async def vendor_performance(request, vendor_id):
+    return await _read(views.get_vendor_performance, request, vendor_id=vendor_id)
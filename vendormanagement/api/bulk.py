@@ -0,0 +1,97 @@
+"""
+Bulk create/upsert of purchase orders.
+
+A batch is inserted with ``bulk_create`` (and existing orders updated with
+``bulk_update``), which skips the per-row metric signals. Vendor metrics are then
+recomputed once per distinct vendor in the batch, and each of those vendors gets
+at most one HistoricalPerformance snapshot.
+"""
+from datetime import datetime
+
+from django.db import transaction
+
+from base.metrics import rebuild_vendor_metrics, record_historical_performances
+from base.models import PurchaseOrder
+
+BATCH_SIZE = 500
+
+
+def duplicate_po_number_errors(items):
+    """
+        Returns per-item errors for po_numbers repeated within a batch.
+
+        Args:
+            items (list): The raw items of the batch.
+
+        Returns:
+            list: One error dict per item, empty for items without a duplicate.
+    """
+    seen = set()
+    errors = []
+    for item in items:
+        po_number = item.get('po_number') if isinstance(item, dict) else None
+        # Other types (lists, objects, ...) are rejected by the serializer; numbers are
+        # compared as the strings the serializer turns them into.
+        if not isinstance(po_number, (str, int)) or isinstance(po_number, bool):
+            errors.append({})
+            continue
+        po_number = str(po_number)
+        if po_number in seen:
+            errors.append({'po_number': ['Duplicate po_number in batch.']})
+        else:
+            errors.append({})
+            seen.add(po_number)
+    return errors
+
+
+def upsert_purchase_orders(validated_items):
+    """
+        Creates or updates a batch of purchase orders in one transaction.
+
+        Items whose po_number matches an existing purchase order update it; the
+        others are created.
+
+        Args:
+            validated_items (list): PurchaseOrderSerializer(many=True).validated_data.
+
+        Returns:
+            dict: Counts of created and updated orders and the refreshed vendor ids.
+    """
+    now = datetime.now()
+    with transaction.atomic():
+        existing = {
+            purchase_order.po_number: purchase_order
+            for purchase_order in PurchaseOrder.objects.filter(
+                po_number__in=[item['po_number'] for item in validated_items]
+            ).order_by('id')
+        }
+        vendor_ids = set()
+        to_create = []
+        to_update = []
+        update_fields = set()
+        for item in validated_items:
+            purchase_order = existing.get(item['po_number'])
+            if purchase_order is None:
+                purchase_order = PurchaseOrder(**item)
+                to_create.append(purchase_order)
+            else:
+                vendor_ids.add(purchase_order.vendor_id)
+                for name, value in item.items():
+                    setattr(purchase_order, name, value)
+                update_fields.update(item)
+                to_update.append(purchase_order)
+            # bulk_create/bulk_update bypass PurchaseOrder.save().
+            update_fields.update(purchase_order.stamp(now))
+            vendor_ids.add(purchase_order.vendor_id)
+
+        PurchaseOrder.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        if to_update:
+            PurchaseOrder.objects.bulk_update(to_update, sorted(update_fields), batch_size=BATCH_SIZE)
+
+        rebuild_vendor_metrics(vendor_ids)
+        record_historical_performances(
+            {purchase_order.vendor_id for purchase_order in to_create + to_update
+             if purchase_order.status.lower() == 'completed'}
+        )
+
+    return {'created': len(to_create), 'updated': len(to_update), 'vendors': sorted(vendor_ids)}
@@ -0,0 +1,80 @@
+"""
+Conditional GET support.
+
+Detail responses carry an ETag and Last-Modified derived from the row's
+``updated_at`` column, so a client revalidating with ``If-None-Match`` or
+``If-Modified-Since`` gets a 304 after a primary-key lookup of that one column,
+without loading the row or running the serializer. List pages carry an ETag
+over the page's (id, updated_at) pairs.
+"""
+import calendar
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def is_conditional(request):
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def row_validators(model, pk, updated_at):
+    """
+        Returns the (etag, last_modified) of a row; last_modified is a Unix timestamp.
+    """
+    etag = f'"{model._meta.model_name}-{pk}-{updated_at.isoformat()}"'
+    return etag, calendar.timegm(updated_at.utctimetuple())
+
+
+def collection_etag(request, paginator, page):
+    """
+        Returns the ETag of a list page: it changes whenever a row on the page is
+        added, removed or updated, or the page gains or loses a neighbour.
+
+        Args:
+            page: Model instances or ``values()`` dicts holding id and updated_at.
+    """
+    digest = hashlib.md5(request.META.get('QUERY_STRING', '').encode())
+    digest.update(f'{paginator.has_next}:{paginator.has_previous}'.encode())
+    for item in page:
+        if isinstance(item, dict):
+            pk, updated_at = item['id'], item['updated_at']
+        else:
+            pk, updated_at = item.pk, item.updated_at
+        digest.update(f'|{pk}:{updated_at.isoformat()}'.encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+        Evaluates the request's precondition headers against the given validators.
+
+        Returns:
+            A 304 (or 412) response when the client's copy is current, otherwise None.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        return None
+    return with_validators(response, etag, last_modified)
+
+
+def row_not_modified(request, queryset, pk):
+    """
+        Answers a conditional GET for one row from its ``updated_at`` alone.
+
+        Returns None when the request is not conditional, the row does not exist
+        or the client's copy is stale; the caller then builds the full response.
+    """
+    if not is_conditional(request):
+        return None
+    updated_at = queryset.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return not_modified(request, *row_validators(queryset.model, pk, updated_at))
+
+
+def with_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,48 @@
+"""
+Bounded thread pool for database work done on behalf of async views.
+
+Django 3.2's ORM is synchronous, and ``sync_to_async`` runs every call on one
+shared thread by default. Async views instead hand their queries to this
+dedicated pool of ASYNC_DB_POOL_SIZE threads, so up to that many requests hit
+the database at once while the event loop keeps accepting connections.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from vendormanagement.middleware import instrument_connections
+
+_executor = None
+_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'ASYNC_DB_POOL_SIZE', 8),
+                                           thread_name_prefix='db-pool')
+        return _executor
+
+
+def _call(func, args, kwargs):
+    # Pool threads outlive requests, so apply CONN_MAX_AGE around every call the
+    # way request_started/request_finished do for request threads.
+    # sync_to_async copies the caller's context, so the request being timed (if
+    # any) is visible here, but this thread's connections need the timing wrapper.
+    close_old_connections()
+    try:
+        instrument_connections()
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_db_pool(func, *args, **kwargs):
+    """
+        Runs ``func(*args, **kwargs)`` on the database pool and returns its result.
+    """
+    return await sync_to_async(_call, thread_sensitive=False, executor=executor())(func, args, kwargs)
@@ -0,0 +1,103 @@
+"""
+Row-by-row export of purchase orders.
+
+Rows are read with a chunked database iterator over ``values_list`` tuples and
+encoded one at a time, so memory use stays flat however many rows are exported.
+"""
+import csv
+import json
+from datetime import datetime
+
+from base.models import PurchaseOrder
+
+# Same columns, in the same order, as PurchaseOrderSerializer.
+EXPORT_FIELDS = (
+    'id',
+    'po_number',
+    'order_date',
+    'delivery_date',
+    'items',
+    'quantity',
+    'status',
+    'quality_rating',
+    'issue_date',
+    'acknowledgement_date',
+    'completed_date',
+    'updated_at',
+    'vendor',
+)
+
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """
+    A file-like object whose write() returns the value, for use with csv.writer.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _isoformat(value):
+    # Matches rest_framework.fields.DateTimeField.to_representation.
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _rows(queryset):
+    columns = ['vendor_id' if name == 'vendor' else name for name in EXPORT_FIELDS]
+    for row in queryset.order_by('id').values_list(*columns).iterator(chunk_size=CHUNK_SIZE):
+        yield [_isoformat(value) if isinstance(value, datetime) else value for value in row]
+
+
+def iter_ndjson(queryset):
+    """
+        Yields one JSON document per purchase order, each terminated by a newline.
+    """
+    for row in _rows(queryset):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+def iter_csv(queryset):
+    """
+        Yields a CSV header line followed by one line per purchase order.
+
+        The ``items`` column holds the JSON-encoded items.
+    """
+    items_index = EXPORT_FIELDS.index('items')
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in _rows(queryset):
+        row[items_index] = json.dumps(row[items_index])
+        yield writer.writerow(row)
+
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', iter_ndjson),
+    'csv': ('text/csv', iter_csv),
+}
+
+
+def export_queryset(vendor=None, status=None, date_from=None, date_to=None):
+    """
+        Builds the purchase order queryset for an export.
+
+        Args:
+            vendor: Optional vendor id.
+            status: Optional exact status.
+            date_from: Optional inclusive lower bound on order_date.
+            date_to: Optional inclusive upper bound on order_date.
+    """
+    queryset = PurchaseOrder.objects.all()
+    if vendor is not None:
+        queryset = queryset.filter(vendor_id=vendor)
+    if status is not None:
+        queryset = queryset.filter(status=status)
+    if date_from is not None:
+        queryset = queryset.filter(order_date__gte=date_from)
+    if date_to is not None:
+        queryset = queryset.filter(order_date__lte=date_to)
+    return queryset
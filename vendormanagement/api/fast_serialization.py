@@ -0,0 +1,101 @@
+"""
+Read-only serialization of list pages straight from ``values()`` rows.
+
+A ``ValuesSerializer`` is compiled once from a ModelSerializer: for every field it
+keeps the model column to read and a plain converter (``int``, ``float``,
+``datetime.isoformat`` ...) equivalent to that field's ``to_representation``.
+Serializing a row is then one dict comprehension, without model instances or
+serializer field objects, and the rendered JSON is byte-identical to the
+ModelSerializer's.
+"""
+from functools import lru_cache
+
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from vendormanagement.middleware import timing_span
+
+
+def _identity(value):
+    return value
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != 'iso-8601' or field.default_timezone() is not None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is not None:
+            return field.to_representation(value)
+        return value.isoformat()
+    return convert
+
+
+def _converter(field):
+    """
+        Returns a function turning a column value into the field's representation.
+    """
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        # values() already yields the related primary key.
+        return _identity
+    if isinstance(field, serializers.RelatedField):
+        return None
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, serializers.FloatField):
+        return float
+    if isinstance(field, serializers.IntegerField):
+        return int
+    if isinstance(field, serializers.CharField):
+        return str
+    if isinstance(field, serializers.JSONField) and not field.binary:
+        return _identity
+    return field.to_representation
+
+
+class ValuesSerializer:
+    """
+    Serializes ``values()`` dicts like ``serializer_class(..., many=True)`` would.
+
+    Args:
+        serializer_class: A ModelSerializer whose fields all map to model columns.
+        **kwargs: Passed to ``serializer_class`` (e.g. sparse ``fields`` / ``exclude``).
+    """
+
+    def __init__(self, serializer_class, **kwargs):
+        self.columns = []
+        for name, field in serializer_class(**kwargs).fields.items():
+            converter = _converter(field)
+            if converter is None or field.source == '*' or '.' in field.source:
+                raise ValueError(f'{serializer_class.__name__}.{name} cannot be read from values().')
+            self.columns.append((name, field.source, converter))
+
+    @property
+    def sources(self):
+        """
+            The names to pass to ``values()``.
+        """
+        return [source for _, source, _ in self.columns]
+
+    def serialize(self, rows):
+        columns = self.columns
+        with timing_span('serializer'):
+            return [
+                {name: None if row[source] is None else convert(row[source]) for name, source, convert in columns}
+                for row in rows
+            ]
+
+
+@lru_cache(maxsize=64)
+def values_serializer(serializer_class, fields=None, exclude=None):
+    """
+        Returns the compiled ValuesSerializer for a serializer class and sparse fieldset.
+
+        Args:
+            serializer_class: A ModelSerializer class.
+            fields (tuple): Optional names to keep.
+            exclude (tuple): Optional names to drop.
+    """
+    kwargs = {'fields': fields, 'exclude': exclude}
+    return ValuesSerializer(serializer_class, **{key: value for key, value in kwargs.items() if value is not None})
@@ -0,0 +1,57 @@
+"""
+Sparse fieldsets for list endpoints.
+
+``?fields=id,status`` keeps only the named fields and ``?exclude=items`` drops
+fields. The same selection narrows the SELECT list with ``only()``, so a column
+that is not requested (such as the ``items`` JSON blob) is neither loaded nor
+decoded.
+"""
+from rest_framework.exceptions import ValidationError
+
+# Columns always loaded: the cursor pagination orders by id and the page ETag reads updated_at.
+REQUIRED_COLUMNS = ('id', 'updated_at')
+
+
+def _names(request, param):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def sparse_fieldset(request, serializer_class):
+    """
+        Reads the ``fields`` / ``exclude`` query parameters.
+
+        Args:
+            request: The incoming HTTP request.
+            serializer_class: A serializer using SparseFieldsMixin.
+
+        Returns:
+            dict: The ``fields`` / ``exclude`` keyword arguments for the serializer,
+            empty when neither parameter was given.
+
+        Raises:
+            ValidationError: A parameter names a field the serializer does not have.
+    """
+    fieldset = {}
+    available = serializer_class().fields
+    for param in ('fields', 'exclude'):
+        names = _names(request, param)
+        if names is None:
+            continue
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValidationError({param: [f"Unknown field: {name}" for name in unknown]})
+        fieldset[param] = names
+    return fieldset
+
+
+def narrow_queryset(queryset, serializer_class, fieldset):
+    """
+        Restricts ``queryset`` to the columns the narrowed serializer reads.
+    """
+    if not fieldset:
+        return queryset
+    fields = serializer_class(**fieldset).fields.values()
+    return queryset.only(*REQUIRED_COLUMNS, *(field.source for field in fields))
@@ -0,0 +1,99 @@
+"""
+Query-parameter filters for the purchase order list.
+
+Every filter becomes one condition of a single query. A filtered request must
+include at least one *driving* filter: ``vendor``, ``status`` or
+``acknowledged=false``. Each has an index that returns its rows already in id
+order, which is the order of the cursor pagination, so any page is one index
+seek with no sort. The other filters (date and ``quality_rating`` ranges,
+``acknowledged=true``) only narrow the rows a driving filter found. On their own
+they would mean either a table walk in id order or sorting the whole matching
+range on every page, so such requests are rejected.
+"""
+from datetime import datetime, time
+
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+DATE_FILTERS = ('order_date', 'delivery_date', 'issue_date')
+
+
+def parse_bound(value, upper=False):
+    """
+        Parses a date or datetime query parameter; a bare upper-bound date covers the whole day.
+    """
+    parsed = parse_datetime(value)
+    if parsed is not None:
+        return parsed
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return datetime.combine(parsed, time.max if upper else time.min)
+
+
+def filter_purchase_orders(queryset, params):
+    """
+        Applies the purchase order list filters.
+
+        Query Parameters:
+            vendor: Vendor id.
+            status: Exact status.
+            order_date_from, order_date_to, delivery_date_from, delivery_date_to,
+            issue_date_from, issue_date_to: Inclusive bounds (YYYY-MM-DD or ISO 8601 datetime).
+            acknowledged: 'true' or 'false'.
+            quality_rating_min, quality_rating_max: Inclusive bounds.
+
+        Returns:
+            QuerySet: ``queryset`` narrowed by the given filters.
+
+        Raises:
+            ValidationError: A value is invalid, or no driving filter was given.
+    """
+    conditions = {}
+    driving = []
+    errors = {}
+
+    if 'vendor' in params:
+        try:
+            conditions['vendor_id'] = int(params['vendor'])
+            driving.append('vendor')
+        except ValueError:
+            errors['vendor'] = ['Must be a vendor id.']
+    if 'status' in params:
+        conditions['status'] = params['status']
+        driving.append('status')
+
+    for field in DATE_FILTERS:
+        for suffix, lookup, upper in (('from', 'gte', False), ('to', 'lte', True)):
+            name = f'{field}_{suffix}'
+            if name not in params:
+                continue
+            try:
+                conditions[f'{field}__{lookup}'] = parse_bound(params[name], upper=upper)
+            except ValueError:
+                errors[name] = ['Must be a date (YYYY-MM-DD) or ISO 8601 datetime.']
+
+    for suffix, lookup in (('min', 'gte'), ('max', 'lte')):
+        name = f'quality_rating_{suffix}'
+        if name in params:
+            try:
+                conditions[f'quality_rating__{lookup}'] = float(params[name])
+            except ValueError:
+                errors[name] = ['Must be a number.']
+
+    if 'acknowledged' in params:
+        value = params['acknowledged'].lower()
+        if value not in ('true', 'false'):
+            errors['acknowledged'] = ["Must be 'true' or 'false'."]
+        else:
+            conditions['acknowledgement_date__isnull'] = value == 'false'
+            if value == 'false':
+                driving.append('acknowledged')
+
+    if errors:
+        raise ValidationError(errors)
+    if conditions and not driving:
+        raise ValidationError({'non_field_errors': [
+            'These filters cannot use an index on their own; add vendor, status or acknowledged=false.'
+        ]})
+    return queryset.filter(**conditions)
@@ -0,0 +1,93 @@
+"""
+Idempotency-Key support for purchase order writes.
+
+A client that retries a write after a timeout sends the same ``Idempotency-Key``
+header again. The first request runs normally and, if it succeeds, its response is
+stored in ``IdempotencyKey`` in the same transaction as the write. A retry finds
+the stored response in one indexed lookup and gets it back unchanged, marked with
+``Idempotent-Replayed: true``. It writes nothing and triggers no metric updates.
+
+Keys are scoped to the method and path and expire after ``IDEMPOTENCY_KEY_TTL``
+seconds; ``python manage.py purge_idempotency_keys`` deletes expired rows.
+Only 2xx responses are stored, so a request that failed validation can be
+corrected and retried with the same key.
+"""
+import functools
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from base.models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+def _request_hash(request):
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def _replay(stored, request_hash):
+    if stored.request_hash != request_hash:
+        return Response({'error': f'{HEADER} was already used for a different request.'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    response = Response(json.loads(stored.body), status=stored.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(methods):
+    """
+        Makes the given methods of a view replay their response for a repeated Idempotency-Key.
+
+        Args:
+            methods: HTTP methods the key applies to, e.g. ('POST',).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None or request.method not in methods:
+                return view(request, *args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return Response({'error': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            lookup = {'key': key, 'method': request.method, 'path': request.path[:255]}
+            request_hash = _request_hash(request)
+            now = datetime.now()
+            stored = IdempotencyKey.objects.filter(**lookup).first()
+            if stored is not None:
+                if stored.expires_at > now:
+                    return _replay(stored, request_hash)
+                stored.delete()
+
+            try:
+                with transaction.atomic():
+                    response = view(request, *args, **kwargs)
+                    if status.is_success(response.status_code):
+                        # A concurrent request with the same key that committed first makes
+                        # this insert fail, which also rolls back this request's write.
+                        IdempotencyKey.objects.create(
+                            **lookup,
+                            request_hash=request_hash,
+                            status_code=response.status_code,
+                            body=json.dumps(response.data, cls=JSONEncoder),
+                            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                        )
+            except IntegrityError:
+                stored = IdempotencyKey.objects.filter(**lookup).first()
+                if stored is None:
+                    raise
+                return _replay(stored, request_hash)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,57 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+from .conditional import collection_etag, is_conditional, not_modified, with_validators
+from .fast_serialization import values_serializer
+from .fieldsets import REQUIRED_COLUMNS, narrow_queryset, sparse_fieldset
+
+
+class PrimaryKeyCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key.
+
+    Each page is fetched with ``WHERE id > <cursor> ORDER BY id LIMIT page_size + 1``,
+    so there is no OFFSET scan and no COUNT(*); a deep page costs the same as the
+    first one. The cursor is opaque to clients.
+    """
+    ordering = 'id'
+    page_size = getattr(settings, 'API_PAGE_SIZE', 100)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 1000)
+
+
+def paginated_response(request, queryset, serializer_class):
+    """
+        Serializes one cursor page of ``queryset``.
+
+        Args:
+            request: The incoming HTTP request (carries the ``cursor``, ``page_size``
+                and sparse fieldset ``fields`` / ``exclude`` parameters).
+            queryset: The unordered queryset to paginate.
+            serializer_class: The serializer used for the page items. Unless
+                API_FAST_LIST_SERIALIZATION is off, its output is produced by the
+                equivalent ValuesSerializer instead.
+
+        Returns:
+            Response: ``{'next': ..., 'previous': ..., 'results': [...]}`` with a
+            page ETag, or a 304 response when the client's If-None-Match still
+            matches (checked from the page's ids and updated_at values only).
+    """
+    fieldset = sparse_fieldset(request, serializer_class)
+    if is_conditional(request):
+        paginator = PrimaryKeyCursorPagination()
+        page = paginator.paginate_queryset(queryset.only(*REQUIRED_COLUMNS), request)
+        response = not_modified(request, collection_etag(request, paginator, page))
+        if response is not None:
+            return response
+
+    paginator = PrimaryKeyCursorPagination()
+    if getattr(settings, 'API_FAST_LIST_SERIALIZATION', True):
+        serializer = values_serializer(serializer_class, **{key: tuple(value) for key, value in fieldset.items()})
+        columns = dict.fromkeys([*REQUIRED_COLUMNS, *serializer.sources])
+        page = paginator.paginate_queryset(queryset.values(*columns), request)
+        data = serializer.serialize(page)
+    else:
+        page = paginator.paginate_queryset(narrow_queryset(queryset, serializer_class, fieldset), request)
+        data = serializer_class(page, many=True, **fieldset).data
+    return with_validators(paginator.get_paginated_response(data), collection_etag(request, paginator, page))
@@ -1,20 +1,82 @@
 from rest_framework import serializers
 from base.models import Vendor, PurchaseOrder, HistoricalPerformance
+from vendormanagement.middleware import timing_span
 
 
-class VendorSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """
+    Reports validation and representation time to the request timing middleware
+    as the ``serializer`` span.
+    """
+
+    def is_valid(self, *args, **kwargs):
+        with timing_span('serializer'):
+            return super().is_valid(*args, **kwargs)
+
+    @property
+    def data(self):
+        with timing_span('serializer'):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class SparseFieldsMixin:
+    """
+    Accepts ``fields`` and ``exclude`` keyword arguments that narrow the serialized
+    fields to (or remove) the given names.
+    """
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in exclude or ():
+            self.fields.pop(name, None)
+
+
+class VendorSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Vendor
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
+
+
+class VendorPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves related vendors from ``context['vendors']`` (a pk -> Vendor dict) when the
+    caller preloaded them, e.g. for a bulk request, instead of one query per item.
+    """
+
+    def to_internal_value(self, data):
+        vendors = self.context.get('vendors')
+        if vendors is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            vendor = vendors.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if vendor is None:
+            self.fail('does_not_exist', pk_value=data)
+        return vendor
+
 
+class PurchaseOrderSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    serializer_related_field = VendorPrimaryKeyField
 
-class PurchaseOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = PurchaseOrder
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
 
-class HistoricalPerformanceSerializer(serializers.ModelSerializer):
+class HistoricalPerformanceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = HistoricalPerformance
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
@@ -1,9 +1,29 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import time
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import caches
+from django.db import connection, router
+from django.db.utils import ConnectionDoesNotExist
+from django.http import JsonResponse
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from datetime import datetime, timedelta
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
-from base.models import Vendor, PurchaseOrder, HistoricalPerformance
+from base import performance_cache
+from base.models import Vendor, PurchaseOrder, HistoricalPerformance, IdempotencyKey, VendorMetricAccumulator
+from .db_pool import executor
+from .fast_serialization import values_serializer
+from .filters import filter_purchase_orders
+from .serializers import PurchaseOrderSerializer, VendorSerializer
+from .views import export_purchase_orders
 
 
 class MyTestClass(TestCase):
@@ -67,9 +87,10 @@ class VendorOpsTest(APITestCase):
         # Check response status code
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        # Check response data format (list of serialized vendor objects)
-        self.assertEqual(len(response.data), 2)  # Expecting 2 vendors
-        self.assertIsInstance(response.data[0], dict)  # Each item should be a dictionary
+        # Check response data format (page of serialized vendor objects)
+        self.assertEqual(len(response.data['results']), 2)  # Expecting 2 vendors
+        self.assertIsInstance(response.data['results'][0], dict)  # Each item should be a dictionary
+        self.assertIsNone(response.data['next'])
 
     def test_create_vendor(self):
         """
@@ -126,6 +147,476 @@ class VendorOpsTest(APITestCase):
             self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
+class CursorPaginationTest(APITestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+        for i in range(5):
+            PurchaseOrder.objects.create(vendor=self.vendor, po_number=f'PO{i}',
+                                         order_date=datetime.now(),
+                                         delivery_date=datetime.now() + timedelta(days=1),
+                                         items={'test_item': 1},
+                                         quantity=1,
+                                         status='pending',
+                                         issue_date=datetime.now())
+        self.url = reverse('purchase_order_ops')
+
+    def test_walk_pages_forward_and_back(self):
+        """
+        Tests following next/previous cursors visits every purchase order once, in id order.
+        """
+        response = self.client.get(self.url, {'page_size': 2})
+        seen = [po['id'] for po in response.data['results']]
+        self.assertIsNone(response.data['previous'])
+
+        while response.data['next']:
+            last_page = response
+            response = self.client.get(response.data['next'])
+            seen += [po['id'] for po in response.data['results']]
+
+        self.assertEqual(seen, list(PurchaseOrder.objects.order_by('id').values_list('id', flat=True)))
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(response.data['results'], last_page.data['results'])
+
+    def test_page_query_has_no_offset_or_count(self):
+        """
+        Tests a deep page is fetched with a keyset filter, without OFFSET or COUNT(*).
+        """
+        first_page = self.client.get(self.url, {'page_size': 2})
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(first_page.data['next'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(context.captured_queries), 1)
+        sql = context.captured_queries[0]['sql'].upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+        self.assertIn('LIMIT 3', sql)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SparseFieldsetTest(APITestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address",
+                                            vendor_code="Code")
+        PurchaseOrder.objects.create(vendor=self.vendor, po_number='PO1', order_date=datetime.now(),
+                                     delivery_date=datetime.now() + timedelta(days=1), items={'test_item': 1},
+                                     quantity=1, status='pending', issue_date=datetime.now())
+        self.url = reverse('purchase_order_ops')
+
+    def test_fields(self):
+        """
+        Tests that ?fields= narrows both the output and the SELECT list.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'fields': 'id,status'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': response.data['results'][0]['id'], 'status': 'pending'}])
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertNotIn('"items"', context.captured_queries[0]['sql'])
+
+    def test_exclude(self):
+        """
+        Tests that ?exclude= drops fields from the output and the SELECT list.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('vendor_ops'), {'exclude': 'contact_details,address'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        vendor = response.data['results'][0]
+        self.assertNotIn('address', vendor)
+        self.assertNotIn('contact_details', vendor)
+        self.assertEqual(vendor['name'], 'Test Vendor')
+        self.assertNotIn('"address"', context.captured_queries[0]['sql'])
+
+    def test_vendor_field(self):
+        """
+        Tests that the vendor relation is read from vendor_id without loading the vendor.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'fields': 'vendor'})
+        self.assertEqual(response.data['results'], [{'vendor': self.vendor.id}])
+
+    def test_unknown_field(self):
+        response = self.client.get(self.url, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'fields': ['Unknown field: secret']})
+
+
+class FastListSerializationTest(APITestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Vendör \"1\"", contact_details="Line 1\nLine 2",
+                                            address="Address", vendor_code="Code", quality_rating_avg=4.25)
+        Vendor.objects.create(name="Empty", contact_details="", address="", vendor_code="")
+        base = datetime(2024, 5, 1, 10, 30, 15, 123456)
+        PurchaseOrder.objects.create(vendor=self.vendor, po_number='PO1', order_date=base,
+                                     delivery_date=base + timedelta(days=1), items={'a': [1, 2.5, None], 'b': 'ü'},
+                                     quantity=3, status='completed', quality_rating=4.1, issue_date=base,
+                                     acknowledgement_date=base + timedelta(hours=2))
+        PurchaseOrder.objects.create(vendor=self.vendor, po_number='PO2', order_date=base.replace(microsecond=0),
+                                     delivery_date=base, items=[], quantity=0, status='pending', issue_date=base)
+
+    def assertSameBytes(self, serializer_class, queryset, **kwargs):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, **kwargs).data)
+        serializer = values_serializer(serializer_class, **{key: tuple(value) for key, value in kwargs.items()})
+        actual = JSONRenderer().render(serializer.serialize(queryset.values(*serializer.sources)))
+        self.assertEqual(actual, expected)
+
+    def test_byte_identical_to_model_serializers(self):
+        """
+        Tests that the values() path renders exactly what the ModelSerializers render.
+        """
+        self.assertSameBytes(VendorSerializer, Vendor.objects.order_by('id'))
+        self.assertSameBytes(PurchaseOrderSerializer, PurchaseOrder.objects.order_by('id'))
+        self.assertSameBytes(PurchaseOrderSerializer, PurchaseOrder.objects.order_by('id'), fields=['vendor', 'items'])
+        self.assertSameBytes(VendorSerializer, Vendor.objects.order_by('id'), exclude=['name'])
+
+    def test_list_endpoints_match(self):
+        """
+        Tests that the list responses do not change when the fast path is switched off.
+        """
+        for url in (reverse('vendor_ops'), reverse('purchase_order_ops')):
+            fast = self.client.get(url)
+            with override_settings(API_FAST_LIST_SERIALIZATION=False):
+                slow = self.client.get(url)
+            self.assertEqual(fast.content, slow.content)
+            self.assertEqual(fast['ETag'], slow['ETag'])
+
+
+class PurchaseOrderFilterTest(APITestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+        self.other_vendor = Vendor.objects.create(name="Other Vendor")
+        self.pos = {}
+        for po_number, vendor, po_status, day, rating, acknowledged in [
+            ('PO1', self.vendor, 'pending', 1, None, False),
+            ('PO2', self.vendor, 'completed', 5, 4.5, True),
+            ('PO3', self.other_vendor, 'completed', 10, 2.0, True),
+            ('PO4', self.other_vendor, 'pending', 20, None, False),
+        ]:
+            self.pos[po_number] = PurchaseOrder.objects.create(
+                vendor=vendor, po_number=po_number, order_date=datetime(2024, 5, day),
+                delivery_date=datetime(2024, 5, day) + timedelta(days=7), items={'test_item': 1}, quantity=1,
+                status=po_status, quality_rating=rating, issue_date=datetime(2024, 5, day),
+                acknowledgement_date=datetime(2024, 5, day, 12) if acknowledged else None)
+        self.url = reverse('purchase_order_ops')
+
+    def po_numbers(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [po['po_number'] for po in response.data['results']]
+
+    def test_filters(self):
+        cases = [
+            ({'vendor': self.vendor.id}, ['PO1', 'PO2']),
+            ({'status': 'completed'}, ['PO2', 'PO3']),
+            ({'status': 'completed', 'order_date_from': '2024-05-05', 'order_date_to': '2024-05-10'},
+             ['PO2', 'PO3']),
+            ({'vendor': self.vendor.id, 'issue_date_from': '2024-05-01', 'issue_date_to': '2024-05-01T00:00:00'},
+             ['PO1']),
+            ({'acknowledged': 'false'}, ['PO1', 'PO4']),
+            ({'status': 'completed', 'acknowledged': 'true', 'quality_rating_min': '3'}, ['PO2']),
+            ({'vendor': self.other_vendor.id, 'delivery_date_from': '2024-05-20'}, ['PO4']),
+            ({'vendor': self.other_vendor.id, 'delivery_date_to': '2024-05-20'}, ['PO3']),
+            ({'acknowledged': 'false', 'issue_date_to': '2024-05-15'}, ['PO1']),
+        ]
+        for params, expected in cases:
+            with self.subTest(params):
+                self.assertEqual(self.po_numbers(params), expected)
+
+    def test_filters_with_cursor(self):
+        response = self.client.get(self.url, {'status': 'completed', 'page_size': 1})
+        self.assertEqual([po['po_number'] for po in response.data['results']], ['PO2'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([po['po_number'] for po in response.data['results']], ['PO3'])
+        self.assertIsNone(response.data['next'])
+
+    def test_rejects_unindexed_combinations(self):
+        """
+        Tests that filters which would scan the whole table on their own are rejected.
+        """
+        for params in [{'delivery_date_from': '2024-05-01'}, {'quality_rating_min': '3'},
+                       {'acknowledged': 'true'}, {'order_date_from': '2024-05-01'},
+                       {'order_date_from': '2024-05-01', 'order_date_to': '2024-05-31'},
+                       {'issue_date_to': '2024-05-01', 'quality_rating_max': '2'}]:
+            with self.subTest(params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('non_field_errors', response.data)
+
+    def test_invalid_values(self):
+        response = self.client.get(self.url, {'vendor': 'abc', 'order_date_from': 'yesterday',
+                                              'quality_rating_min': 'high', 'acknowledged': 'maybe'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'vendor', 'order_date_from', 'quality_rating_min', 'acknowledged'})
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plan assertions are written for SQLite EXPLAIN QUERY PLAN output.')
+    def test_every_supported_filter_uses_an_index(self):
+        """
+        Tests that each driving filter, alone and after a cursor, reads purchase orders through an
+        index in id order, so no page sorts the matching rows.
+        """
+        for params in [{'vendor': '1'}, {'status': 'pending'}, {'acknowledged': 'false'},
+                       {'vendor': '1', 'status': 'pending'},
+                       {'status': 'pending', 'order_date_from': '2024-05-01', 'order_date_to': '2024-05-31'},
+                       {'vendor': '1', 'issue_date_from': '2024-05-01', 'issue_date_to': '2024-05-31',
+                        'quality_rating_min': '3'},
+                       {'acknowledged': 'false', 'issue_date_from': '2024-05-01', 'issue_date_to': '2024-05-31'},
+                       {'status': 'completed', 'delivery_date_from': '2024-05-01', 'acknowledged': 'true'}]:
+            queryset = filter_purchase_orders(PurchaseOrder.objects.all(), params)
+            for name, page in [('first page', queryset), ('next page', queryset.filter(id__gt=1))]:
+                with self.subTest(params=params, page=name):
+                    plan = page.order_by('id')[:51].explain()
+                    self.assertRegex(plan, r'(SEARCH|SCAN) base_purchaseorder USING (COVERING )?INDEX',
+                                     msg=f'{params} is not read through an index:\n{plan}')
+                    self.assertNotIn('TEMP B-TREE', plan, msg=f'{params} sorts every page:\n{plan}')
+                    if {'vendor', 'status'} <= set(params):
+                        # Both columns seek, instead of filtering one status' orders by vendor.
+                        self.assertIn('po_vendor_status_idx (vendor_id=? AND status=?', plan)
+
+
+class ExportPurchaseOrdersTest(APITestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+        self.other_vendor = Vendor.objects.create(name="Other Vendor")
+        for vendor, po_status, days_ago in [(self.vendor, 'pending', 10), (self.vendor, 'completed', 1),
+                                            (self.other_vendor, 'completed', 1)]:
+            PurchaseOrder.objects.create(vendor=vendor, po_number=f'PO-{po_status}',
+                                         order_date=datetime(2024, 5, 20) - timedelta(days=days_ago),
+                                         delivery_date=datetime(2024, 5, 21),
+                                         items={'test_item': 1, 'other': [1, 2]},
+                                         quantity=1,
+                                         status=po_status,
+                                         quality_rating=4.5,
+                                         issue_date=datetime(2024, 5, 19))
+        self.url = reverse('export_purchase_orders')
+
+    def read_ndjson(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_ndjson_matches_serializer(self):
+        """
+        Tests every exported line is the serializer representation of a purchase order.
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        expected = json.loads(json.dumps(
+            PurchaseOrderSerializer(PurchaseOrder.objects.order_by('id'), many=True).data
+        ))
+        self.assertEqual(self.read_ndjson(response), expected)
+
+    def test_csv(self):
+        response = self.client.get(self.url, {'format': 'csv'})
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], list(PurchaseOrderSerializer().fields))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(json.loads(rows[1][rows[0].index('items')]), {'test_item': 1, 'other': [1, 2]})
+
+    def test_filters(self):
+        response = self.client.get(self.url, {'vendor': self.vendor.pk, 'status': 'completed'})
+        rows = self.read_ndjson(response)
+        self.assertEqual([(row['vendor'], row['status']) for row in rows], [(self.vendor.pk, 'completed')])
+
+        response = self.client.get(self.url, {'from': '2024-05-15', 'to': '2024-05-19'})
+        self.assertEqual(len(self.read_ndjson(response)), 2)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'from': 'yesterday'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'vendor': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkPurchaseOrdersTest(APITestCase):
+
+    def setUp(self):
+        self.vendors = [Vendor.objects.create(name=f"Vendor {i}") for i in range(2)]
+        self.url = reverse('bulk_purchase_orders')
+
+    def item(self, vendor, po_number, **kwargs):
+        item = {'po_number': po_number, 'vendor': vendor.pk,
+                'order_date': '2024-05-01T10:00:00', 'delivery_date': '2030-05-10T10:00:00',
+                'issue_date': '2024-05-01T10:00:00', 'acknowledgement_date': '2024-05-01T12:00:00',
+                'items': {'test_item': 1}, 'quantity': 1, 'status': 'completed', 'quality_rating': 4.0}
+        item.update(kwargs)
+        return item
+
+    def test_bulk_create_refreshes_each_vendor_once(self):
+        """
+        Tests a batch is inserted and each vendor gets its metrics and one snapshot.
+        """
+        data = [self.item(vendor, f'PO-{vendor.pk}-{i}') for vendor in self.vendors for i in range(5)]
+        data.append(self.item(self.vendors[0], 'PO-pending', status='pending', quality_rating=None,
+                              acknowledgement_date=None))
+
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 11)
+        self.assertEqual(PurchaseOrder.objects.count(), 11)
+        self.assertEqual(HistoricalPerformance.objects.count(), 2)
+        vendor = Vendor.objects.get(pk=self.vendors[0].pk)
+        self.assertEqual(vendor.on_time_delivery_rate, 1.0)
+        self.assertEqual(vendor.quality_rating_avg, 4.0)
+        self.assertEqual(vendor.average_response_time, 2.0)
+        self.assertAlmostEqual(vendor.fulfillment_rate, 5 / 6)
+        self.assertEqual(vendor.metric_accumulator.total_pos, 6)
+
+    def test_bulk_upsert_updates_existing_po_number(self):
+        self.client.post(self.url, [self.item(self.vendors[0], 'PO-1', quality_rating=2.0)], format='json')
+
+        response = self.client.post(self.url, [self.item(self.vendors[0], 'PO-1', quality_rating=5.0),
+                                               self.item(self.vendors[0], 'PO-2')], format='json')
+
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+        self.assertEqual(PurchaseOrder.objects.get(po_number='PO-1').quality_rating, 5.0)
+        self.assertEqual(Vendor.objects.get(pk=self.vendors[0].pk).quality_rating_avg, 4.5)
+
+    def test_bulk_upsert_stamps_like_save(self):
+        self.client.post(self.url, [self.item(self.vendors[0], 'PO-1', status='pending', quality_rating=None)],
+                         format='json')
+        before = PurchaseOrder.objects.get(po_number='PO-1')
+        self.assertIsNone(before.completed_date)
+
+        self.client.post(self.url, [self.item(self.vendors[0], 'PO-1')], format='json')
+
+        after = PurchaseOrder.objects.get(po_number='PO-1')
+        self.assertIsNotNone(after.completed_date)
+        self.assertGreater(after.updated_at, before.updated_at)
+
+    def test_per_item_errors_write_nothing(self):
+        data = [self.item(self.vendors[0], 'PO-1'), self.item(self.vendors[0], 'PO-2', quantity='many'),
+                self.item(self.vendors[1], 'PO-1')]
+
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('quantity', errors[1])
+        self.assertIn('po_number', errors[2])
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+    def test_unhashable_po_number_is_an_item_error(self):
+        data = [self.item(self.vendors[0], ['PO-1']), self.item(self.vendors[0], {'number': 1}),
+                self.item(self.vendors[0], 7), self.item(self.vendors[1], '7')]
+
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertIn('po_number', errors[0])
+        self.assertIn('po_number', errors[1])
+        self.assertEqual(errors[2], {})
+        self.assertEqual(errors[3], {'po_number': ['Duplicate po_number in batch.']})
+
+    def test_requires_list(self):
+        response = self.client.post(self.url, self.item(self.vendors[0], 'PO-1'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class IdempotencyKeyTest(APITestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+        self.url = reverse('purchase_order_ops')
+        self.data = {'po_number': 'PO-1', 'vendor': self.vendor.pk,
+                     'order_date': '2024-05-01T10:00:00', 'delivery_date': '2030-05-10T10:00:00',
+                     'issue_date': '2024-05-01T10:00:00', 'items': {'test_item': 1}, 'quantity': 1,
+                     'status': 'completed', 'quality_rating': 4.0}
+
+    def test_retried_create_is_replayed(self):
+        """
+        Tests a retried POST returns the stored response with one lookup and creates nothing.
+        """
+        first = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(1):
+            retry = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+        self.assertEqual(VendorMetricAccumulator.objects.get(vendor=self.vendor).total_pos, 1)
+
+        self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='create-2')
+        self.client.post(self.url, self.data, format='json')
+        self.assertEqual(PurchaseOrder.objects.count(), 3)
+
+    def test_key_reused_for_different_request(self):
+        self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+
+        response = self.client.post(self.url, dict(self.data, quantity=2), format='json',
+                                    HTTP_IDEMPOTENCY_KEY='create-1')
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        response = self.client.post(self.url, dict(self.data, quantity='many'), format='json',
+                                    HTTP_IDEMPOTENCY_KEY='create-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+    def test_expired_key_runs_again(self):
+        self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+        IdempotencyKey.objects.update(expires_at=datetime.now() - timedelta(seconds=1))
+
+        response = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(PurchaseOrder.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_retried_update_and_acknowledge_are_replayed(self):
+        purchase_order = PurchaseOrder.objects.create(vendor=self.vendor, order_date=datetime.now(),
+                                                      delivery_date=datetime.now() + timedelta(days=1),
+                                                      items={'test_item': 1}, quantity=1, status='pending',
+                                                      issue_date=datetime.now() - timedelta(hours=1))
+        po_url = reverse('get_po_by_id', kwargs={'po_id': purchase_order.pk})
+        acknowledge_url = reverse('acknowledge_purchase_order', kwargs={'po_id': purchase_order.pk})
+
+        self.client.post(acknowledge_url, HTTP_IDEMPOTENCY_KEY='ack-1')
+        acknowledged = PurchaseOrder.objects.get(pk=purchase_order.pk).acknowledgement_date
+        with self.assertNumQueries(1):
+            response = self.client.post(acknowledge_url, HTTP_IDEMPOTENCY_KEY='ack-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(PurchaseOrder.objects.get(pk=purchase_order.pk).acknowledgement_date, acknowledged)
+
+        first = self.client.put(po_url, {'quantity': 5}, format='json', HTTP_IDEMPOTENCY_KEY='put-1')
+        with self.assertNumQueries(1):
+            retry = self.client.put(po_url, {'quantity': 5}, format='json', HTTP_IDEMPOTENCY_KEY='put-1')
+        self.assertEqual(retry.json(), first.json())
+
+    def test_invalid_key(self):
+        response = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='k' * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+
 class GetVendorByIdTest(APITestCase):
 
     def setUp(self):
@@ -272,9 +763,67 @@ class GetPOByIdTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class PurchaseOrderWriteTransactionTest(APITestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+        fields = {'vendor': self.vendor, 'order_date': datetime(2024, 5, 1), 'delivery_date': datetime(2024, 5, 10),
+                  'issue_date': datetime(2024, 5, 1), 'acknowledgement_date': datetime(2024, 5, 2),
+                  'items': {'test_item': 1}, 'quantity': 1}
+        PurchaseOrder.objects.create(status='completed', completed_date=datetime(2024, 5, 5), quality_rating=3.0,
+                                     **fields)
+        self.purchase_order = PurchaseOrder.objects.create(status='completed', completed_date=datetime(2024, 5, 5),
+                                                           quality_rating=4.0, **fields)
+        self.url = reverse('get_po_by_id', kwargs={'po_id': self.purchase_order.pk})
+
+    def vendor_updates(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('UPDATE "base_vendor" ')]
+
+    def test_update_runs_in_one_transaction(self):
+        """
+        Tests a PO update, its metric refresh and snapshot cost an exact number of queries in one transaction.
+        """
+        with CaptureQueriesContext(connection) as context:
+            # Order: lock, previous values, update; accumulator, daily row, accumulator
+            # read, vendor, ranking; snapshot vendor read and insert, three rollups;
+            # plus the savepoints of the nested blocks.
+            with self.assertNumQueries(31):
+                response = self.client.put(self.url, {'quality_rating': 5.0}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # One block from the first query to the last (a savepoint inside the test's transaction).
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertTrue(queries[0].startswith('SAVEPOINT '))
+        self.assertEqual(queries[-1], f'RELEASE {queries[0]}')
+        updates = self.vendor_updates(context.captured_queries)
+        self.assertEqual(len(updates), 1)
+        self.assertRegex(updates[0], r'^UPDATE "base_vendor" SET "quality_rating_avg" = 4\.0, "updated_at" = ')
+        self.assertEqual(HistoricalPerformance.objects.get().quality_rating_avg, 4.0)
+
+    def test_acknowledge_writes_only_response_time(self):
+        acknowledge_url = reverse('acknowledge_purchase_order', kwargs={'po_id': self.purchase_order.pk})
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(acknowledge_url)
+
+        updates = self.vendor_updates(context.captured_queries)
+        self.assertEqual(len(updates), 1)
+        self.assertRegex(updates[0], r'^UPDATE "base_vendor" SET "average_response_time" = [^,]+, "updated_at" = ')
+
+    def test_failed_snapshot_rolls_back_update(self):
+        with mock.patch('api.views.request_historical_performance', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.put(self.url, {'quality_rating': 5.0}, format='json')
+
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.purchase_order.pk).quality_rating, 4.0)
+        self.assertEqual(Vendor.objects.get(pk=self.vendor.pk).quality_rating_avg, 3.5)
+        self.assertEqual(VendorMetricAccumulator.objects.get(vendor=self.vendor).quality_rating_sum, 7.0)
+
+
 class GetVendorPerformanceTest(APITestCase):
 
     def setUp(self):
+        # Vendor ids are reused between tests, so start from an empty performance cache.
+        caches['vendor_performance'].clear()
         self.vendor = Vendor.objects.create(name="Test Vendor")
         self.url = reverse('get_vendor_performance', kwargs={'vendor_id': self.vendor.pk})
 
@@ -340,3 +889,511 @@ class GetVendorPerformanceTest(APITestCase):
         self.assertEqual(response.data['quality_rating_avg'], 0.0)
         self.assertEqual(response.data['average_response_time'], 0.0)
         self.assertEqual(response.data['fulfillment_rate'], 0.0)
+
+    def test_performance_is_cached_until_metrics_change(self):
+        """
+        Tests repeated polls are served from the cache and a PO write invalidates the entry.
+        """
+        performance_cache.reset_stats()
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['fulfillment_rate'], 0.0)
+        self.assertEqual(performance_cache.stats()['hits'], 1)
+
+        purchase_order = PurchaseOrder.objects.create(vendor=self.vendor,
+                                                      order_date=datetime.now(),
+                                                      delivery_date=datetime.now() + timedelta(days=1),
+                                                      items={'test_item': 1},
+                                                      quantity=1,
+                                                      status='completed',
+                                                      quality_rating=4.0,
+                                                      issue_date=datetime.now() - timedelta(hours=2))
+        self.client.post(reverse('acknowledge_purchase_order', kwargs={'po_id': purchase_order.pk}))
+        self.client.put(reverse('get_po_by_id', kwargs={'po_id': purchase_order.pk}),
+                        {'status': 'completed'}, format='json')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['fulfillment_rate'], 1.0)
+        self.assertEqual(response.data['quality_rating_avg'], 4.0)
+
+        stats = self.client.get(reverse('get_performance_cache_stats')).data
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_performance_as_of_date(self):
+        """
+        Tests as_of reports the metrics as they stood at the end of that day, in one query.
+        """
+        fields = {'items': {'test_item': 1}, 'quantity': 1}
+        PurchaseOrder.objects.create(vendor=self.vendor, order_date=datetime(2024, 5, 1, 9),
+                                     delivery_date=datetime(2024, 5, 5), issue_date=datetime(2024, 5, 1, 10),
+                                     acknowledgement_date=datetime(2024, 5, 1, 12), status='completed',
+                                     completed_date=datetime(2024, 5, 3), quality_rating=4.0, **fields)
+        PurchaseOrder.objects.create(vendor=self.vendor, order_date=datetime(2024, 5, 2, 9),
+                                     delivery_date=datetime(2024, 5, 4), issue_date=datetime(2024, 5, 2, 10),
+                                     acknowledgement_date=datetime(2024, 5, 2, 16), status='completed',
+                                     completed_date=datetime(2024, 5, 6), quality_rating=2.0, **fields)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'as_of': '2024-05-03'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'on_time_delivery_rate': 1.0, 'quality_rating_avg': 4.0,
+                                         'average_response_time': 4.0, 'fulfillment_rate': 0.5,
+                                         'as_of': '2024-05-03'})
+
+        response = self.client.get(self.url, {'as_of': '2024-05-06T08:00:00'})
+        self.assertEqual(response.data['on_time_delivery_rate'], 0.5)
+        self.assertEqual(response.data['quality_rating_avg'], 3.0)
+        self.assertEqual(response.data['fulfillment_rate'], 1.0)
+
+        response = self.client.get(self.url, {'as_of': '2024-04-30'})
+        self.assertEqual(response.data['fulfillment_rate'], 0.0)
+
+    def test_performance_as_of_errors(self):
+        """
+        Tests as_of rejects invalid dates and unknown vendors.
+        """
+        response = self.client.get(self.url, {'as_of': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        url = reverse('get_vendor_performance', kwargs={'vendor_id': self.vendor.pk + 100})
+        response = self.client.get(url, {'as_of': '2024-05-01'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class GetVendorPerformanceHistoryTest(APITestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+        self.url = reverse('get_vendor_performance_history', kwargs={'vendor_id': self.vendor.pk})
+        for day, rate in [(1, 0.5), (1, 0.7), (2, 0.9)]:
+            HistoricalPerformance.objects.create(vendor=self.vendor, date=datetime(2024, 5, day, 12),
+                                                 on_time_delivery_rate=rate, quality_rating_avg=4.0,
+                                                 average_response_time=1.0, fulfillment_rate=rate)
+
+    def test_daily_history_from_rollups(self):
+        """
+        Tests the history is read from the rollups with a vendor check and one range query.
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'bucket': 'day', 'from': '2024-05-01', 'to': '2024-05-31'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['bucket'], 'day')
+        first, second = response.data['results']
+        self.assertEqual(first['count'], 2)
+        self.assertAlmostEqual(first['on_time_delivery_rate']['avg'], 0.6)
+        self.assertEqual(first['fulfillment_rate']['last'], 0.7)
+        self.assertEqual(second['on_time_delivery_rate']['max'], 0.9)
+
+    def test_range_filter(self):
+        response = self.client.get(self.url, {'from': '2024-05-02'})
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'bucket': 'month'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'to': 'soon'}).status_code, status.HTTP_400_BAD_REQUEST)
+        url = reverse('get_vendor_performance_history', kwargs={'vendor_id': 100})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+@modify_settings(MIDDLEWARE={'prepend': 'vendormanagement.middleware.RequestTimingMiddleware'})
+class RequestTimingMiddlewareTest(APITestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Vendor", contact_details="Contact",
+                                            address="Address", vendor_code="Code")
+
+    def timings(self, response):
+        """
+        Parses a Server-Timing header into {name: (duration, description)}.
+        """
+        metrics = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            params = dict(param.split('=', 1) for param in params)
+            metrics[name] = (float(params['dur']) if 'dur' in params else None, params.get('desc'))
+        return metrics
+
+    def test_server_timing_header(self):
+        """
+        Tests that the header reports the query count and every timing.
+        """
+        url = reverse('get_vendor_by_id', kwargs={'vendor_id': self.vendor.id})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        metrics = self.timings(response)
+        self.assertEqual(set(metrics), {'db', 'serializer', 'view', 'total'})
+        self.assertEqual(metrics['db'][1], f'"{len(context.captured_queries)} queries"')
+        self.assertGreater(metrics['serializer'][0], 0)
+        self.assertLessEqual(metrics['view'][0], metrics['total'][0])
+
+    async def test_async_chain(self):
+        """
+        Tests that in an async middleware chain a sync view's queries are still counted.
+        """
+        url = reverse('get_vendor_by_id', kwargs={'vendor_id': self.vendor.id})
+        response = await AsyncClient().get(url)
+        expected = await sync_to_async(self.client.get)(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.timings(response)['db'][1], self.timings(expected)['db'][1])
+
+    def test_log_line(self):
+        """
+        Tests that one JSON record is logged per request.
+        """
+        with self.assertLogs('vendormanagement.request_timing', level='INFO') as logs:
+            response = self.client.get(reverse('vendor_ops'))
+
+        self.assertEqual(len(logs.records), 1)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertEqual(record['path'], reverse('vendor_ops'))
+        self.assertEqual(record['status'], response.status_code)
+        self.assertEqual(record['over_budget'], [])
+        self.assertEqual(set(record), {'method', 'path', 'status', 'queries', 'db_ms', 'serializer_ms',
+                                       'view_ms', 'total_ms', 'over_budget'})
+
+    @override_settings(REQUEST_TIMING_QUERY_BUDGET=0, REQUEST_TIMING_LATENCY_BUDGET_MS=0)
+    def test_over_budget(self):
+        """
+        Tests that requests over the query or latency budget are flagged.
+        """
+        with self.assertLogs('vendormanagement.request_timing', level='WARNING') as logs:
+            response = self.client.get(reverse('get_vendor_by_id', kwargs={'vendor_id': self.vendor.id}))
+
+        self.assertEqual(json.loads(logs.records[0].getMessage())['over_budget'], ['queries', 'latency'])
+        self.assertEqual(self.timings(response)['budget'][1], '"exceeded: queries,latency"')
+
+    def test_disabled_by_default(self):
+        """
+        Tests that the middleware is opt-in.
+        """
+        with modify_settings(MIDDLEWARE={'remove': 'vendormanagement.middleware.RequestTimingMiddleware'}):
+            response = self.client.get(reverse('vendor_ops'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class ConditionalGetTest(APITestCase):
+
+    def setUp(self):
+        caches['vendor_performance'].clear()
+        self.vendor = Vendor.objects.create(name="Vendor", contact_details="Contact",
+                                            address="Address", vendor_code="Code")
+        self.purchase_order = PurchaseOrder.objects.create(
+            po_number="PO-1", vendor=self.vendor, order_date=datetime.now(),
+            delivery_date=datetime.now() + timedelta(days=5), items={'item': 1}, quantity=1,
+            status="pending", issue_date=datetime.now(),
+        )
+        self.vendor_url = reverse('get_vendor_by_id', kwargs={'vendor_id': self.vendor.id})
+        self.po_url = reverse('get_po_by_id', kwargs={'po_id': self.purchase_order.id})
+
+    def test_vendor_not_modified(self):
+        """
+        Tests that a matching If-None-Match gets a 304 from a single query.
+        """
+        response = self.client.get(self.vendor_url)
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.vendor_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_vendor_modified_by_metrics(self):
+        """
+        Tests that a metric refresh changes the vendor's ETag.
+        """
+        etag = self.client.get(self.vendor_url)['ETag']
+        self.client.post(reverse('acknowledge_purchase_order', kwargs={'po_id': self.purchase_order.id}))
+
+        response = self.client.get(self.vendor_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        """
+        Tests that If-Modified-Since with the Last-Modified value gets a 304.
+        """
+        last_modified = self.client.get(self.po_url)['Last-Modified']
+        response = self.client.get(self.po_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_purchase_order_modified(self):
+        """
+        Tests that updating a purchase order changes its ETag.
+        """
+        etag = self.client.get(self.po_url)['ETag']
+        put = self.client.put(self.po_url, {'quantity': 2}, format='json')
+
+        response = self.client.get(self.po_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], put['ETag'])
+
+    def test_missing_row(self):
+        """
+        Tests that a conditional GET of a missing row is still a 404.
+        """
+        url = reverse('get_po_by_id', kwargs={'po_id': self.purchase_order.id + 100})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"x"').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_performance_not_modified(self):
+        """
+        Tests that the performance ETag follows the latest snapshot.
+        """
+        def snapshot(quality_rating_avg):
+            HistoricalPerformance.objects.create(vendor=self.vendor, date=datetime.now(),
+                                                 on_time_delivery_rate=1.0, quality_rating_avg=quality_rating_avg,
+                                                 average_response_time=1.0, fulfillment_rate=1.0)
+
+        url = reverse('get_vendor_performance', kwargs={'vendor_id': self.vendor.id})
+        snapshot(3.0)
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                             status.HTTP_304_NOT_MODIFIED)
+
+        caches['vendor_performance'].clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                             status.HTTP_304_NOT_MODIFIED)
+
+        snapshot(4.0)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quality_rating_avg'], 4.0)
+
+    def test_list_page_not_modified(self):
+        """
+        Tests the page-level ETag of the purchase order list.
+        """
+        url = reverse('purchase_order_ops')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.put(self.po_url, {'quantity': 3}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['quantity'], 3)
+
+
+class AsyncReadViewsTest(TransactionTestCase):
+    """
+    The async views run their queries on the pool's own connections, which only
+    see committed data, hence TransactionTestCase.
+    """
+
+    def setUp(self):
+        caches['vendor_performance'].clear()
+        self.vendor = Vendor.objects.create(name="Vendor", contact_details="Contact",
+                                            address="Address", vendor_code="Code")
+        self.purchase_order = PurchaseOrder.objects.create(
+            po_number="PO-1", vendor=self.vendor, order_date=datetime.now(),
+            delivery_date=datetime.now() + timedelta(days=5), items={'item': 1}, quantity=1,
+            status="completed", quality_rating=4.0, issue_date=datetime.now(),
+        )
+        HistoricalPerformance.objects.create(vendor=self.vendor, date=datetime.now(), on_time_delivery_rate=1.0,
+                                             quality_rating_avg=4.0, average_response_time=1.0,
+                                             fulfillment_rate=1.0)
+        self.pairs = [
+            ('vendor_ops', 'async_vendor_list', {}),
+            ('get_vendor_by_id', 'async_vendor_detail', {'vendor_id': self.vendor.id}),
+            ('purchase_order_ops', 'async_purchase_order_list', {}),
+            ('get_po_by_id', 'async_purchase_order_detail', {'po_id': self.purchase_order.id}),
+            ('get_vendor_performance', 'async_vendor_performance', {'vendor_id': self.vendor.id}),
+        ]
+
+    async def test_same_responses_as_sync_views(self):
+        """
+        Tests that every async read endpoint returns what its sync counterpart returns.
+        """
+        client = AsyncClient()
+        for sync_name, async_name, kwargs in self.pairs:
+            # Django 3.2's AsyncClient does not encode GET data into the query string.
+            response = await client.get(reverse(async_name, kwargs=kwargs) + '?page_size=10')
+            expected = await sync_to_async(self.client.get)(reverse(sync_name, kwargs=kwargs), {'page_size': 10})
+            self.assertEqual(response.status_code, status.HTTP_200_OK, async_name)
+            self.assertEqual(response.content, expected.content, async_name)
+            self.assertEqual(response['ETag'], expected['ETag'], async_name)
+
+    async def test_conditional_get(self):
+        client = AsyncClient()
+        url = reverse('async_vendor_detail', kwargs={'vendor_id': self.vendor.id})
+        etag = (await client.get(url))['ETag']
+        # AsyncClient takes headers by their HTTP names.
+        response = await client.get(url, **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_not_found_and_read_only(self):
+        client = AsyncClient()
+        response = await client.get(reverse('async_purchase_order_detail', kwargs={'po_id': 10 ** 6}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await client.post(reverse('async_vendor_list'), {'name': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    @modify_settings(MIDDLEWARE={'prepend': 'vendormanagement.middleware.RequestTimingMiddleware'})
+    async def test_request_timing_counts_pool_queries(self):
+        """
+        Tests that queries run on the pool count towards the request's Server-Timing.
+        """
+        response = await AsyncClient().get(reverse('async_vendor_detail', kwargs={'vendor_id': self.vendor.id}))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_pool_is_bounded(self):
+        self.assertEqual(executor()._max_workers, 8)
+
+
+@mock.patch('vendormanagement.db_router.replica_alias', return_value='replica')
+class ReadReplicaRoutingTest(TestCase):
+
+    def route(self, request):
+        """
+        Runs ``request`` through ReadReplicaMiddleware and returns (read alias, write alias, response).
+        """
+        from vendormanagement.db_router import ReadReplicaMiddleware
+
+        seen = {}
+
+        def view(request):
+            seen['read'] = router.db_for_read(Vendor)
+            seen['write'] = router.db_for_write(Vendor)
+            return JsonResponse({})
+
+        response = ReadReplicaMiddleware(view)(request)
+        return seen['read'], seen['write'], response
+
+    def test_get_reads_from_replica(self, replica_alias):
+        read, write, response = self.route(RequestFactory().get('/api/vendors'))
+        self.assertEqual((read, write), ('replica', 'default'))
+        self.assertNotIn('primary_until', response.cookies)
+
+    def test_write_pins_client_to_primary(self, replica_alias):
+        """
+        Tests read-your-writes: after a write the client reads from the primary until the cookie expires.
+        """
+        read, write, response = self.route(RequestFactory().post('/api/purchase_orders'))
+        self.assertEqual((read, write), ('default', 'default'))
+        cookie = response.cookies['primary_until']
+        self.assertEqual(cookie['max-age'], 10)
+
+        request = RequestFactory().get('/api/vendors')
+        request.COOKIES['primary_until'] = cookie.value
+        self.assertEqual(self.route(request)[0], 'default')
+
+        request.COOKIES['primary_until'] = str(time.time() - 1)
+        self.assertEqual(self.route(request)[0], 'replica')
+
+    def test_performance_cache_is_filled_from_primary(self, replica_alias):
+        """
+        Tests a replica-routed performance read takes the cached payload from the primary.
+        """
+        from vendormanagement.db_router import _use_replica
+
+        caches['vendor_performance'].clear()
+        vendor = Vendor.objects.create(name="Test Vendor")
+        # 'replica' is not in DATABASES here, so any query routed to it would fail.
+        token = _use_replica.set(True)
+        try:
+            response = self.client.get(reverse('get_vendor_performance', kwargs={'vendor_id': vendor.pk}))
+        finally:
+            _use_replica.reset(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(performance_cache.get(vendor.pk))
+
+    def test_export_streams_from_replica(self, replica_alias):
+        """
+        Tests the export stream reads the database chosen while the request was routed.
+        """
+        from vendormanagement.db_router import ReadReplicaMiddleware
+
+        response = ReadReplicaMiddleware(export_purchase_orders)(
+            RequestFactory().get(reverse('export_purchase_orders')))
+        # 'replica' is not in DATABASES here, so reading the stream from it fails.
+        with self.assertRaisesMessage(ConnectionDoesNotExist, 'replica'):
+            b''.join(response.streaming_content)
+
+    def test_reads_outside_requests_use_primary(self, replica_alias):
+        self.assertEqual(router.db_for_read(Vendor), 'default')
+
+    def test_async_chain_stays_async(self, replica_alias):
+        """
+        Tests that in an async middleware chain the replica is routed around the awaited view.
+        """
+        from vendormanagement.db_router import ReadReplicaMiddleware
+
+        seen = {}
+
+        async def view(request):
+            seen['read'] = router.db_for_read(Vendor)
+            return JsonResponse({})
+
+        middleware = ReadReplicaMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        async_to_sync(middleware)(RequestFactory().get('/api/async/vendors'))
+        self.assertEqual(seen['read'], 'replica')
+
+        response = async_to_sync(middleware)(RequestFactory().post('/api/purchase_orders'))
+        self.assertEqual(seen['read'], 'default')
+        self.assertIn('primary_until', response.cookies)
+
+    def test_no_replica_configured(self, replica_alias):
+        replica_alias.return_value = None
+        read, write, response = self.route(RequestFactory().post('/api/purchase_orders'))
+        self.assertEqual(read, 'default')
+        self.assertNotIn('primary_until', response.cookies)
+
+
+class VendorRankingsTest(APITestCase):
+
+    def setUp(self):
+        self.vendors = []
+        for i, rating in enumerate([3.0, 5.0, 4.0]):
+            vendor = Vendor.objects.create(name=f"Vendor {i}")
+            PurchaseOrder.objects.create(vendor=vendor, po_number=f'PO{i}', order_date=datetime.now(),
+                                         delivery_date=datetime.now() + timedelta(days=1), items={'item': 1},
+                                         quantity=1, status='completed', quality_rating=rating,
+                                         issue_date=datetime.now())
+            self.vendors.append(vendor)
+        self.url = reverse('get_vendor_rankings')
+
+    def test_top_n(self):
+        response = self.client.get(self.url, {'metric': 'quality_rating_avg', 'limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['direction'], 'desc')
+        self.assertEqual(response.data['results'], [
+            {'rank': 1, 'vendor': self.vendors[1].id, 'name': 'Vendor 1', 'value': 5.0, 'total_pos': 1},
+            {'rank': 2, 'vendor': self.vendors[2].id, 'name': 'Vendor 2', 'value': 4.0, 'total_pos': 1},
+        ])
+
+    def test_own_rank(self):
+        url = reverse('get_vendor_rank', kwargs={'vendor_id': self.vendors[0].id})
+        response = self.client.get(url, {'metric': 'quality_rating_avg'})
+        self.assertEqual(response.data['rank'], 3)
+        response = self.client.get(url, {'metric': 'quality_rating_avg', 'direction': 'asc'})
+        self.assertEqual(response.data['rank'], 1)
+        response = self.client.get(url, {'metric': 'quality_rating_avg', 'min_pos': 2})
+        self.assertIsNone(response.data['rank'])
+
+    def test_vendor_without_orders(self):
+        vendor = Vendor.objects.create(name="New Vendor")
+        response = self.client.get(reverse('get_vendor_rank', kwargs={'vendor_id': vendor.id}),
+                                   {'metric': 'fulfillment_rate'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['rank'])
+
+        response = self.client.get(reverse('get_vendor_rank', kwargs={'vendor_id': vendor.id + 100}),
+                                   {'metric': 'fulfillment_rate'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_parameters(self):
+        for params in ({}, {'metric': 'name'}, {'metric': 'fulfillment_rate', 'direction': 'up'},
+                       {'metric': 'fulfillment_rate', 'min_pos': 'x'}, {'metric': 'fulfillment_rate', 'limit': 0}):
+            with self.subTest(params):
+                self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.url, {'metric': 'fulfillment_rate', 'limit': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': 'limit must be an integer'})
@@ -1,12 +1,29 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('vendors', views.vendor_ops, name='vendor_ops'),
     path('vendors/<int:vendor_id>', views.get_vendor_by_id, name='get_vendor_by_id'),
+    path('vendors/rankings', views.get_vendor_rankings, name='get_vendor_rankings'),
+    path('vendors/<int:vendor_id>/rank', views.get_vendor_rank, name='get_vendor_rank'),
     path('purchase_orders', views.purchase_order_ops, name='purchase_order_ops'),
+    path('purchase_orders/bulk', views.bulk_purchase_orders, name='bulk_purchase_orders'),
+    path('purchase_orders/export', views.export_purchase_orders, name='export_purchase_orders'),
     path('purchase_orders/<int:po_id>', views.get_po_by_id, name='get_po_by_id'),
     path('purchase_orders/<int:po_id>/acknowledge', views.acknowledge_purchase_order,
          name='acknowledge_purchase_order'),
     path('vendors/<int:vendor_id>/performance/', views.get_vendor_performance, name='get_vendor_performance'),
+    path('vendors/<int:vendor_id>/performance/history', views.get_vendor_performance_history,
+         name='get_vendor_performance_history'),
+    path('performance_cache', views.get_performance_cache_stats, name='get_performance_cache_stats'),
+    path('metrics_queue', views.get_metrics_queue_status, name='get_metrics_queue_status'),
+
+    # Async read variants; see api.async_views.
+    path('async/vendors', async_views.vendor_list, name='async_vendor_list'),
+    path('async/vendors/<int:vendor_id>', async_views.vendor_detail, name='async_vendor_detail'),
+    path('async/purchase_orders', async_views.purchase_order_list, name='async_purchase_order_list'),
+    path('async/purchase_orders/<int:po_id>', async_views.purchase_order_detail,
+         name='async_purchase_order_detail'),
+    path('async/vendors/<int:vendor_id>/performance/', async_views.vendor_performance,
+         name='async_vendor_performance'),
 ]
@@ -1,21 +1,34 @@
+from django.conf import settings
+from django.db import router, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
+from base import performance_cache
+from base.daily_metrics import metrics_as_of
+from base.metrics_queue import queue_status, request_historical_performance
 from base.models import Vendor, PurchaseOrder, HistoricalPerformance
+from base.rankings import DIRECTIONS as RANKING_DIRECTIONS, METRICS as RANKING_METRICS, top_vendors, vendor_rank
+from base.rollups import BUCKETS as ROLLUP_BUCKETS, rollup_history
+from .bulk import duplicate_po_number_errors, upsert_purchase_orders
+from .conditional import is_conditional, not_modified, row_not_modified, row_validators, with_validators
+from .export import EXPORT_FORMATS, export_queryset
+from .filters import filter_purchase_orders, parse_bound
+from .idempotency import idempotent
+from .pagination import paginated_response
 from .serializers import (
     VendorSerializer,
     PurchaseOrderSerializer,
     HistoricalPerformanceSerializer,
 )
 from rest_framework import status
-from datetime import datetime, timedelta
+from datetime import datetime
 
 
 @api_view(['GET', 'POST'])
 def vendor_ops(request):
     if request.method == 'GET':
-        vendors = Vendor.objects.all()
-        serializer = VendorSerializer(vendors, many=True)
-        return Response(serializer.data)
+        return paginated_response(request, Vendor.objects.all(), VendorSerializer)
     elif request.method == 'POST':
         serializer = VendorSerializer(data=request.data)
         if serializer.is_valid():
@@ -38,8 +51,13 @@ def get_vendor_by_id(request, vendor_id):
 
         Returns:
             A JSON response with the vendor data, error message, or success message
-            depending on the request method and outcome.
+            depending on the request method and outcome. GET answers
+            If-None-Match / If-Modified-Since with 304 when the vendor is unchanged.
     """
+    if request.method == 'GET':
+        response = row_not_modified(request, Vendor.objects.all(), vendor_id)
+        if response is not None:
+            return response
 
     try:
         vendor = Vendor.objects.get(pk=vendor_id)
@@ -48,12 +66,12 @@ def get_vendor_by_id(request, vendor_id):
 
     if request.method == 'GET':
         serializer = VendorSerializer(vendor)
-        return Response(serializer.data)
+        return with_validators(Response(serializer.data), *row_validators(Vendor, vendor.pk, vendor.updated_at))
     elif request.method == 'PUT':
         serializer = VendorSerializer(vendor, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+            vendor = serializer.save()
+            return with_validators(Response(serializer.data), *row_validators(Vendor, vendor.pk, vendor.updated_at))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     elif request.method == 'DELETE':
         vendor.delete()
@@ -62,319 +80,348 @@ def get_vendor_by_id(request, vendor_id):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-def update_on_time_delivery_rate(request_data):
+@api_view(['GET', 'POST'])
+@idempotent(methods=('POST',))
+def purchase_order_ops(request):
     """
-        Calculates and updates the on-time delivery rate for a vendor based on a provided delivery date.
-
-        Args:
-            request_data (dict): Dictionary containing delivery date and vendor ID.
+        Handles GET and POST requests for Purchase Orders.
 
-        Returns:
-            Response: JSON response with the calculated on-time delivery rate or an error message.
+        - GET: Retrieves purchase orders, one cursor page at a time, optionally
+          filtered by vendor, status, date and quality ranges and acknowledgement
+          (see api.filters). Filter combinations that no index can serve get a 400.
+        - POST: Creates a new purchase order and updates vendor performance metrics.
+          A retry with the same Idempotency-Key header gets the stored response
+          (see api.idempotency).
     """
-    delivery_date_str = None
-    try:
-        # Validate and convert delivery date format
-        delivery_date_str = request_data['delivery_date']
-        delivery_date = datetime.strptime(delivery_date_str, '%Y-%m-%d %H:%M:%S')
-    except ValueError:
-        return Response(
-            {'error': f'Invalid delivery date format (YYYY-MM-DD HH:MM:SS expected): {delivery_date_str}'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-    try:
-        vendor_id = request_data['vendor']
-        # Filter completed POs for the vendor
-        completed_pos = PurchaseOrder.objects.filter(status='completed', delivery_date__lte=delivery_date
-                                                     ).count()
-
-        # Count total completed POs for the vendor (regardless of delivery date)
-        total_completed_pos = PurchaseOrder.objects.filter(vendor=vendor_id, status='completed').count()
+    if request.method == 'GET':
+        queryset = filter_purchase_orders(PurchaseOrder.objects.all(), request.query_params)
+        return paginated_response(request, queryset, PurchaseOrderSerializer)
+    elif request.method == 'POST':
+        serializer = PurchaseOrderSerializer(data=request.data)
+        if serializer.is_valid():
+            # The order, the vendor metrics the accumulator signals derive from it (or the
+            # metrics queue entry in async mode) and the snapshot commit together.
+            with transaction.atomic():
+                purchase_order = serializer.save()
+                if purchase_order.status.lower() == 'completed':
+                    request_historical_performance(purchase_order.vendor_id)
 
-        if total_completed_pos == 0:
-            # No completed POs for the vendor, so completion rate is 0
-            on_time_delivery_rate = 0.0
+            return Response(serializer.data)
         else:
-            on_time_delivery_rate = completed_pos / total_completed_pos
-
-        return Response({'on_time_delivery_rate': on_time_delivery_rate}, status=status.HTTP_201_CREATED)
-
-    except PurchaseOrder.DoesNotExist:
-        return Response({'error': 'Vendor not found.'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-def update_quality_rating(data):
+@api_view(['POST'])
+def bulk_purchase_orders(request):
     """
-        Calculates the average quality rating for a vendor based on completed purchase orders.
+        Creates or updates a batch of purchase orders.
 
-        Args:
-            data (dict): Dictionary containing vendor information. (Expected to have a 'vendor' key)
+        The request body is a list of purchase orders. Items whose po_number
+        already exists update that order; the rest are created. Vendor metrics
+        are recomputed once per vendor in the batch.
 
         Returns:
-            float: The average quality rating for the vendor (0.0 if no completed purchase orders).
+            Response: The created/updated counts and refreshed vendor ids, or a
+            400 response with an ``errors`` list holding one entry per item
+            (empty for valid items). Nothing is written unless every item is valid.
     """
-    vendor = data['vendor']
-    completed_pos = PurchaseOrder.objects.filter(vendor=vendor, status='completed')
+    if not isinstance(request.data, list):
+        return Response({'error': 'Expected a list of purchase orders.'}, status=status.HTTP_400_BAD_REQUEST)
+    max_items = getattr(settings, 'API_BULK_MAX_ITEMS', 5000)
+    if len(request.data) > max_items:
+        return Response({'error': f'A batch may contain at most {max_items} purchase orders.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    # Resolve every referenced vendor with one query instead of one per item.
+    vendor_ids = set()
+    for item in request.data:
+        try:
+            vendor_ids.add(int(item['vendor']))
+        except (KeyError, TypeError, ValueError):
+            pass
+    vendors = Vendor.objects.in_bulk(vendor_ids)
+    serializer = PurchaseOrderSerializer(data=request.data, many=True, context={'vendors': vendors})
+    serializer.is_valid()
+    errors = serializer.errors or [{} for _ in request.data]
+    for item_errors, duplicate_errors in zip(errors, duplicate_po_number_errors(request.data)):
+        item_errors.update(duplicate_errors)
+    if any(errors):
+        return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    result = upsert_purchase_orders(serializer.validated_data)
+    return Response(result, status=status.HTTP_201_CREATED)
 
-    # Count only non-None quality ratings for accurate average calculation
-    total_ratings = sum(po.quality_rating for po in completed_pos if po.quality_rating is not None)
 
-    # Handle division by zero gracefully
-    average_rating = total_ratings / len(completed_pos) if completed_pos else 0.0
+@api_view(['GET', 'PUT', 'DELETE'])
+@idempotent(methods=('PUT',))
+def get_po_by_id(request, po_id):
+    """
+        Retrieve, update, or delete a purchase order by its ID.
 
-    return average_rating
+        - GET: Retrieves a purchase order; answers If-None-Match / If-Modified-Since
+          with 304 when it is unchanged.
+        - PUT: Updates a purchase order; honours the Idempotency-Key header.
+        - DELETE: Deletes a purchase order.
+    """
+    if request.method == 'GET':
+        response = row_not_modified(request, PurchaseOrder.objects.all(), po_id)
+        if response is not None:
+            return response
+        try:
+            purchase_order = PurchaseOrder.objects.get(pk=po_id)
+        except PurchaseOrder.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        serializer = PurchaseOrderSerializer(purchase_order)
+        return with_validators(Response(serializer.data),
+                               *row_validators(PurchaseOrder, purchase_order.pk, purchase_order.updated_at))
+    elif request.method in ('PUT', 'DELETE'):
+        with transaction.atomic():
+            return _write_purchase_order(request, po_id)
+    else:
+        return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-def update_average_response_time(data):
+def _write_purchase_order(request, po_id):
     """
-        Calculates the average response time for a vendor based on purchase order data.
-
-        Args:
-            data (dict): A dictionary containing vendor information.
+        Updates or deletes a purchase order; runs inside the request's transaction.
 
-        Returns:
-            datetime.timedelta: The average response time for the vendor.
+        The order is locked when it is loaded, so a concurrent write to it waits and
+        the accumulator signals see the previous values this write replaces. The
+        vendor metrics the signals derive (or the metrics queue entry in async
+        mode) and the snapshot commit together with the order.
     """
+    try:
+        purchase_order = PurchaseOrder.objects.select_for_update().get(pk=po_id)
+    except PurchaseOrder.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
 
-    vendor = data['vendor']
-    completed_pos = PurchaseOrder.objects.filter(vendor=vendor, acknowledgement_date__isnull=False)
-    total_response_time = timedelta(seconds=0)
+    if request.method == 'DELETE':
+        purchase_order.delete()
+        return Response({'message': 'Purchase Order deleted successfully.'})
 
-    for obj in completed_pos:
-        total_response_time += (obj.acknowledgement_date - obj.issue_date)
-    average_response_time = total_response_time / len(completed_pos) if completed_pos else timedelta(seconds=0)
-    return average_response_time
+    serializer = PurchaseOrderSerializer(purchase_order, data=request.data, partial=True)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    purchase_order = serializer.save()
+    if purchase_order.status.lower() == 'completed':
+        request_historical_performance(purchase_order.vendor_id)
+    return with_validators(Response(serializer.data),
+                           *row_validators(PurchaseOrder, purchase_order.pk, purchase_order.updated_at))
 
 
-def update_fulfillment_rate(data):
+@api_view(['GET'])
+def get_vendor_performance(request, vendor_id):
     """
-        Calculates the fulfillment rate for a vendor based on purchase order data.
+        Retrieves the historical performance metrics for a specific vendor.
 
-        Args:
-            data (dict): A dictionary containing vendor information, potentially
-                including a 'vendor' key.
+        URL Parameters:
+            vendor_id: The unique identifier of the vendor.
+
+        Query Parameters:
+            as_of: Optional date (YYYY-MM-DD or ISO 8601 datetime); report the
+                metrics computed from the purchase orders as they stood at the
+                end of that day instead of the latest snapshot.
 
         Returns:
-            float: The calculated fulfillment rate (0.0 to 1.0).
+            A JSON response with the performance metrics (on_time_delivery_rate,
+            quality_rating_avg, average_response_time, fulfillment_rate) or an
+            error message if the vendor is not found. The ETag identifies the
+            snapshot the payload was taken from, so If-None-Match requests get a
+            304 from the cache or from one indexed lookup. With ``as_of`` the
+            metrics come from the vendor's daily prefix sums, in one indexed
+            lookup, and are neither cached nor tagged.
     """
-    vendor = data.get('vendor')
-    if not vendor:
-        return 0.0  # Handle missing vendor information
+    if 'as_of' in request.query_params:
+        try:
+            as_of = parse_bound(request.query_params['as_of']).date()
+        except ValueError as e:
+            return Response({'error': f'Invalid date: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        metrics = metrics_as_of(vendor_id, as_of)
+        if metrics is None:
+            return Response({'error': 'Vendor not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({**metrics, 'as_of': as_of.isoformat()})
+
+    entry = performance_cache.get(vendor_id)
+    if entry is not None:
+        payload, etag = entry
+    else:
+        # Get the most recent HistoricalPerformance object for the vendor; the vendor
+        # only has to be looked up separately when it has none. The payload is shared
+        # through the cache, which writes invalidate on commit, so it is read from the
+        # primary: a replica may not have caught up with that write yet.
+        performance = HistoricalPerformance.objects.using('default').filter(
+            vendor_id=vendor_id).order_by('-date').first()
+        if not performance and not Vendor.objects.using('default').filter(pk=vendor_id).exists():
+            return Response({'error': 'Vendor not found.'}, status=status.HTTP_404_NOT_FOUND)
+        etag = f'"performance-{vendor_id}-{performance.pk if performance else 0}"'
 
-    completed_pos = PurchaseOrder.objects.filter(
-        vendor=vendor, status='completed', issue_date__isnull=False
-    )
-    total_pos = PurchaseOrder.objects.filter(vendor=vendor)
+        if not performance:
+            # No performance data available yet, return empty response
+            payload = {
+                'on_time_delivery_rate': 0.0,
+                'quality_rating_avg': 0.0,
+                'average_response_time': 0.0,
+                'fulfillment_rate': 0.0,
+            }
+        else:
+            # Extract and return performance data
+            payload = {
+                'on_time_delivery_rate': performance.on_time_delivery_rate,
+                'quality_rating_avg': performance.quality_rating_avg,
+                'average_response_time': performance.average_response_time,
+                'fulfillment_rate': performance.fulfillment_rate,
+            }
+        performance_cache.store(vendor_id, payload, etag)
+
+    if is_conditional(request):
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+    return with_validators(Response(payload), etag)
 
-    fulfilled_pos = len(completed_pos)
-    fulfillment_rate = fulfilled_pos / len(total_pos) if total_pos else 0.0  # Handle division by zero
 
-    return fulfillment_rate
+@api_view(['GET'])
+def get_vendor_performance_history(request, vendor_id):
+    """
+        Retrieves a vendor's performance history aggregated into time buckets.
 
+        URL Parameters:
+            vendor_id: The unique identifier of the vendor.
 
-@api_view(['GET', 'POST'])
-def purchase_order_ops(request):
-    """
-        Handles GET and POST requests for Purchase Orders.
+        Query Parameters:
+            bucket: 'hour', 'day' (default) or 'week'.
+            from, to: Optional date range (YYYY-MM-DD or ISO 8601 datetime).
 
-        - GET: Retrieves all purchase orders.
-        - POST: Creates a new purchase order and updates vendor performance metrics.
+        Returns:
+            A JSON response with one entry per bucket holding the snapshot count
+            and the min/max/avg/last of every metric, served from the
+            precomputed rollups.
     """
-    if request.method == 'GET':
-        purchase_orders = PurchaseOrder.objects.all()
-        serializer = PurchaseOrderSerializer(purchase_orders, many=True)
-        return Response(serializer.data)
-    elif request.method == 'POST':
-        serializer = PurchaseOrderSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
+    bucket = request.query_params.get('bucket', 'day')
+    if bucket not in ROLLUP_BUCKETS:
+        return Response({'error': f'Unsupported bucket: {bucket}'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        date_from = parse_bound(request.query_params['from']) if 'from' in request.query_params else None
+        date_to = parse_bound(request.query_params['to'], upper=True) if 'to' in request.query_params else None
+    except ValueError as e:
+        return Response({'error': f'Invalid date: {e}'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Performance metrics update
-            # 1. on_time_delivery_rate
-            on_time_delivery_rate = None
-            quality_rating = None
-            average_response_time = None
-            fulfillment_rate = None
-
-            if request.data['status'].lower() == 'completed':
-                update_on_time_delivery_rate_response = update_on_time_delivery_rate(request.data)
-                if 'on_time_delivery_rate' not in update_on_time_delivery_rate_response.data:
-                    return update_on_time_delivery_rate_response
-                else:
-                    on_time_delivery_rate = update_on_time_delivery_rate_response.data['on_time_delivery_rate']
-                    vendor = Vendor.objects.get(pk=request.data['vendor'])
-                    vendor.on_time_delivery_rate = on_time_delivery_rate
-                    vendor.save()
-
-                quality_rating = update_quality_rating(request.data)
-                vendor = Vendor.objects.get(pk=request.data['vendor'])
-                vendor.quality_rating_avg = quality_rating
-                vendor.save()
-
-            # 3. average_response_time
-            average_response_time = update_average_response_time(request.data)
-            vendor = Vendor.objects.get(pk=request.data['vendor'])
-            vendor.average_response_time = average_response_time.total_seconds() / 3600
-            vendor.save()
-
-            # 4. fulfillment_rate
-            fulfillment_rate = update_fulfillment_rate(request.data)
-            vendor = Vendor.objects.get(pk=request.data['vendor'])
-            vendor.fulfillment_rate = fulfillment_rate
-            vendor.save()
-
-            if all([on_time_delivery_rate, quality_rating, average_response_time, fulfillment_rate]):
-                # Create and save the HistoricalPerformance object
-                historical_performance = HistoricalPerformance.objects.create(
-                    vendor=Vendor.objects.get(pk=request.data['vendor']),
-                    date=datetime.now(),  # Use current date and time
-                    on_time_delivery_rate=on_time_delivery_rate,
-                    quality_rating_avg=quality_rating,
-                    average_response_time=average_response_time.total_seconds() / 3600,  # Convert timedelta to hours
-                    fulfillment_rate=fulfillment_rate
-                )
-                historical_performance.save()
+    if not Vendor.objects.filter(pk=vendor_id).exists():
+        return Response({'error': 'Vendor not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-            return Response(serializer.data)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    else:
-        return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    return Response({'bucket': bucket, 'results': rollup_history(vendor_id, bucket, date_from, date_to)})
 
 
-@api_view(['GET', 'PUT', 'DELETE'])
-def get_po_by_id(request, po_id):
+def _ranking_params(request):
     """
-        Retrieve, update, or delete a purchase order by its ID.
+        Reads the metric, direction and min_pos query parameters of the ranking endpoints.
 
-        - GET: Retrieves a purchase order.
-        - PUT: Updates a purchase order.
-        - DELETE: Deletes a purchase order.
+        Raises:
+            ValueError: A parameter is missing or invalid; the message is meant for the client.
     """
-    purchase_order = None
+    metric = request.query_params.get('metric')
+    if metric not in RANKING_METRICS:
+        raise ValueError(f"metric must be one of: {', '.join(RANKING_METRICS)}")
+    direction = request.query_params.get('direction', RANKING_METRICS[metric])
+    if direction not in RANKING_DIRECTIONS:
+        raise ValueError("direction must be 'asc' or 'desc'")
     try:
-        purchase_order = PurchaseOrder.objects.get(pk=po_id)
-    except PurchaseOrder.DoesNotExist:
-        return Response(status=status.HTTP_404_NOT_FOUND)
+        min_pos = int(request.query_params.get('min_pos', 1))
+    except ValueError:
+        raise ValueError('min_pos must be an integer')
+    if min_pos < 0:
+        raise ValueError('min_pos must not be negative')
+    return metric, direction, min_pos
 
-    if request.method == 'GET':
-        serializer = PurchaseOrderSerializer(purchase_order)
-        return Response(serializer.data)
-    elif request.method == 'PUT':
-        serializer = PurchaseOrderSerializer(purchase_order, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
 
-            # Performance metrics update
-            # 1. on_time_delivery_rate
-            on_time_delivery_rate = None
-            quality_rating = None
-            average_response_time = None
-            fulfillment_rate = None
-
-            if request.data['status'].lower() == 'completed':
-                update_on_time_delivery_rate_response = update_on_time_delivery_rate(request.data)
-                if 'on_time_delivery_rate' not in update_on_time_delivery_rate_response.data:
-                    return update_on_time_delivery_rate_response
-                else:
-                    on_time_delivery_rate = update_on_time_delivery_rate_response.data['on_time_delivery_rate']
-                    vendor = Vendor.objects.get(pk=request.data['vendor'])
-                    vendor.on_time_delivery_rate = on_time_delivery_rate
-                    vendor.save()
-
-                quality_rating = update_quality_rating(request.data)
-                vendor = Vendor.objects.get(pk=request.data['vendor'])
-                vendor.quality_rating_avg = quality_rating
-                vendor.save()
-
-            # 3. average_response_time
-            average_response_time = update_average_response_time(request.data)
-            vendor = Vendor.objects.get(pk=request.data['vendor'])
-            vendor.average_response_time = average_response_time.total_seconds() / 3600
-            vendor.save()
-
-            # 4. fulfillment_rate
-            fulfillment_rate = update_fulfillment_rate(request.data)
-            vendor = Vendor.objects.get(pk=request.data['vendor'])
-            vendor.fulfillment_rate = fulfillment_rate
-            vendor.save()
-
-            if all([on_time_delivery_rate, quality_rating, average_response_time, fulfillment_rate]):
-                # Create and save the HistoricalPerformance object
-                historical_performance = HistoricalPerformance.objects.create(
-                    vendor=Vendor.objects.get(pk=request.data['vendor']),
-                    date=datetime.now(),  # Use current date and time
-                    on_time_delivery_rate=on_time_delivery_rate,
-                    quality_rating_avg=quality_rating,
-                    average_response_time=average_response_time.total_seconds() / 3600,  # Convert timedelta to hours
-                    fulfillment_rate=fulfillment_rate
-                )
-                historical_performance.save()
-            return Response(serializer.data)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    elif request.method == 'DELETE':
-        try:
-            purchase_order = PurchaseOrder.objects.get(pk=po_id)
-            purchase_order.delete()
-            return Response({'message': 'Purchase Order deleted successfully.'})
-        except PurchaseOrder.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
-    else:
-        return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+@api_view(['GET'])
+def get_vendor_rankings(request):
+    """
+        Returns the top vendors on one performance metric.
+
+        Query Parameters:
+            metric: on_time_delivery_rate, quality_rating_avg, average_response_time or fulfillment_rate.
+            direction: 'asc' or 'desc'; defaults to better first (ascending for response time).
+            min_pos: Only rank vendors with at least this many purchase orders (default 1).
+            limit: Number of vendors to return (default 10).
+
+        Returns:
+            A JSON response with the ranked vendors, served from the materialized
+            ranking table.
+    """
+    try:
+        metric, direction, min_pos = _ranking_params(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    max_limit = getattr(settings, 'API_MAX_PAGE_SIZE', 1000)
+    if not 1 <= limit <= max_limit:
+        return Response({'error': f'limit must be between 1 and {max_limit}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'metric': metric,
+        'direction': direction,
+        'min_pos': min_pos,
+        'results': top_vendors(metric, direction, min_pos, limit),
+    })
 
 
 @api_view(['GET'])
-def get_vendor_performance(request, vendor_id):
+def get_vendor_rank(request, vendor_id):
     """
-        Retrieves the historical performance metrics for a specific vendor.
+        Returns a vendor's own rank on one performance metric.
 
         URL Parameters:
             vendor_id: The unique identifier of the vendor.
 
+        Query Parameters:
+            metric, direction, min_pos: As for the rankings endpoint.
+
         Returns:
-            A JSON response with the performance metrics (on_time_delivery_rate,
-            quality_rating_avg, average_response_time, fulfillment_rate) or an
-            error message if the vendor is not found.
+            A JSON response with the vendor's value, PO count and rank (null when
+            the vendor is not ranked on the metric).
     """
     try:
-        # Retrieve the vendor object
-        vendor = Vendor.objects.get(pk=vendor_id)
-    except Vendor.DoesNotExist:
-        return Response({'error': 'Vendor not found.'}, status=status.HTTP_404_NOT_FOUND)
+        metric, direction, min_pos = _ranking_params(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        # Get the most recent HistoricalPerformance object for the vendor
-        performance = HistoricalPerformance.objects.filter(vendor=vendor).order_by('-date').first()
+    rank = vendor_rank(vendor_id, metric, direction, min_pos)
+    if rank is None:
+        if not Vendor.objects.filter(pk=vendor_id).exists():
+            return Response({'error': 'Vendor not found.'}, status=status.HTTP_404_NOT_FOUND)
+        # No purchase orders yet.
+        rank = {'vendor': vendor_id, 'value': None, 'total_pos': 0, 'rank': None}
+    return Response({'metric': metric, 'direction': direction, 'min_pos': min_pos, **rank})
 
-        if not performance:
-            # No performance data available yet, return empty response
-            return Response({
-                'on_time_delivery_rate': 0.0,
-                'quality_rating_avg': 0.0,
-                'average_response_time': 0.0,
-                'fulfillment_rate': 0.0,
-            })
-
-        # Extract and return performance data
-        return Response({
-            'on_time_delivery_rate': performance.on_time_delivery_rate,
-            'quality_rating_avg': performance.quality_rating_avg,
-            'average_response_time': performance.average_response_time,
-            'fulfillment_rate': performance.fulfillment_rate,
-        })
-
-    except HistoricalPerformance.DoesNotExist:
-        # No performance data available yet, return empty response
-        return Response({
-            'on_time_delivery_rate': 0.0,
-            'quality_rating_avg': 0.0,
-            'average_response_time': 0.0,
-            'fulfillment_rate': 0.0,
-        })
+
+@api_view(['GET'])
+def get_performance_cache_stats(request):
+    """
+        Reports the hit and miss counters of the vendor performance cache.
+    """
+    return Response(performance_cache.stats())
+
+
+@api_view(['GET'])
+def get_metrics_queue_status(request):
+    """
+        Reports the backlog of the asynchronous vendor metrics queue.
+
+        Returns:
+            A JSON response with the number of pending vendors, the oldest
+            enqueue time and the lag in seconds.
+    """
+    return Response(queue_status())
 
 
 @api_view(['POST'])
+@idempotent(methods=('POST',))
 def acknowledge_purchase_order(request, po_id):
     """
         Acknowledges a purchase order by the vendor.
@@ -384,28 +431,64 @@ def acknowledge_purchase_order(request, po_id):
 
         Returns:
             Response: A JSON response with a success message or an error message.
+            A retry with the same Idempotency-Key header gets the stored response
+            and keeps the first acknowledgement date.
     """
-    try:
-        # Retrieve the purchase order object
-        purchase_order = PurchaseOrder.objects.get(pk=po_id)
-    except PurchaseOrder.DoesNotExist:
-        return Response({'error': 'Purchase order not found.'}, status=status.HTTP_404_NOT_FOUND)
-
-    # if purchase_order.acknowledgement_date:
-    #     return Response({'error': 'Purchase order already acknowledged.'}, status=status.HTTP_400_BAD_REQUEST)
-
-    # Set acknowledgment date and save the purchase order
-    purchase_order.acknowledgement_date = datetime.now()
-    purchase_order.save()
+    with transaction.atomic():
+        try:
+            # Lock the order so the accumulator signals see the acknowledgement this replaces
+            purchase_order = PurchaseOrder.objects.select_for_update().get(pk=po_id)
+        except PurchaseOrder.DoesNotExist:
+            return Response({'error': 'Purchase order not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-    # Update average response time
-    purchase_order_obj = {'vendor': purchase_order.vendor}
-    average_response_time = update_average_response_time(purchase_order_obj)
+        # if purchase_order.acknowledgement_date:
+        #     return Response({'error': 'Purchase order already acknowledged.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Update vendor average response time
-    vendor = Vendor.objects.get(pk=purchase_order.vendor.id)
-    vendor.average_response_time = average_response_time.total_seconds() / 3600
-    vendor.save()
+        # Set acknowledgment date and save the purchase order; the vendor's average
+        # response time is refreshed by the accumulator signals in the same transaction
+        # (or by the metrics queue worker in async mode).
+        purchase_order.acknowledgement_date = datetime.now()
+        purchase_order.save()
 
     # Return success response
     return Response({'message': 'Purchase order acknowledged successfully.'})
+
+
+@require_GET
+def export_purchase_orders(request):
+    """
+        Streams purchase orders as NDJSON or CSV.
+
+        Query Parameters:
+            format: 'ndjson' (default) or 'csv'.
+            vendor: Only orders of this vendor id.
+            status: Only orders with this status.
+            from, to: Inclusive order_date bounds (YYYY-MM-DD or ISO 8601 datetime).
+
+        Returns:
+            StreamingHttpResponse: One row per purchase order, ordered by id, or a
+            JSON error with status 400 for invalid parameters.
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f'Unsupported export format: {export_format}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    filters = {'status': request.GET.get('status')}
+    try:
+        if 'vendor' in request.GET:
+            filters['vendor'] = int(request.GET['vendor'])
+        if 'from' in request.GET:
+            filters['date_from'] = parse_bound(request.GET['from'])
+        if 'to' in request.GET:
+            filters['date_to'] = parse_bound(request.GET['to'], upper=True)
+    except ValueError as e:
+        return JsonResponse({'error': f'Invalid filter value: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    content_type, iter_rows = EXPORT_FORMATS[export_format]
+    # The rows are read while the response streams, after the middleware has left the
+    # request, so the read database has to be chosen now.
+    queryset = export_queryset(**filters).using(router.db_for_read(PurchaseOrder))
+    response = StreamingHttpResponse(iter_rows(queryset), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="purchase_orders.{export_format}"'
+    return response
@@ -0,0 +1,191 @@
+"""
+Point-in-time vendor metrics from per-day prefix sums.
+
+A purchase order's contribution (see base.metrics) is split over the days its
+events happened:
+- it counts towards ``total_pos`` from its order date;
+- its completion counts, on-time flag and quality rating from its completed date;
+- its acknowledgement and response time from its acknowledgement date.
+
+``VendorDailyMetrics`` stores the running totals at the end of each such day. The
+metrics as of a date therefore need a single index lookup for the latest row on
+or before it, instead of replaying every order.
+
+Rows are maintained together with the accumulators. ``apply_delta`` shifts the
+rows from the changed days onwards, and ``rebuild_vendor_metrics`` rebuilds a
+vendor's rows from its orders.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+from .metrics import EMPTY_TOTALS, ON_TIME, TOTAL_FIELDS, contribution, derive_metrics
+from .models import PurchaseOrder, Vendor, VendorDailyMetrics
+
+# PurchaseOrder columns a dated contribution depends on.
+DAILY_CONTRIBUTION_FIELDS = (
+    'vendor_id',
+    'status',
+    'order_date',
+    'delivery_date',
+    'completed_date',
+    'quality_rating',
+    'issue_date',
+    'acknowledgement_date',
+)
+
+COMPLETION_FIELDS = ('completed_pos', 'on_time_pos', 'quality_rating_sum')
+ACKNOWLEDGEMENT_FIELDS = ('acknowledged_pos', 'response_seconds_sum')
+
+
+def daily_contribution(values):
+    """
+        Splits a purchase order's contribution over the days of its events.
+
+        Orders completed before completed_date was recorded count as completed on
+        their delivery date.
+
+        Args:
+            values (dict): The DAILY_CONTRIBUTION_FIELDS of the purchase order.
+
+        Returns:
+            dict: day -> totals; the totals of all days add up to ``contribution(values)``.
+    """
+    totals = contribution(values)
+    days = defaultdict(lambda: dict(EMPTY_TOTALS))
+    days[values['order_date'].date()]['total_pos'] += totals['total_pos']
+    if totals['completed_pos']:
+        completion_day = (values['completed_date'] or values['delivery_date']).date()
+        for name in COMPLETION_FIELDS:
+            days[completion_day][name] += totals[name]
+    if totals['acknowledged_pos']:
+        for name in ACKNOWLEDGEMENT_FIELDS:
+            days[values['acknowledgement_date'].date()][name] += totals[name]
+    return dict(days)
+
+
+def daily_contribution_of(purchase_order):
+    """
+        Returns the daily contribution of a PurchaseOrder instance.
+    """
+    return daily_contribution({name: getattr(purchase_order, name) for name in DAILY_CONTRIBUTION_FIELDS})
+
+
+def subtract_daily(new, old):
+    """
+        Returns the day -> totals difference between two daily contributions.
+    """
+    difference = {}
+    for day in set(new) | set(old):
+        delta = {name: new.get(day, EMPTY_TOTALS)[name] - old.get(day, EMPTY_TOTALS)[name] for name in TOTAL_FIELDS}
+        if any(delta.values()):
+            difference[day] = delta
+    return difference
+
+
+def negate_daily(daily):
+    return {day: {name: -value for name, value in totals.items()} for day, totals in daily.items()}
+
+
+def apply_daily_delta(vendor_id, daily_delta):
+    """
+        Adds a day -> totals difference to a vendor's prefix sums.
+
+        Each changed day gets a row (copied from the previous day's totals when it
+        is new), then one UPDATE shifts that row and every later one.
+    """
+    for day, delta in sorted(daily_delta.items()):
+        changes = {name: F(name) + value for name, value in delta.items() if value}
+        if not changes:
+            continue
+        with transaction.atomic():
+            latest = VendorDailyMetrics.objects.filter(vendor_id=vendor_id, day__lte=day).order_by(
+                '-day').values('day', *TOTAL_FIELDS).first()
+            if latest is None or latest.pop('day') != day:
+                try:
+                    with transaction.atomic():
+                        VendorDailyMetrics.objects.create(vendor_id=vendor_id, day=day, **(latest or EMPTY_TOTALS))
+                except IntegrityError:
+                    # Another writer added the day in between.
+                    pass
+            VendorDailyMetrics.objects.filter(vendor_id=vendor_id, day__gte=day).update(**changes)
+
+
+def rebuild_daily_metrics(vendor_ids=None):
+    """
+        Rebuilds the prefix sums of the given vendors from their purchase orders.
+
+        Args:
+            vendor_ids: Optional iterable of vendor ids; all vendors when omitted.
+
+        Returns:
+            int: The number of rows written.
+    """
+    purchase_orders = PurchaseOrder.objects.order_by()
+    if vendor_ids is not None:
+        vendor_ids = list(vendor_ids)
+        purchase_orders = purchase_orders.filter(vendor_id__in=vendor_ids)
+
+    completed = purchase_orders.filter(status='completed')
+    acknowledged = purchase_orders.filter(acknowledgement_date__isnull=False)
+    rows = [
+        purchase_orders.values('vendor_id', day=TruncDate('order_date')).annotate(total_pos=Count('pk')),
+        completed.values('vendor_id', day=TruncDate(Coalesce('completed_date', 'delivery_date'))).annotate(
+            completed_pos=Count('pk'),
+            on_time_pos=Count('pk', filter=ON_TIME),
+            quality_rating_sum=Coalesce(Sum('quality_rating'), 0.0),
+        ),
+        acknowledged.values('vendor_id', day=TruncDate('acknowledgement_date')).annotate(
+            acknowledged_pos=Count('pk'),
+            response_time_sum=Sum(ExpressionWrapper(F('acknowledgement_date') - F('issue_date'),
+                                                    output_field=DurationField())),
+        ),
+    ]
+    days_by_vendor = defaultdict(lambda: defaultdict(lambda: dict(EMPTY_TOTALS)))
+    for queryset in rows:
+        for row in queryset:
+            totals = days_by_vendor[row.pop('vendor_id')][row.pop('day')]
+            response_time_sum = row.pop('response_time_sum', None)
+            if response_time_sum is not None:
+                row['response_seconds_sum'] = response_time_sum.total_seconds()
+            for name, value in row.items():
+                totals[name] += value
+
+    daily_rows = []
+    for vendor_id, days in days_by_vendor.items():
+        running = dict(EMPTY_TOTALS)
+        for day in sorted(days):
+            for name in TOTAL_FIELDS:
+                running[name] += days[day][name]
+            daily_rows.append(VendorDailyMetrics(vendor_id=vendor_id, day=day, **running))
+
+    with transaction.atomic():
+        existing = VendorDailyMetrics.objects.all()
+        if vendor_ids is not None:
+            existing = existing.filter(vendor_id__in=vendor_ids)
+        existing.delete()
+        VendorDailyMetrics.objects.bulk_create(daily_rows)
+    return len(daily_rows)
+
+
+def metrics_as_of(vendor_id, day):
+    """
+        Returns a vendor's metrics at the end of ``day``.
+
+        Args:
+            vendor_id: The unique identifier of the vendor.
+            day (date): The date to report on.
+
+        Returns:
+            dict: The four metrics, 0.0 where there was nothing to average, or None
+            when the vendor does not exist.
+    """
+    totals = VendorDailyMetrics.objects.filter(vendor_id=vendor_id, day__lte=day).order_by('-day').values(
+        *TOTAL_FIELDS).first()
+    if totals is None:
+        if not Vendor.objects.filter(pk=vendor_id).exists():
+            return None
+        totals = EMPTY_TOTALS
+    return derive_metrics(totals)
@@ -0,0 +1,281 @@
+"""
+Streaming bulk import of vendors and purchase orders from CSV or NDJSON files.
+
+Records are read one at a time, so memory use does not grow with the file. Each
+record is validated against the model fields, and valid records are inserted with
+``bulk_create`` in batches. Each batch is committed together with the file's
+``ImportCheckpoint``, which stores the byte offset after the batch. Importing the
+same file again resumes from that offset. ``bulk_create`` skips the per-row
+metric signals, so vendor metrics, rankings and HistoricalPerformance snapshots
+are recomputed once, after the whole file has been read.
+
+CSV files need a header row. An empty cell is NULL in a nullable column, and the
+``items`` column holds JSON. NDJSON files hold one JSON object per line, like the
+output of the purchase order export. Unknown columns are ignored.
+"""
+import csv
+import json
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+
+from .metrics import rebuild_vendor_metrics, record_historical_performances
+from .models import ImportCheckpoint, PurchaseOrder, Vendor
+
+FORMATS = ('csv', 'ndjson')
+
+MODELS = {
+    'vendors': Vendor,
+    'purchase_orders': PurchaseOrder,
+}
+
+# Columns read from a record; ``vendor`` is a vendor id.
+IMPORT_FIELDS = {
+    'vendors': ('name', 'contact_details', 'address', 'vendor_code'),
+    'purchase_orders': ('po_number', 'vendor', 'order_date', 'delivery_date', 'items', 'quantity', 'status',
+                        'quality_rating', 'issue_date', 'acknowledgement_date', 'completed_date'),
+}
+
+
+class ImportAborted(Exception):
+    pass
+
+
+def detect_format(path):
+    """
+        Returns the format of a file from its extension.
+
+        Raises:
+            ValueError: The extension is not .csv, .ndjson or .jsonl.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    raise ValueError(f'Cannot tell the format of {path} from its extension.')
+
+
+def read_records(path, file_format, offset=0):
+    """
+        Streams the records of a file.
+
+        Args:
+            path (str): The file to read.
+            file_format (str): 'csv' or 'ndjson'.
+            offset (int): Byte position to start from, as yielded with an earlier record.
+
+        Yields:
+            tuple: (record, offset just after the record). The record is a dict, or
+            None when the line is malformed.
+    """
+    with open(path, 'rb') as stream:
+        if file_format == 'ndjson':
+            stream.seek(offset)
+            for line in stream:
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield record if isinstance(record, dict) else None, offset
+            return
+
+        header_line = stream.readline()
+        header = next(csv.reader([header_line.decode('utf-8-sig')]), [])
+        offset = max(offset, len(header_line))
+        stream.seek(offset)
+
+        def lines():
+            # csv.reader pulls exactly the lines of one record (more than one when a
+            # quoted value spans lines) before yielding it, so ``offset`` is always the
+            # end of the record just read.
+            nonlocal offset
+            for line in stream:
+                offset += len(line)
+                yield line.decode('utf-8')
+
+        for row in csv.reader(lines()):
+            if not row:
+                continue
+            yield dict(zip(header, row)) if len(row) == len(header) else None, offset
+
+
+def _clean_value(field, value, text):
+    if value is None or (text and value == ''):
+        value = None
+        if field.null:
+            return None
+    if text and isinstance(field, models.JSONField) and value is not None:
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValidationError('Not valid JSON.')
+    value = field.clean(value, None)
+    if isinstance(value, datetime) and timezone.is_aware(value) and not settings.USE_TZ:
+        value = timezone.make_naive(value)
+    return value
+
+
+def _vendor_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError('Must be a vendor id.')
+
+
+def build_instance(kind, record, text=False):
+    """
+        Builds an unsaved model instance from a record.
+
+        Args:
+            kind (str): 'vendors' or 'purchase_orders'.
+            record (dict): Column name -> value.
+            text (bool): Values are CSV strings (empty means NULL, ``items`` is JSON).
+
+        Returns:
+            Model: The instance; a purchase order's vendor is not checked here.
+
+        Raises:
+            ValidationError: With a dict of field errors.
+    """
+    model = MODELS[kind]
+    values = {}
+    errors = {}
+    for name in IMPORT_FIELDS[kind]:
+        field = model._meta.get_field(name)
+        value = record.get(name)
+        try:
+            if name == 'vendor':
+                values['vendor_id'] = _vendor_id(value)
+            else:
+                values[name] = _clean_value(field, value, text)
+        except ValidationError as e:
+            errors[name] = e.messages
+    if kind == 'vendors' and record.get('id') not in (None, ''):
+        try:
+            values['id'] = int(record['id'])
+        except (TypeError, ValueError):
+            errors['id'] = ['Must be an integer.']
+    if errors:
+        raise ValidationError(errors)
+
+    instance = model(**values)
+    if kind == 'purchase_orders':
+        # bulk_create bypasses PurchaseOrder.save().
+        instance.stamp()
+    return instance
+
+
+def import_file(kind, path, file_format=None, batch_size=1000, max_errors=100, restart=False,
+                on_error=None, on_progress=None):
+    """
+        Imports a file, resuming from its checkpoint when an earlier run was interrupted.
+
+        Args:
+            kind (str): 'vendors' or 'purchase_orders'.
+            path (str): The CSV or NDJSON file.
+            file_format (str): 'csv' or 'ndjson'; detected from the extension when omitted.
+            batch_size (int): Records per bulk insert and checkpoint.
+            max_errors (int): Abort once more records than this were invalid.
+            restart (bool): Discard the checkpoint and import the whole file again.
+            on_error: Called with (record number, errors) for every invalid record.
+            on_progress: Called with (checkpoint, records read by this run) after each batch.
+
+        Returns:
+            ImportCheckpoint: The final state of the import.
+
+        Raises:
+            ImportAborted: Too many invalid records, or the file shrank since the checkpoint.
+    """
+    file_format = file_format or detect_format(path)
+    source = os.path.abspath(path)
+    if restart:
+        ImportCheckpoint.objects.filter(kind=kind, source=source).delete()
+    checkpoint, _ = ImportCheckpoint.objects.get_or_create(kind=kind, source=source)
+    if checkpoint.completed:
+        return checkpoint
+    if checkpoint.offset > os.path.getsize(path):
+        raise ImportAborted(f'{path} is shorter than its checkpoint; import it again with restart.')
+
+    model = MODELS[kind]
+    known_vendor_ids = set()
+    read = 0
+    batch = []
+    offset = checkpoint.offset
+    for record, offset in read_records(path, file_format, checkpoint.offset):
+        read += 1
+        batch.append((checkpoint.records + len(batch) + 1, record))
+        if len(batch) >= batch_size:
+            _write_batch(checkpoint, model, batch, offset, known_vendor_ids, file_format, max_errors, on_error)
+            batch = []
+            if on_progress:
+                on_progress(checkpoint, read)
+    if batch or offset != checkpoint.offset:
+        _write_batch(checkpoint, model, batch, offset, known_vendor_ids, file_format, max_errors, on_error)
+        if on_progress:
+            on_progress(checkpoint, read)
+
+    with transaction.atomic():
+        if kind == 'purchase_orders':
+            rebuild_vendor_metrics(checkpoint.vendor_ids)
+            record_historical_performances(checkpoint.vendor_ids)
+        else:
+            # bulk_create skips the signal that gives a new vendor its accumulator.
+            rebuild_vendor_metrics(Vendor.objects.filter(metric_accumulator__isnull=True).values_list('pk', flat=True))
+        checkpoint.completed = True
+        checkpoint.save()
+    return checkpoint
+
+
+def _write_batch(checkpoint, model, batch, offset, known_vendor_ids, file_format, max_errors, on_error):
+    """
+        Validates a batch and inserts its valid records together with the advanced checkpoint.
+    """
+    kind = checkpoint.kind
+    instances = []
+    invalid = 0
+    for number, record in batch:
+        try:
+            if record is None:
+                raise ValidationError({'record': ['Malformed record.']})
+            instances.append((number, build_instance(kind, record, text=file_format == 'csv')))
+        except ValidationError as e:
+            invalid += 1
+            if on_error:
+                on_error(number, e.message_dict)
+
+    if kind == 'purchase_orders':
+        unknown = {instance.vendor_id for _, instance in instances} - known_vendor_ids
+        if unknown:
+            known_vendor_ids.update(Vendor.objects.filter(pk__in=unknown).values_list('pk', flat=True))
+        valid = []
+        for number, instance in instances:
+            if instance.vendor_id in known_vendor_ids:
+                valid.append((number, instance))
+                continue
+            invalid += 1
+            if on_error:
+                on_error(number, {'vendor': [f'Vendor {instance.vendor_id} does not exist.']})
+        instances = valid
+
+    if checkpoint.invalid + invalid > max_errors:
+        raise ImportAborted(f'More than {max_errors} invalid records; nothing after record '
+                            f'{checkpoint.records} was imported.')
+
+    with transaction.atomic():
+        model.objects.bulk_create([instance for _, instance in instances])
+        checkpoint.offset = offset
+        checkpoint.records += len(batch)
+        checkpoint.imported += len(instances)
+        checkpoint.invalid += invalid
+        if kind == 'purchase_orders':
+            checkpoint.vendor_ids = sorted(set(checkpoint.vendor_ids).union(
+                instance.vendor_id for _, instance in instances))
+        checkpoint.save()
@@ -0,0 +1,65 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.importing import FORMATS, ImportAborted, import_file
+from base.models import ImportCheckpoint
+
+# Seconds between progress lines.
+PROGRESS_INTERVAL = 2.0
+
+
+class ImportCommand(BaseCommand):
+    """
+    Shared options and reporting of the import_vendors and import_pos commands.
+    """
+    kind = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file to import.')
+        parser.add_argument('--format', choices=FORMATS, dest='file_format',
+                            help='File format; defaults to the extension (.csv, .ndjson or .jsonl).')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Records per bulk insert and checkpoint (default 1000).')
+        parser.add_argument('--max-errors', type=int, default=100,
+                            help='Stop once more than this many records were invalid (default 100).')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore the checkpoint of an earlier run and import the whole file again.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        source = os.path.abspath(options['path'])
+        if not options['restart'] and ImportCheckpoint.objects.filter(
+                kind=self.kind, source=source, completed=True).exists():
+            self.stdout.write(f'{options["path"]} was already imported; pass --restart to import it again.')
+            return
+
+        started = time.perf_counter()
+        last_report = started
+        read = 0
+
+        def on_error(number, errors):
+            self.stderr.write(f'Record {number}: {errors}')
+
+        def on_progress(checkpoint, records_read):
+            nonlocal last_report, read
+            read = records_read
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                self.stdout.write(self.describe(checkpoint, read, now - started))
+
+        try:
+            checkpoint = import_file(self.kind, options['path'], file_format=options['file_format'],
+                                     batch_size=options['batch_size'], max_errors=options['max_errors'],
+                                     restart=options['restart'], on_error=on_error, on_progress=on_progress)
+        except (ImportAborted, OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(self.describe(checkpoint, read, time.perf_counter() - started)))
+
+    def describe(self, checkpoint, read, seconds):
+        return (f'{checkpoint.records} records read ({checkpoint.imported} imported, {checkpoint.invalid} invalid), '
+                f'{read / seconds if seconds else 0:.0f} records/s')
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from base.retention import compact_historical_performance, vacuum
+
+
+class Command(BaseCommand):
+    help = ('Thins out raw HistoricalPerformance snapshots: keeps everything for --raw-days, '
+            'one per vendor and hour until --hourly-days, and one per vendor and day after that.')
+
+    def add_arguments(self, parser):
+        retention = getattr(settings, 'HISTORICAL_PERFORMANCE_RETENTION', {})
+        parser.add_argument('--raw-days', type=int, default=retention.get('raw_days', 7))
+        parser.add_argument('--hourly-days', type=int, default=retention.get('hourly_days', 90))
+        parser.add_argument('--chunk-size', type=int, default=retention.get('chunk_size', 500),
+                            help='Rows deleted per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows would be removed.')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Run VACUUM afterwards to shrink the SQLite file.')
+
+    def handle(self, *args, **options):
+        try:
+            result = compact_historical_performance(
+                raw_days=options['raw_days'],
+                hourly_days=options['hourly_days'],
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        message = f"{verb} {result['rows_removed']} snapshot(s)"
+        if 'bytes_reclaimed' in result and not options['dry_run']:
+            message += f", {result['bytes_reclaimed']} byte(s) freed inside the database file"
+        self.stdout.write(self.style.SUCCESS(message + '.'))
+
+        if options['vacuum'] and not options['dry_run']:
+            if connection.vendor != 'sqlite':
+                raise CommandError('--vacuum is only supported on SQLite.')
+            self.stdout.write(self.style.SUCCESS(f'VACUUM shrank the database file by {vacuum()} byte(s).'))
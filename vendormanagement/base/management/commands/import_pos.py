@@ -0,0 +1,8 @@
+from ._import import ImportCommand
+
+
+class Command(ImportCommand):
+    help = ('Imports purchase orders from a CSV or NDJSON file in bulk, resuming after the last committed '
+            'batch if an earlier run was interrupted. Vendor metrics and HistoricalPerformance snapshots '
+            'are recomputed once at the end.')
+    kind = 'purchase_orders'
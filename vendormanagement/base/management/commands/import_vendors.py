@@ -0,0 +1,7 @@
+from ._import import ImportCommand
+
+
+class Command(ImportCommand):
+    help = ('Imports vendors from a CSV or NDJSON file in bulk, resuming after the last committed batch '
+            'if an earlier run was interrupted. An optional id column keeps the source system ids.')
+    kind = 'vendors'
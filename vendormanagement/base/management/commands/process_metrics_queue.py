@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from base.metrics_queue import process_batch, queue_status
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the metrics of vendors queued by purchase order writes (VENDOR_METRICS_ASYNC).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=getattr(settings, 'VENDOR_METRICS_QUEUE_BATCH_SIZE', 100),
+                            help='Vendors recomputed per transaction.')
+        parser.add_argument('--poll-interval', type=float,
+                            default=getattr(settings, 'VENDOR_METRICS_QUEUE_POLL_INTERVAL', 1.0),
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue once and exit instead of polling forever.')
+        parser.add_argument('--status', action='store_true',
+                            help='Print the queue backlog and exit.')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            status = queue_status()
+            self.stdout.write(f"pending={status['pending']} lag_seconds={status['lag_seconds']:.1f}")
+            return
+
+        while True:
+            processed = process_batch(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Recomputed metrics for {processed} vendor(s).')
+                continue
+            if options['once']:
+                return
+            close_old_connections()
+            time.sleep(options['poll_interval'])
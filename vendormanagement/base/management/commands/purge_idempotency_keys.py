@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Deletes stored Idempotency-Key responses whose TTL has passed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows deleted per transaction.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        now = datetime.now()
+        removed = 0
+        while True:
+            # Chunks keep each delete (and the write lock it holds) short.
+            expired = list(IdempotencyKey.objects.filter(expires_at__lte=now).values_list(
+                'pk', flat=True)[:options['chunk_size']])
+            if not expired:
+                break
+            removed += IdempotencyKey.objects.filter(pk__in=expired).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} expired idempotency key(s).'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from base.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = ('Recreates the hour/day/week HistoricalPerformance rollups from the raw snapshots '
+            '(e.g. to backfill existing data). Buckets whose raw snapshots were already '
+            'compacted away lose that part of their history.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendor_ids',
+                            help='Only this vendor id (may be repeated).')
+
+    def handle(self, *args, **options):
+        folded = rebuild_rollups(options['vendor_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups from {folded} snapshot(s).'))
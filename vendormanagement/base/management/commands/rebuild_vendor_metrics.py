@@ -0,0 +1,79 @@
+import math
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.metrics import EMPTY_TOTALS, TOTAL_FIELDS, compute_totals, rebuild_vendor_metrics, store_vendor_totals
+from base.models import Vendor, VendorMetricAccumulator
+from base.sharded_metrics import compute_totals_sharded
+
+
+class Command(BaseCommand):
+    help = 'Checks or rebuilds the per-vendor metric accumulators from the purchase orders.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendor_ids',
+                            help='Only this vendor id (may be repeated).')
+        parser.add_argument('--check', action='store_true',
+                            help='Report accumulators that disagree with the purchase orders without writing.')
+        parser.add_argument('--workers', type=int,
+                            help='Recompute every vendor with this many worker processes, sharded by vendor id '
+                                 'range, and write the results in batches.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Vendors written per transaction with --workers (default 500).')
+
+    def handle(self, *args, **options):
+        vendor_ids = options['vendor_ids']
+
+        if options['workers'] is not None:
+            if vendor_ids or options['check']:
+                raise CommandError('--workers rebuilds every vendor; it cannot be combined with --vendor or --check.')
+            if options['workers'] < 1 or options['batch_size'] < 1:
+                raise CommandError('--workers and --batch-size must be at least 1.')
+            started = time.perf_counter()
+            try:
+                totals = compute_totals_sharded(options['workers'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            computed = time.perf_counter()
+            rebuilt = store_vendor_totals(totals, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt metrics for {rebuilt} vendor(s) with {options["workers"]} worker(s): '
+                f'{computed - started:.2f}s computing, {time.perf_counter() - computed:.2f}s writing.'
+            ))
+            return
+
+        if not options['check']:
+            rebuilt = rebuild_vendor_metrics(vendor_ids)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt metrics for {rebuilt} vendor(s).'))
+            return
+
+        vendors = Vendor.objects.all()
+        if vendor_ids:
+            vendors = vendors.filter(pk__in=vendor_ids)
+        expected = compute_totals(vendor_ids)
+        stored = {
+            accumulator.vendor_id: accumulator
+            for accumulator in VendorMetricAccumulator.objects.filter(vendor__in=vendors)
+        }
+
+        mismatched = 0
+        for vendor_id in vendors.values_list('pk', flat=True):
+            totals = expected.get(vendor_id, EMPTY_TOTALS)
+            accumulator = stored.get(vendor_id)
+            if accumulator is None:
+                mismatched += 1
+                self.stdout.write(f'Vendor {vendor_id}: no accumulator')
+                continue
+            for name in TOTAL_FIELDS:
+                if not math.isclose(getattr(accumulator, name), totals[name], rel_tol=1e-9, abs_tol=1e-6):
+                    mismatched += 1
+                    self.stdout.write(
+                        f'Vendor {vendor_id}: {name} is {getattr(accumulator, name)}, expected {totals[name]}'
+                    )
+                    break
+
+        if mismatched:
+            raise CommandError(f'{mismatched} vendor(s) have inconsistent accumulators; '
+                               f'run without --check to rebuild them.')
+        self.stdout.write(self.style.SUCCESS('All vendor accumulators are consistent.'))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base import vectorized_metrics
+from base.metrics import store_vendor_totals
+
+
+class Command(BaseCommand):
+    help = ('Recomputes the metrics of every vendor from the purchase orders with NumPy: the orders are '
+            'read in primary-key chunks into arrays, reduced per vendor and written back with bulk updates. '
+            'Requires NumPy; rebuild_vendor_metrics is the ORM equivalent.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=50000,
+                            help='Purchase orders read per query (default 50000).')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Vendors written per transaction (default 500).')
+
+    def handle(self, *args, **options):
+        if not vectorized_metrics.available():
+            raise CommandError('recompute_metrics needs NumPy (pip install numpy); '
+                               'use rebuild_vendor_metrics without it.')
+        if options['chunk_size'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--chunk-size and --batch-size must be at least 1.')
+
+        started = time.perf_counter()
+
+        def on_chunk(read):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'Read {read} purchase orders ({read / elapsed:.0f} rows/s)')
+
+        try:
+            totals = vectorized_metrics.compute_totals_vectorized(options['chunk_size'], on_chunk=on_chunk)
+        except ValueError as e:
+            raise CommandError(f'{e} Run the command again.')
+        rows = sum(vendor_totals['total_pos'] for vendor_totals in totals.values())
+        computed = time.perf_counter()
+        written = store_vendor_totals(totals, batch_size=options['batch_size'])
+        finished = time.perf_counter()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed metrics for {written} vendor(s) from {rows} purchase orders in '
+            f'{finished - started:.2f}s: {rows / (computed - started) if computed > started else 0:.0f} rows/s '
+            f'read and reduced, {finished - computed:.2f}s writing.'
+        ))
@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from vendormanagement.db_router import replica_alias
+
+
+class Command(BaseCommand):
+    help = ('Copies the primary SQLite database into the read replica file. The copy is a '
+            'consistent snapshot written next to the target and then renamed over it, so '
+            'readers never see a partial file.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', help='Replica file to write; defaults to the NAME of the replica alias.')
+        parser.add_argument('--interval', type=float,
+                            help='Keep refreshing every this many seconds instead of copying once.')
+
+    def handle(self, *args, **options):
+        source = connections['default']
+        if source.vendor != 'sqlite':
+            raise CommandError('refresh_read_replica only copies SQLite databases.')
+        target = options['target']
+        if target is None:
+            alias = replica_alias()
+            if alias is None:
+                raise CommandError('No read replica is configured; pass --target or set VENDORMANAGEMENT_READ_REPLICA.')
+            target = connections[alias].settings_dict['NAME']
+        target = str(target)
+
+        while True:
+            started = time.perf_counter()
+            self.copy(source, target)
+            self.stdout.write(self.style.SUCCESS(
+                f'Refreshed {target} in {time.perf_counter() - started:.3f}s ({os.path.getsize(target)} bytes).'
+            ))
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source, target):
+        if source.in_atomic_block:
+            # The backup would wait forever for this connection's own write lock.
+            raise CommandError('Cannot copy the database from inside a transaction.')
+        source.ensure_connection()
+        partial = f'{target}.partial'
+        destination = sqlite3.connect(partial)
+        try:
+            source.connection.backup(destination)
+        finally:
+            destination.close()
+        os.replace(partial, target)
@@ -0,0 +1,380 @@
+"""
+Vendor performance metrics.
+
+Every purchase order contributes a fixed set of counts and sums to its vendor
+(see ``contribution``). The totals of those contributions are kept per vendor in
+``VendorMetricAccumulator`` and the four metric fields on ``Vendor`` are derived
+from them, so a PO write only costs a constant number of queries no matter how
+many orders the vendor already has.
+
+``compute_totals`` recomputes the same totals from the purchase orders with a
+single conditional-aggregate query (grouped by vendor when several vendors are
+requested); it is what full refreshes, consistency checks and batch jobs use.
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+
+from . import performance_cache
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, VendorMetricAccumulator
+from .rankings import store_rankings, update_rankings
+from .rollups import add_to_rollups
+
+TOTAL_FIELDS = (
+    'total_pos',
+    'completed_pos',
+    'on_time_pos',
+    'quality_rating_sum',
+    'acknowledged_pos',
+    'response_seconds_sum',
+)
+
+# PurchaseOrder columns a contribution depends on.
+CONTRIBUTION_FIELDS = (
+    'vendor_id',
+    'status',
+    'delivery_date',
+    'completed_date',
+    'quality_rating',
+    'issue_date',
+    'acknowledgement_date',
+)
+
+EMPTY_TOTALS = dict.fromkeys(TOTAL_FIELDS, 0)
+
+# The on-time condition of a completed order, as ``contribution`` applies it.
+ON_TIME = Q(completed_date__isnull=True) | Q(completed_date__lte=F('delivery_date'))
+
+METRIC_FIELDS = (
+    'on_time_delivery_rate',
+    'quality_rating_avg',
+    'average_response_time',
+    'fulfillment_rate',
+)
+
+
+def contribution(values):
+    """
+        Returns what a single purchase order adds to its vendor's totals.
+
+        Orders completed before completed_date was recorded count as completed on
+        their delivery date, i.e. on time.
+
+        Args:
+            values (dict): The CONTRIBUTION_FIELDS of the purchase order.
+
+        Returns:
+            dict: A value for every name in TOTAL_FIELDS.
+    """
+    completed = values['status'] == 'completed'
+    completed_date = values['completed_date']
+    acknowledgement_date = values['acknowledgement_date']
+
+    totals = dict(EMPTY_TOTALS, total_pos=1)
+    if completed:
+        totals['completed_pos'] = 1
+        if completed_date is None or completed_date <= values['delivery_date']:
+            totals['on_time_pos'] = 1
+        if values['quality_rating'] is not None:
+            totals['quality_rating_sum'] = values['quality_rating']
+    if acknowledgement_date is not None:
+        totals['acknowledged_pos'] = 1
+        totals['response_seconds_sum'] = (acknowledgement_date - values['issue_date']).total_seconds()
+    return totals
+
+
+def contribution_of(purchase_order):
+    """
+        Returns the contribution of a PurchaseOrder instance.
+    """
+    return contribution({name: getattr(purchase_order, name) for name in CONTRIBUTION_FIELDS})
+
+
+def derive_metrics(totals):
+    """
+        Derives the Vendor metric fields from a vendor's totals.
+
+        Args:
+            totals: A mapping or object exposing every name in TOTAL_FIELDS.
+
+        Returns:
+            dict: on_time_delivery_rate, quality_rating_avg, average_response_time
+            (in hours) and fulfillment_rate, 0.0 where there is nothing to average.
+    """
+    if isinstance(totals, VendorMetricAccumulator):
+        totals = {name: getattr(totals, name) for name in TOTAL_FIELDS}
+
+    completed_pos = totals['completed_pos']
+    acknowledged_pos = totals['acknowledged_pos']
+    total_pos = totals['total_pos']
+    return {
+        'on_time_delivery_rate': totals['on_time_pos'] / completed_pos if completed_pos else 0.0,
+        'quality_rating_avg': totals['quality_rating_sum'] / completed_pos if completed_pos else 0.0,
+        'average_response_time': (
+            totals['response_seconds_sum'] / acknowledged_pos / 3600 if acknowledged_pos else 0.0
+        ),
+        'fulfillment_rate': completed_pos / total_pos if total_pos else 0.0,
+    }
+
+
+def apply_delta(vendor_id, delta, daily_delta=None):
+    """
+        Adds ``delta`` to a vendor's accumulator and refreshes the derived Vendor fields.
+
+        The accumulator UPDATE comes first, so it holds the vendor's row lock until the
+        surrounding transaction commits. Only the metric fields the delta changed are
+        written back, in one UPDATE.
+
+        A vendor without an accumulator yet (e.g. one created before accumulators
+        existed) is rebuilt from its purchase orders instead, which already
+        reflects the write that produced ``delta``.
+
+        ``daily_delta`` is the same difference split by day (see base.daily_metrics);
+        it is added to the vendor's daily prefix sums.
+    """
+    # daily_metrics builds on this module, hence the local import.
+    from .daily_metrics import apply_daily_delta
+
+    changes = {name: F(name) + value for name, value in delta.items() if value}
+    with transaction.atomic():
+        if changes:
+            updated = VendorMetricAccumulator.objects.filter(vendor_id=vendor_id).update(**changes)
+        else:
+            updated = VendorMetricAccumulator.objects.filter(vendor_id=vendor_id).exists()
+        if not updated:
+            rebuild_vendor_metrics([vendor_id])
+            return
+        if daily_delta:
+            apply_daily_delta(vendor_id, daily_delta)
+        if not changes:
+            return
+        accumulator = VendorMetricAccumulator.objects.get(vendor_id=vendor_id)
+        metrics = derive_metrics(accumulator)
+        previous_totals = {name: getattr(accumulator, name) - delta.get(name, 0) for name in TOTAL_FIELDS}
+        if previous_totals['total_pos']:
+            # Float sums may not subtract back exactly; that only writes a column too many.
+            previous = derive_metrics(previous_totals)
+            changed = {name: value for name, value in metrics.items() if value != previous[name]}
+        else:
+            # A vendor's metric fields are empty until its first order.
+            changed = metrics
+        if changed:
+            Vendor.objects.filter(pk=vendor_id).update(**changed, updated_at=datetime.now())
+        if changed or delta.get('total_pos'):
+            update_rankings({vendor_id: accumulator})
+        performance_cache.invalidate([vendor_id])
+
+
+def _total_aggregates():
+    """
+        Returns the conditional aggregates computing every name in TOTAL_FIELDS.
+    """
+    completed = Q(status='completed')
+    return {
+        'total_pos': Count('pk'),
+        'completed_pos': Count('pk', filter=completed),
+        'on_time_pos': Count('pk', filter=completed & ON_TIME),
+        'quality_rating_sum': Sum('quality_rating', filter=completed),
+        'acknowledged_pos': Count('pk', filter=Q(acknowledgement_date__isnull=False)),
+        'response_time_sum': Sum(ExpressionWrapper(F('acknowledgement_date') - F('issue_date'),
+                                                   output_field=DurationField())),
+    }
+
+
+def _totals_from_row(row):
+    response_time_sum = row.pop('response_time_sum')
+    row['quality_rating_sum'] = row['quality_rating_sum'] or 0.0
+    row['response_seconds_sum'] = response_time_sum.total_seconds() if response_time_sum is not None else 0.0
+    return row
+
+
+def compute_totals(vendor_ids=None, vendor_id_range=None):
+    """
+        Recomputes totals from the purchase orders in one GROUP BY query.
+
+        Args:
+            vendor_ids: Optional iterable restricting the vendors considered.
+            vendor_id_range: Optional (first, last) inclusive vendor id bounds.
+
+        Returns:
+            dict: vendor id -> totals, for every vendor that has purchase orders.
+    """
+    purchase_orders = PurchaseOrder.objects.all()
+    if vendor_ids is not None:
+        purchase_orders = purchase_orders.filter(vendor_id__in=list(vendor_ids))
+    if vendor_id_range is not None:
+        first, last = vendor_id_range
+        purchase_orders = purchase_orders.filter(vendor_id__gte=first, vendor_id__lte=last)
+    rows = purchase_orders.order_by().values('vendor_id').annotate(**_total_aggregates())
+    return {row.pop('vendor_id'): _totals_from_row(row) for row in rows}
+
+
+def compute_vendor_totals(vendor_id):
+    """
+        Recomputes a single vendor's totals in one aggregate query.
+    """
+    row = PurchaseOrder.objects.filter(vendor_id=vendor_id).aggregate(**_total_aggregates())
+    return _totals_from_row(row)
+
+
+def compute_vendor_metrics(vendor_id):
+    """
+        Computes the four metrics of a vendor straight from its purchase orders.
+
+        Args:
+            vendor_id: The unique identifier of the vendor.
+
+        Returns:
+            dict: on_time_delivery_rate, quality_rating_avg, average_response_time
+            (in hours) and fulfillment_rate.
+    """
+    return derive_metrics(compute_vendor_totals(vendor_id))
+
+
+def compute_metrics_for_vendors(vendor_ids=None):
+    """
+        Computes the four metrics for many vendors with a single query.
+
+        Args:
+            vendor_ids: Optional iterable of vendor ids; all vendors when omitted.
+
+        Returns:
+            dict: vendor id -> metrics. Vendors without purchase orders get zeros.
+    """
+    totals_by_vendor = compute_totals(vendor_ids)
+    if vendor_ids is not None:
+        for vendor_id in vendor_ids:
+            totals_by_vendor.setdefault(vendor_id, EMPTY_TOTALS)
+    return {vendor_id: derive_metrics(totals) for vendor_id, totals in totals_by_vendor.items()}
+
+
+def rebuild_vendor_metrics(vendor_ids=None):
+    """
+        Rebuilds accumulators, daily prefix sums and Vendor metric fields from the purchase orders.
+
+        Args:
+            vendor_ids: Optional iterable of vendor ids; all vendors when omitted.
+
+        Returns:
+            int: The number of vendors rebuilt.
+    """
+    from .daily_metrics import rebuild_daily_metrics
+
+    vendors = Vendor.objects.all()
+    if vendor_ids is not None:
+        vendor_ids = list(vendor_ids)
+        vendors = vendors.filter(pk__in=vendor_ids)
+    totals_by_vendor = compute_totals(vendor_ids)
+
+    now = datetime.now()
+    with transaction.atomic():
+        rebuilt_ids = list(vendors.values_list('pk', flat=True))
+        for vendor_id in rebuilt_ids:
+            totals = totals_by_vendor.get(vendor_id, EMPTY_TOTALS)
+            VendorMetricAccumulator.objects.update_or_create(vendor_id=vendor_id, defaults=totals)
+            Vendor.objects.filter(pk=vendor_id).update(**derive_metrics(totals), updated_at=now)
+        update_rankings({vendor_id: totals_by_vendor.get(vendor_id, EMPTY_TOTALS) for vendor_id in rebuilt_ids})
+        rebuild_daily_metrics(rebuilt_ids)
+        performance_cache.invalidate(rebuilt_ids)
+    return len(rebuilt_ids)
+
+
+def store_vendor_totals(totals_by_vendor, batch_size=500):
+    """
+        Writes precomputed totals to the accumulators, Vendor metric fields and rankings,
+        and rebuilds the daily prefix sums of the same vendors.
+
+        The bulk counterpart of the per-vendor writes in ``rebuild_vendor_metrics``,
+        for fleet-wide recomputes: every batch of vendors costs a fixed number of
+        queries and is committed on its own, so the write lock is held briefly.
+
+        Args:
+            totals_by_vendor (dict): vendor id -> totals (every name in TOTAL_FIELDS).
+            batch_size (int): Vendors written per transaction.
+
+        Returns:
+            int: The number of vendors written.
+    """
+    from .daily_metrics import rebuild_daily_metrics
+
+    vendor_ids = sorted(totals_by_vendor)
+    now = datetime.now()
+    for start in range(0, len(vendor_ids), batch_size):
+        batch = vendor_ids[start:start + batch_size]
+        with transaction.atomic():
+            existing = set(
+                VendorMetricAccumulator.objects.filter(vendor_id__in=batch).values_list('vendor_id', flat=True))
+            accumulators = [VendorMetricAccumulator(vendor_id=vendor_id, **totals_by_vendor[vendor_id])
+                            for vendor_id in batch]
+            VendorMetricAccumulator.objects.bulk_update(
+                [accumulator for accumulator in accumulators if accumulator.vendor_id in existing], TOTAL_FIELDS)
+            VendorMetricAccumulator.objects.bulk_create(
+                [accumulator for accumulator in accumulators if accumulator.vendor_id not in existing])
+            Vendor.objects.bulk_update(
+                [Vendor(pk=vendor_id, **derive_metrics(totals_by_vendor[vendor_id]), updated_at=now)
+                 for vendor_id in batch],
+                [*METRIC_FIELDS, 'updated_at'])
+            store_rankings({vendor_id: totals_by_vendor[vendor_id] for vendor_id in batch})
+            rebuild_daily_metrics(batch)
+            performance_cache.invalidate(batch)
+    return len(vendor_ids)
+
+
+def _historical_performance(vendor):
+    """
+        Builds an unsaved HistoricalPerformance snapshot of a vendor's current metrics.
+
+        Returns None unless all four metrics are non-zero.
+    """
+    metrics = [vendor.on_time_delivery_rate, vendor.quality_rating_avg, vendor.average_response_time,
+               vendor.fulfillment_rate]
+    if not all(metrics):
+        return None
+    return HistoricalPerformance(
+        vendor=vendor,
+        date=datetime.now(),  # Use current date and time
+        on_time_delivery_rate=vendor.on_time_delivery_rate,
+        quality_rating_avg=vendor.quality_rating_avg,
+        average_response_time=vendor.average_response_time,
+        fulfillment_rate=vendor.fulfillment_rate,
+    )
+
+
+def record_historical_performance(vendor_id):
+    """
+        Stores a HistoricalPerformance snapshot of a vendor's current metrics.
+
+        A snapshot is only taken when all four metrics are non-zero.
+
+        Args:
+            vendor_id: The unique identifier of the vendor.
+
+        Returns:
+            HistoricalPerformance: The created snapshot, or None.
+    """
+    snapshot = _historical_performance(Vendor.objects.only(*METRIC_FIELDS).get(pk=vendor_id))
+    if snapshot is not None:
+        snapshot.save()
+    return snapshot
+
+
+def record_historical_performances(vendor_ids):
+    """
+        Stores at most one HistoricalPerformance snapshot per vendor, in one insert.
+
+        Args:
+            vendor_ids: Iterable of vendor ids.
+
+        Returns:
+            list: The created snapshots.
+    """
+    snapshots = [
+        snapshot for snapshot in map(_historical_performance, Vendor.objects.filter(pk__in=list(vendor_ids)))
+        if snapshot is not None
+    ]
+    snapshots = HistoricalPerformance.objects.bulk_create(snapshots)
+    # bulk_create sends no post_save signal, so do its work here.
+    add_to_rollups(snapshots)
+    performance_cache.invalidate([snapshot.vendor_id for snapshot in snapshots])
+    return snapshots
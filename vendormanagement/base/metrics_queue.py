@@ -0,0 +1,92 @@
+"""
+Asynchronous vendor metric recomputation.
+
+With ``VENDOR_METRICS_ASYNC = True`` purchase order writes no longer touch the
+vendor's metrics in the request; they only mark the vendor dirty in
+``VendorMetricsQueue``. The ``process_metrics_queue`` management command drains
+the queue and recomputes every dirty vendor once, however many writes arrived
+in the meantime.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min
+
+from .metrics import rebuild_vendor_metrics, record_historical_performance, record_historical_performances
+from .models import VendorMetricsQueue
+
+
+def metrics_async():
+    return getattr(settings, 'VENDOR_METRICS_ASYNC', False)
+
+
+def mark_vendor_dirty(vendor_id, snapshot=False):
+    """
+        Queues a vendor for recomputation, coalescing with any pending entry.
+
+        Args:
+            vendor_id: The unique identifier of the vendor.
+            snapshot (bool): Also store a HistoricalPerformance snapshot after recomputing.
+    """
+    changes = {'version': F('version') + 1}
+    if snapshot:
+        changes['snapshot'] = True
+    if VendorMetricsQueue.objects.filter(vendor_id=vendor_id).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            VendorMetricsQueue.objects.create(vendor_id=vendor_id, enqueued_at=datetime.now(), snapshot=snapshot)
+    except IntegrityError:
+        # Another writer queued the vendor in between.
+        VendorMetricsQueue.objects.filter(vendor_id=vendor_id).update(**changes)
+
+
+def request_historical_performance(vendor_id):
+    """
+        Stores a HistoricalPerformance snapshot now, or after the next recomputation in async mode.
+    """
+    if metrics_async():
+        mark_vendor_dirty(vendor_id, snapshot=True)
+    else:
+        record_historical_performance(vendor_id)
+
+
+def process_batch(batch_size):
+    """
+        Recomputes the metrics of up to ``batch_size`` of the longest-waiting dirty vendors.
+
+        An entry is only removed if it was not marked again while its vendor was
+        being recomputed; otherwise it stays queued for the next batch.
+
+        Returns:
+            int: The number of vendors recomputed.
+    """
+    entries = list(VendorMetricsQueue.objects.order_by('enqueued_at').values_list(
+        'vendor_id', 'version', 'snapshot')[:batch_size])
+    if not entries:
+        return 0
+
+    with transaction.atomic():
+        rebuild_vendor_metrics([vendor_id for vendor_id, _, _ in entries])
+        record_historical_performances([vendor_id for vendor_id, _, snapshot in entries if snapshot])
+        for vendor_id, version, _ in entries:
+            VendorMetricsQueue.objects.filter(vendor_id=vendor_id, version=version).delete()
+    return len(entries)
+
+
+def queue_status():
+    """
+        Reports how far the worker is behind.
+
+        Returns:
+            dict: pending (dirty vendors), oldest_enqueued_at and lag_seconds
+            (age of the oldest entry, 0.0 when the queue is empty).
+    """
+    stats = VendorMetricsQueue.objects.aggregate(pending=Count('pk'), oldest=Min('enqueued_at'))
+    oldest = stats['oldest']
+    return {
+        'pending': stats['pending'],
+        'oldest_enqueued_at': oldest,
+        'lag_seconds': (datetime.now() - oldest).total_seconds() if oldest else 0.0,
+    }
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_auto_20240506_1725'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorMetricAccumulator',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='metric_accumulator', serialize=False, to='base.vendor')),
+                ('total_pos', models.IntegerField(default=0)),
+                ('completed_pos', models.IntegerField(default=0)),
+                ('on_time_pos', models.IntegerField(default=0)),
+                ('quality_rating_sum', models.FloatField(default=0.0)),
+                ('acknowledged_pos', models.IntegerField(default=0)),
+                ('response_seconds_sum', models.FloatField(default=0.0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='completed_date',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
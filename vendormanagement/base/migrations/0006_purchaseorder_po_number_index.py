@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_vendor_metric_accumulator'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='po_number',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
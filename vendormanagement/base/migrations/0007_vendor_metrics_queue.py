@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_purchaseorder_po_number_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorMetricsQueue',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='metrics_queue_entry', serialize=False, to='base.vendor')),
+                ('enqueued_at', models.DateTimeField(db_index=True)),
+                ('version', models.IntegerField(default=1)),
+                ('snapshot', models.BooleanField(default=False)),
+            ],
+        ),
+    ]
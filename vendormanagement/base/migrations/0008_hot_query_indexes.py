@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_vendor_metrics_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalperformance',
+            index=models.Index(fields=['vendor', '-date'], name='hp_vendor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'status', 'delivery_date'], name='po_vendor_status_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(condition=models.Q(('acknowledgement_date__isnull', False)), fields=['vendor', 'acknowledgement_date'], name='po_vendor_ack_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricalPerformanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.IntegerField(default=0)),
+                ('last_date', models.DateTimeField()),
+                ('on_time_delivery_rate_min', models.FloatField()),
+                ('on_time_delivery_rate_max', models.FloatField()),
+                ('on_time_delivery_rate_sum', models.FloatField()),
+                ('on_time_delivery_rate_last', models.FloatField()),
+                ('quality_rating_avg_min', models.FloatField()),
+                ('quality_rating_avg_max', models.FloatField()),
+                ('quality_rating_avg_sum', models.FloatField()),
+                ('quality_rating_avg_last', models.FloatField()),
+                ('average_response_time_min', models.FloatField()),
+                ('average_response_time_max', models.FloatField()),
+                ('average_response_time_sum', models.FloatField()),
+                ('average_response_time_last', models.FloatField()),
+                ('fulfillment_rate_min', models.FloatField()),
+                ('fulfillment_rate_max', models.FloatField()),
+                ('fulfillment_rate_sum', models.FloatField()),
+                ('fulfillment_rate_last', models.FloatField()),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.vendor')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='historicalperformancerollup',
+            constraint=models.UniqueConstraint(fields=('vendor', 'bucket', 'bucket_start'), name='hp_rollup_unique_bucket'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0010_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorRanking',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='base.vendor')),
+                ('total_pos', models.IntegerField(default=0)),
+                ('on_time_delivery_rate', models.FloatField(null=True)),
+                ('quality_rating_avg', models.FloatField(null=True)),
+                ('average_response_time', models.FloatField(null=True)),
+                ('fulfillment_rate', models.FloatField(null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='vendorranking',
+            index=models.Index(fields=['on_time_delivery_rate', 'total_pos', 'vendor'], name='ranking_on_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorranking',
+            index=models.Index(fields=['quality_rating_avg', 'total_pos', 'vendor'], name='ranking_quality_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorranking',
+            index=models.Index(fields=['average_response_time', 'total_pos', 'vendor'], name='ranking_response_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorranking',
+            index=models.Index(fields=['fulfillment_rate', 'total_pos', 'vendor'], name='ranking_fulfillment_idx'),
+        ),
+    ]
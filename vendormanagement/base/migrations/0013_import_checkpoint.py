@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0012_purchase_order_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('vendors', 'Vendors'), ('purchase_orders', 'Purchase orders')], max_length=20)),
+                ('source', models.CharField(max_length=1024)),
+                ('offset', models.BigIntegerField(default=0)),
+                ('records', models.IntegerField(default=0)),
+                ('imported', models.IntegerField(default=0)),
+                ('invalid', models.IntegerField(default=0)),
+                ('vendor_ids', models.JSONField(default=list)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='importcheckpoint',
+            constraint=models.UniqueConstraint(fields=('kind', 'source'), name='import_checkpoint_unique_source'),
+        ),
+    ]
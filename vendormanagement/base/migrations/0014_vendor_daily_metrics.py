@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0013_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorDailyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('total_pos', models.IntegerField(default=0)),
+                ('completed_pos', models.IntegerField(default=0)),
+                ('on_time_pos', models.IntegerField(default=0)),
+                ('quality_rating_sum', models.FloatField(default=0.0)),
+                ('acknowledged_pos', models.IntegerField(default=0)),
+                ('response_seconds_sum', models.FloatField(default=0.0)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.vendor')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='vendordailymetrics',
+            constraint=models.UniqueConstraint(fields=('vendor', 'day'), name='daily_metrics_unique_day'),
+        ),
+    ]
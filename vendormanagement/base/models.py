@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from django.db import models
 
 
@@ -12,6 +14,8 @@ class Vendor(models.Model):
     quality_rating_avg = models.FloatField(null=True)
     average_response_time = models.FloatField(null=True)
     fulfillment_rate = models.FloatField(null=True)
+    # Validator for conditional GETs; queryset .update() calls must set it as well.
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         """
@@ -21,7 +25,7 @@ class Vendor(models.Model):
 
 
 class PurchaseOrder(models.Model):
-    po_number = models.CharField(max_length=200)
+    po_number = models.CharField(max_length=200, db_index=True)
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
     order_date = models.DateTimeField()
     delivery_date = models.DateTimeField()
@@ -31,6 +35,44 @@ class PurchaseOrder(models.Model):
     quality_rating = models.FloatField(null=True)
     issue_date = models.DateTimeField()
     acknowledgement_date = models.DateTimeField(null=True)
+    completed_date = models.DateTimeField(null=True)
+    # Validator for conditional GETs; bulk_update() and .update() calls must set it as well.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # vendor+status and vendor+status+delivery_date lookups (completed/on-time counts).
+            models.Index(fields=['vendor', 'status', 'delivery_date'], name='po_vendor_status_delivery_idx'),
+            # Acknowledged orders of a vendor (average response time).
+            models.Index(fields=['vendor', 'acknowledgement_date'], name='po_vendor_ack_idx',
+                         condition=models.Q(acknowledgement_date__isnull=False)),
+            # Purchase order list filters (api.filters); each driving filter has an index that
+            # yields its rows in id order.
+            models.Index(fields=['status'], name='po_status_idx'),
+            models.Index(fields=['vendor', 'status'], name='po_vendor_status_idx'),
+            models.Index(fields=['id'], name='po_unacknowledged_idx',
+                         condition=models.Q(acknowledgement_date__isnull=True)),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.stamp()
+        super().save(*args, **kwargs)
+
+    def stamp(self, now=None):
+        """
+        Sets the values every write of the order adds: updated_at, and completed_date
+        the first time the order is seen as completed (on-time delivery is measured
+        against it). save() calls this; bulk_create/bulk_update callers must.
+
+        Returns the names of the fields it set.
+        """
+        now = now or datetime.now()
+        self.updated_at = now
+        stamped = {'updated_at'}
+        if self.status == 'completed' and self.completed_date is None:
+            self.completed_date = now
+            stamped.add('completed_date')
+        return stamped
 
     def __str__(self):
         # Include all fields in the string representation
@@ -46,6 +88,7 @@ class PurchaseOrder(models.Model):
       quality_rating: {self.quality_rating}
       issue_date: {self.issue_date}
       acknowledgement_date: {self.acknowledgement_date}
+      completed_date: {self.completed_date}
             """
 
 
@@ -57,6 +100,12 @@ class HistoricalPerformance(models.Model):
     average_response_time = models.FloatField()
     fulfillment_rate = models.FloatField()
 
+    class Meta:
+        indexes = [
+            # Latest snapshot of a vendor: vendor ORDER BY -date.
+            models.Index(fields=['vendor', '-date'], name='hp_vendor_date_idx'),
+        ]
+
     def __str__(self):
         """
         Returns a string representation of the HistoricalPerformance object
@@ -64,3 +113,224 @@ class HistoricalPerformance(models.Model):
         """
         return f"HistoricalPerformance(vendor={self.vendor}, date={self.date}, on_time_delivery_rate={self.on_time_delivery_rate}, quality_rating_avg={self.quality_rating_avg}, average_response_time={self.average_response_time}, fulfillment_rate={self.fulfillment_rate})"
 
+
+class VendorMetricAccumulator(models.Model):
+    """
+    Running totals over a vendor's purchase orders.
+
+    The four metric fields on Vendor are derived from these totals, so a PO write
+    only has to apply the difference it makes instead of rescanning every order.
+    """
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='metric_accumulator')
+    total_pos = models.IntegerField(default=0)
+    completed_pos = models.IntegerField(default=0)
+    on_time_pos = models.IntegerField(default=0)
+    quality_rating_sum = models.FloatField(default=0.0)
+    acknowledged_pos = models.IntegerField(default=0)
+    response_seconds_sum = models.FloatField(default=0.0)
+
+    def __str__(self):
+        """
+        Returns a string representation of the VendorMetricAccumulator object
+        including all fields.
+        """
+        return f"VendorMetricAccumulator(vendor_id={self.vendor_id}, total_pos={self.total_pos}, completed_pos={self.completed_pos}, on_time_pos={self.on_time_pos}, quality_rating_sum={self.quality_rating_sum}, acknowledged_pos={self.acknowledged_pos}, response_seconds_sum={self.response_seconds_sum})"
+
+
+
+class VendorDailyMetrics(models.Model):
+    """
+    A vendor's running totals (as in VendorMetricAccumulator) at the end of ``day``.
+
+    Rows are prefix sums over the days on which something happened to the
+    vendor's orders: an order placed, completed or acknowledged. The metrics as
+    of any date come from the latest row on or before it. A write to a past day
+    shifts every later row by the same difference.
+    """
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
+    day = models.DateField()
+    total_pos = models.IntegerField(default=0)
+    completed_pos = models.IntegerField(default=0)
+    on_time_pos = models.IntegerField(default=0)
+    quality_rating_sum = models.FloatField(default=0.0)
+    acknowledged_pos = models.IntegerField(default=0)
+    response_seconds_sum = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            # Also serves the "latest row on or before a date" lookup.
+            models.UniqueConstraint(fields=['vendor', 'day'], name='daily_metrics_unique_day'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the VendorDailyMetrics object.
+        """
+        return f"VendorDailyMetrics(vendor_id={self.vendor_id}, day={self.day}, total_pos={self.total_pos}, completed_pos={self.completed_pos}, on_time_pos={self.on_time_pos}, acknowledged_pos={self.acknowledged_pos})"
+
+class VendorRanking(models.Model):
+    """
+    Materialized leaderboard row of a vendor: its PO count and the four metrics.
+
+    A metric is NULL while the vendor has nothing to average it over, and such
+    vendors are left out of that metric's ranking. Rows are refreshed together
+    with the Vendor metric fields; each metric has a (metric, total_pos, vendor)
+    index, so top-N reads and rank counts are index range scans.
+    """
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True, related_name='ranking')
+    total_pos = models.IntegerField(default=0)
+    on_time_delivery_rate = models.FloatField(null=True)
+    quality_rating_avg = models.FloatField(null=True)
+    average_response_time = models.FloatField(null=True)
+    fulfillment_rate = models.FloatField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['on_time_delivery_rate', 'total_pos', 'vendor'], name='ranking_on_time_idx'),
+            models.Index(fields=['quality_rating_avg', 'total_pos', 'vendor'], name='ranking_quality_idx'),
+            models.Index(fields=['average_response_time', 'total_pos', 'vendor'], name='ranking_response_idx'),
+            models.Index(fields=['fulfillment_rate', 'total_pos', 'vendor'], name='ranking_fulfillment_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the VendorRanking object
+        including all fields.
+        """
+        return f"VendorRanking(vendor_id={self.vendor_id}, total_pos={self.total_pos}, on_time_delivery_rate={self.on_time_delivery_rate}, quality_rating_avg={self.quality_rating_avg}, average_response_time={self.average_response_time}, fulfillment_rate={self.fulfillment_rate})"
+
+
+class VendorMetricsQueue(models.Model):
+    """
+    A "vendor X is dirty" marker for asynchronous metric recomputation.
+
+    There is at most one row per vendor: marking an already queued vendor only bumps
+    ``version``, so any number of writes in a window coalesce into one recomputation.
+    """
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='metrics_queue_entry')
+    enqueued_at = models.DateTimeField(db_index=True)
+    version = models.IntegerField(default=1)
+    snapshot = models.BooleanField(default=False)
+
+    def __str__(self):
+        """
+        Returns a string representation of the VendorMetricsQueue object
+        including all fields.
+        """
+        return f"VendorMetricsQueue(vendor_id={self.vendor_id}, enqueued_at={self.enqueued_at}, version={self.version}, snapshot={self.snapshot})"
+
+
+class HistoricalPerformanceRollup(models.Model):
+    """
+    Min/max/sum/last of every HistoricalPerformance metric per vendor and time bucket.
+
+    Rows are updated as snapshots are recorded, so history charts never aggregate
+    raw snapshots at read time. The average of a metric is ``<metric>_sum / count``.
+    """
+    BUCKETS = (
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+        ('week', 'Week'),
+    )
+
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
+    bucket = models.CharField(max_length=4, choices=BUCKETS)
+    bucket_start = models.DateTimeField()
+    count = models.IntegerField(default=0)
+    last_date = models.DateTimeField()
+    on_time_delivery_rate_min = models.FloatField()
+    on_time_delivery_rate_max = models.FloatField()
+    on_time_delivery_rate_sum = models.FloatField()
+    on_time_delivery_rate_last = models.FloatField()
+    quality_rating_avg_min = models.FloatField()
+    quality_rating_avg_max = models.FloatField()
+    quality_rating_avg_sum = models.FloatField()
+    quality_rating_avg_last = models.FloatField()
+    average_response_time_min = models.FloatField()
+    average_response_time_max = models.FloatField()
+    average_response_time_sum = models.FloatField()
+    average_response_time_last = models.FloatField()
+    fulfillment_rate_min = models.FloatField()
+    fulfillment_rate_max = models.FloatField()
+    fulfillment_rate_sum = models.FloatField()
+    fulfillment_rate_last = models.FloatField()
+
+    class Meta:
+        constraints = [
+            # Also serves the (vendor, bucket, bucket_start range) history query.
+            models.UniqueConstraint(fields=['vendor', 'bucket', 'bucket_start'], name='hp_rollup_unique_bucket'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the HistoricalPerformanceRollup object.
+        """
+        return f"HistoricalPerformanceRollup(vendor_id={self.vendor_id}, bucket={self.bucket}, bucket_start={self.bucket_start}, count={self.count})"
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of a bulk import file (see base.importing).
+
+    ``offset`` is the byte position after the last committed record. It is saved in
+    the same transaction as each batch, so an interrupted import resumes exactly
+    after the last batch that was written.
+    """
+    KINDS = (
+        ('vendors', 'Vendors'),
+        ('purchase_orders', 'Purchase orders'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    source = models.CharField(max_length=1024)
+    offset = models.BigIntegerField(default=0)
+    records = models.IntegerField(default=0)
+    imported = models.IntegerField(default=0)
+    invalid = models.IntegerField(default=0)
+    # Vendors whose metrics are recomputed when the import finishes.
+    vendor_ids = models.JSONField(default=list)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'source'], name='import_checkpoint_unique_source'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the ImportCheckpoint object.
+        """
+        return f"ImportCheckpoint(kind={self.kind}, source={self.source}, offset={self.offset}, records={self.records}, completed={self.completed})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored response of a write request sent with an ``Idempotency-Key`` header (see api.idempotency).
+
+    A retry with the same key, method and path gets ``body`` back with
+    ``status_code`` instead of running the write again. ``request_hash`` detects a
+    key reused for a different request body. Rows are kept until ``expires_at``.
+    """
+    key = models.CharField(max_length=255)
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    # The rendered JSON payload.
+    body = models.TextField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            # Also serves the replay lookup.
+            models.UniqueConstraint(fields=['key', 'method', 'path'], name='idempotency_key_unique_request'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the IdempotencyKey object.
+        """
+        return f"IdempotencyKey(key={self.key}, method={self.method}, path={self.path}, status_code={self.status_code}, expires_at={self.expires_at})"
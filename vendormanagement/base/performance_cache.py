@@ -0,0 +1,77 @@
+"""
+Cache for the vendor performance payload.
+
+Entries live in the ``vendor_performance`` cache alias (see CACHES in settings):
+local memory by default, or a file/database backend shared by several processes.
+The alias TIMEOUT is a safety-net TTL; entries are normally dropped by
+``invalidate`` as soon as a write changes the vendor's metrics or snapshots.
+"""
+from django.core.cache import caches
+from django.db import transaction
+
+CACHE_ALIAS = 'vendor_performance'
+
+HITS_KEY = 'stats:hits'
+MISSES_KEY = 'stats:misses'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _key(vendor_id):
+    return f'vendor:{vendor_id}'
+
+
+def _count(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First event since the counters were reset.
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get(vendor_id):
+    """
+        Returns the cached (payload, etag) of a vendor, or None on a miss.
+    """
+    entry = _cache().get(_key(vendor_id))
+    _count(MISSES_KEY if entry is None else HITS_KEY)
+    return entry
+
+
+def store(vendor_id, payload, etag=None):
+    _cache().set(_key(vendor_id), (payload, etag))
+
+
+def invalidate(vendor_ids):
+    """
+        Drops the cached payloads of the given vendors, now and again once the
+        surrounding transaction commits, so a reader cannot re-cache data that
+        was about to change.
+    """
+    keys = [_key(vendor_id) for vendor_id in vendor_ids]
+    if not keys:
+        return
+    _cache().delete_many(keys)
+    transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+def stats():
+    """
+        Returns the hit and miss counters.
+    """
+    counters = _cache().get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+def reset_stats():
+    _cache().delete_many([HITS_KEY, MISSES_KEY])
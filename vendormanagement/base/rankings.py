@@ -0,0 +1,135 @@
+"""
+Vendor leaderboards served from the materialized ``VendorRanking`` table.
+
+``update_rankings`` is called wherever the Vendor metric fields are refreshed
+(see base.metrics), so the table never needs a full recomputation. Reads use
+the per-metric indexes: the top N is an ordered index scan that stops after N
+rows, and a vendor's rank is one primary-key lookup plus a count over the index
+range of vendors that beat it.
+
+Ranks are competition ranks: vendors with equal values share a rank and the
+next rank is skipped (1, 2, 2, 4). Within a tie the order follows the index
+(PO count, then vendor id, in the same direction as the metric).
+"""
+from .models import VendorMetricAccumulator, VendorRanking
+
+# Ranked metrics and their default direction (better first).
+METRICS = {
+    'on_time_delivery_rate': 'desc',
+    'quality_rating_avg': 'desc',
+    'average_response_time': 'asc',
+    'fulfillment_rate': 'desc',
+}
+
+DIRECTIONS = ('asc', 'desc')
+
+
+def ranking_values(totals):
+    """
+        Builds a VendorRanking row from a vendor's totals.
+
+        Args:
+            totals: A mapping or object exposing the accumulator totals.
+
+        Returns:
+            dict: total_pos and every metric, None where there is nothing to average.
+    """
+    if isinstance(totals, VendorMetricAccumulator):
+        totals = vars(totals)
+    completed_pos = totals['completed_pos']
+    acknowledged_pos = totals['acknowledged_pos']
+    total_pos = totals['total_pos']
+    return {
+        'total_pos': total_pos,
+        'on_time_delivery_rate': totals['on_time_pos'] / completed_pos if completed_pos else None,
+        'quality_rating_avg': totals['quality_rating_sum'] / completed_pos if completed_pos else None,
+        'average_response_time': (
+            totals['response_seconds_sum'] / acknowledged_pos / 3600 if acknowledged_pos else None
+        ),
+        'fulfillment_rate': completed_pos / total_pos if total_pos else None,
+    }
+
+
+def update_rankings(totals_by_vendor):
+    """
+        Writes the ranking rows of the given vendors.
+
+        Args:
+            totals_by_vendor (dict): vendor id -> totals (mapping or accumulator).
+    """
+    for vendor_id, totals in totals_by_vendor.items():
+        values = ranking_values(totals)
+        if not VendorRanking.objects.filter(vendor_id=vendor_id).update(**values):
+            VendorRanking.objects.create(vendor_id=vendor_id, **values)
+
+
+def store_rankings(totals_by_vendor):
+    """
+        Writes the ranking rows of the given vendors with one bulk update and one bulk insert.
+
+        Args:
+            totals_by_vendor (dict): vendor id -> totals (mapping or accumulator).
+    """
+    existing = set(
+        VendorRanking.objects.filter(vendor_id__in=list(totals_by_vendor)).values_list('vendor_id', flat=True))
+    rankings = [VendorRanking(vendor_id=vendor_id, **ranking_values(totals))
+                for vendor_id, totals in totals_by_vendor.items()]
+    VendorRanking.objects.bulk_update([ranking for ranking in rankings if ranking.vendor_id in existing],
+                                      ['total_pos', *METRICS])
+    VendorRanking.objects.bulk_create([ranking for ranking in rankings if ranking.vendor_id not in existing])
+
+
+def _ranked(metric, min_pos):
+    return VendorRanking.objects.filter(**{f'{metric}__isnull': False}, total_pos__gte=min_pos)
+
+
+def top_vendors(metric, direction=None, min_pos=1, limit=10):
+    """
+        Returns the best ``limit`` vendors on ``metric``.
+
+        Args:
+            metric (str): One of METRICS.
+            direction (str): 'asc' or 'desc'; defaults to the metric's better-first direction.
+            min_pos (int): Only rank vendors with at least this many purchase orders.
+            limit (int): Number of vendors to return.
+
+        Returns:
+            list: Dicts with rank, vendor, name, value and total_pos, best first.
+    """
+    direction = direction or METRICS[metric]
+    sign = '' if direction == 'asc' else '-'
+    rows = _ranked(metric, min_pos).order_by(f'{sign}{metric}', f'{sign}total_pos', f'{sign}vendor_id').values(
+        'vendor_id', 'vendor__name', metric, 'total_pos')[:limit]
+
+    results = []
+    for position, row in enumerate(rows, start=1):
+        tied = results and results[-1]['value'] == row[metric]
+        results.append({
+            'rank': results[-1]['rank'] if tied else position,
+            'vendor': row['vendor_id'],
+            'name': row['vendor__name'],
+            'value': row[metric],
+            'total_pos': row['total_pos'],
+        })
+    return results
+
+
+def vendor_rank(vendor_id, metric, direction=None, min_pos=1):
+    """
+        Returns a vendor's rank on ``metric``.
+
+        Returns:
+            dict: vendor, value, total_pos and rank (None when the vendor is not
+            ranked: no value for the metric or fewer than ``min_pos`` orders), or
+            None when the vendor has no ranking row.
+    """
+    direction = direction or METRICS[metric]
+    row = VendorRanking.objects.filter(vendor_id=vendor_id).values(metric, 'total_pos').first()
+    if row is None:
+        return None
+    value = row[metric]
+    rank = None
+    if value is not None and row['total_pos'] >= min_pos:
+        lookup = f'{metric}__lt' if direction == 'asc' else f'{metric}__gt'
+        rank = _ranked(metric, min_pos).filter(**{lookup: value}).count() + 1
+    return {'vendor': vendor_id, 'value': value, 'total_pos': row['total_pos'], 'rank': rank}
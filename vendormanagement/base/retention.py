@@ -0,0 +1,99 @@
+"""
+Retention policy for raw HistoricalPerformance snapshots.
+
+Snapshots younger than ``raw_days`` are all kept. Older ones are thinned to the
+latest snapshot per vendor and hour until ``hourly_days``, and to the latest per
+vendor and day after that. The hour/day/week rollups are not touched, so history
+charts keep their full resolution.
+"""
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
+
+from .models import Vendor, HistoricalPerformance
+from .rollups import bucket_start
+
+
+def _sqlite_pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+def _expired_ids(vendor_id, raw_cutoff, hourly_cutoff):
+    """
+        Yields the ids of a vendor's snapshots that the policy drops, newest first.
+    """
+    kept_buckets = set()
+    snapshots = HistoricalPerformance.objects.filter(vendor_id=vendor_id, date__lt=raw_cutoff)
+    for snapshot_id, date in list(snapshots.order_by('-date', '-id').values_list('id', 'date')):
+        key = bucket_start(date, 'hour' if date >= hourly_cutoff else 'day')
+        if key in kept_buckets:
+            yield snapshot_id
+        else:
+            kept_buckets.add(key)
+
+
+def compact_historical_performance(raw_days=7, hourly_days=90, chunk_size=500, dry_run=False, now=None):
+    """
+        Deletes the snapshots the retention policy no longer keeps.
+
+        Each chunk of at most ``chunk_size`` rows is deleted in its own short
+        transaction, so the database write lock is never held for long.
+
+        Args:
+            raw_days (int): Keep every snapshot for this many days.
+            hourly_days (int): Keep one snapshot per hour up to this many days.
+            chunk_size (int): Rows deleted per transaction.
+            dry_run (bool): Only count the rows that would be deleted.
+            now (datetime): Reference time, defaults to the current time.
+
+        Returns:
+            dict: rows_removed and, on SQLite, bytes_reclaimed (pages moved to
+            the free list).
+    """
+    if hourly_days < raw_days:
+        raise ValueError('hourly_days must not be smaller than raw_days.')
+    now = now or datetime.now()
+    raw_cutoff = now - timedelta(days=raw_days)
+    hourly_cutoff = now - timedelta(days=hourly_days)
+    sqlite = connection.vendor == 'sqlite'
+    freelist_before = _sqlite_pragma('freelist_count') if sqlite else None
+
+    removed = 0
+    for vendor_id in list(Vendor.objects.values_list('pk', flat=True)):
+        chunk = []
+        for snapshot_id in _expired_ids(vendor_id, raw_cutoff, hourly_cutoff):
+            chunk.append(snapshot_id)
+            if len(chunk) >= chunk_size:
+                removed += _delete_chunk(chunk, dry_run)
+                chunk = []
+        if chunk:
+            removed += _delete_chunk(chunk, dry_run)
+
+    result = {'rows_removed': removed}
+    if sqlite:
+        result['bytes_reclaimed'] = (_sqlite_pragma('freelist_count') - freelist_before) * _sqlite_pragma('page_size')
+    return result
+
+
+def _delete_chunk(snapshot_ids, dry_run):
+    if dry_run:
+        return len(snapshot_ids)
+    with transaction.atomic():
+        deleted, _ = HistoricalPerformance.objects.filter(pk__in=snapshot_ids).delete()
+    return deleted
+
+
+def vacuum():
+    """
+        Rebuilds the SQLite file to return free pages to the filesystem.
+
+        Returns:
+            int: The number of bytes the database file shrank by.
+    """
+    page_size = _sqlite_pragma('page_size')
+    pages_before = _sqlite_pragma('page_count')
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+    return (pages_before - _sqlite_pragma('page_count')) * page_size
@@ -0,0 +1,137 @@
+"""
+Incrementally maintained time-bucket rollups of HistoricalPerformance.
+
+Every recorded snapshot is folded into one HistoricalPerformanceRollup row per
+bucket size (hour, day, week) with a single UPDATE, or an INSERT for the first
+snapshot of a bucket. Rollups are kept when raw snapshots are later compacted.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Greatest, Least
+
+from .models import HistoricalPerformance, HistoricalPerformanceRollup
+
+METRICS = (
+    'on_time_delivery_rate',
+    'quality_rating_avg',
+    'average_response_time',
+    'fulfillment_rate',
+)
+
+BUCKETS = tuple(name for name, _ in HistoricalPerformanceRollup.BUCKETS)
+
+
+def bucket_start(date, bucket):
+    """
+        Returns the start of the ``bucket`` ('hour', 'day' or 'week', weeks start on Monday) containing ``date``.
+    """
+    if bucket == 'hour':
+        return date.replace(minute=0, second=0, microsecond=0)
+    day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'day':
+        return day
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f'Unknown bucket: {bucket}')
+
+
+def _fold(snapshot, bucket):
+    values = {name: getattr(snapshot, name) for name in METRICS}
+    rollups = HistoricalPerformanceRollup.objects.filter(
+        vendor_id=snapshot.vendor_id, bucket=bucket, bucket_start=bucket_start(snapshot.date, bucket),
+    )
+    changes = {'count': F('count') + 1, 'last_date': Greatest(F('last_date'), Value(snapshot.date))}
+    for name, value in values.items():
+        value = Value(value, output_field=FloatField())
+        changes[f'{name}_min'] = Least(F(f'{name}_min'), value)
+        changes[f'{name}_max'] = Greatest(F(f'{name}_max'), value)
+        changes[f'{name}_sum'] = F(f'{name}_sum') + value
+        changes[f'{name}_last'] = Case(When(last_date__lte=snapshot.date, then=value), default=F(f'{name}_last'))
+    if rollups.update(**changes):
+        return
+
+    fields = {'count': 1, 'last_date': snapshot.date}
+    for name, value in values.items():
+        fields.update({f'{name}_min': value, f'{name}_max': value, f'{name}_sum': value, f'{name}_last': value})
+    try:
+        with transaction.atomic():
+            HistoricalPerformanceRollup.objects.create(
+                vendor_id=snapshot.vendor_id, bucket=bucket, bucket_start=bucket_start(snapshot.date, bucket),
+                **fields
+            )
+    except IntegrityError:
+        # Another writer created the bucket in between.
+        rollups.update(**changes)
+
+
+def add_to_rollups(snapshots):
+    """
+        Folds newly recorded HistoricalPerformance snapshots into every bucket size.
+    """
+    with transaction.atomic():
+        for snapshot in snapshots:
+            for bucket in BUCKETS:
+                _fold(snapshot, bucket)
+
+
+def rebuild_rollups(vendor_ids=None):
+    """
+        Recreates the rollups from the raw snapshots that still exist.
+
+        Args:
+            vendor_ids: Optional iterable of vendor ids; all vendors when omitted.
+
+        Returns:
+            int: The number of snapshots folded.
+    """
+    rollups = HistoricalPerformanceRollup.objects.all()
+    snapshots = HistoricalPerformance.objects.order_by('date')
+    if vendor_ids is not None:
+        vendor_ids = list(vendor_ids)
+        rollups = rollups.filter(vendor_id__in=vendor_ids)
+        snapshots = snapshots.filter(vendor_id__in=vendor_ids)
+
+    folded = 0
+    with transaction.atomic():
+        rollups.delete()
+        for snapshot in snapshots.iterator():
+            for bucket in BUCKETS:
+                _fold(snapshot, bucket)
+            folded += 1
+    return folded
+
+
+def rollup_history(vendor_id, bucket, date_from=None, date_to=None):
+    """
+        Returns a vendor's rollups of one bucket size between two dates, oldest first.
+
+        Args:
+            vendor_id: The unique identifier of the vendor.
+            bucket: 'hour', 'day' or 'week'.
+            date_from: Optional; the bucket containing it is included.
+            date_to: Optional inclusive upper bound on the bucket start.
+
+        Returns:
+            list: One dict per bucket with its start, snapshot count and the
+            min/max/avg/last of every metric.
+    """
+    rollups = HistoricalPerformanceRollup.objects.filter(vendor_id=vendor_id, bucket=bucket)
+    if date_from is not None:
+        rollups = rollups.filter(bucket_start__gte=bucket_start(date_from, bucket))
+    if date_to is not None:
+        rollups = rollups.filter(bucket_start__lte=date_to)
+
+    history = []
+    for rollup in rollups.order_by('bucket_start'):
+        entry = {'start': rollup.bucket_start, 'count': rollup.count}
+        for name in METRICS:
+            entry[name] = {
+                'min': getattr(rollup, f'{name}_min'),
+                'max': getattr(rollup, f'{name}_max'),
+                'avg': getattr(rollup, f'{name}_sum') / rollup.count,
+                'last': getattr(rollup, f'{name}_last'),
+            }
+        history.append(entry)
+    return history
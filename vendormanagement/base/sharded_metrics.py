@@ -0,0 +1,101 @@
+"""
+Multi-process metric recompute for large vendor fleets.
+
+Vendors are split into contiguous id ranges (shards). A pool of worker
+processes, each with its own database connection, computes one shard at a time.
+Each shard uses the ``compute_totals`` GROUP BY query that also backs the
+per-vendor ``update_*`` calculations. There are several shards per worker, so a
+worker that gets a cheap shard picks up the next one instead of idling.
+
+The parent process merges the shards and is the only writer. Once every shard
+is in, ``store_vendor_totals`` writes the totals in batched transactions. SQLite
+allows a single writer, so no write ever waits on a worker holding a read lock,
+and workers never contend with each other for the write lock.
+"""
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+
+# Spawned workers import this module to find their entry points before Django is
+# set up, so models are only imported inside the functions.
+
+SHARDS_PER_WORKER = 4
+
+
+def shard_bounds(vendor_ids, shards):
+    """
+        Splits vendor ids into contiguous shards with the same number of vendors.
+
+        Args:
+            vendor_ids: Iterable of vendor ids.
+            shards (int): The maximum number of shards.
+
+        Returns:
+            list: (first, last) inclusive vendor id bounds, in id order.
+    """
+    vendor_ids = sorted(vendor_ids)
+    if not vendor_ids:
+        return []
+    size = math.ceil(len(vendor_ids) / shards)
+    return [(vendor_ids[start], vendor_ids[min(start + size, len(vendor_ids)) - 1])
+            for start in range(0, len(vendor_ids), size)]
+
+
+def compute_shard(bounds):
+    """
+        Computes the totals of the vendors in one shard; runs in a worker process.
+    """
+    from .metrics import compute_totals
+
+    # The worker keeps its connection for the next shard; it closes when the pool shuts down.
+    return compute_totals(vendor_id_range=bounds)
+
+
+def _init_worker(databases):
+    # Spawned workers import the settings module afresh; point them at the parent's
+    # databases (which differ from the settings module under a test runner).
+    import django
+    from django.conf import settings
+
+    settings.DATABASES = databases
+    django.setup()
+
+
+def compute_totals_sharded(workers, shards=None):
+    """
+        Recomputes every vendor's totals with a pool of worker processes.
+
+        Args:
+            workers (int): Worker processes; 1 computes the shards in this process.
+            shards (int): Number of shards; defaults to SHARDS_PER_WORKER per worker.
+
+        Returns:
+            dict: vendor id -> totals for every vendor, zeros for vendors without orders.
+
+        Raises:
+            ValueError: ``workers`` is above 1 and the database is an in-memory SQLite
+            database, which other processes cannot open.
+    """
+    from .metrics import EMPTY_TOTALS, compute_totals
+    from .models import Vendor
+
+    vendor_ids = list(Vendor.objects.values_list('pk', flat=True))
+    bounds = shard_bounds(vendor_ids, shards or workers * SHARDS_PER_WORKER)
+
+    if workers == 1:
+        results = [compute_totals(vendor_id_range=shard) for shard in bounds]
+    else:
+        connection = connections['default']
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise ValueError('An in-memory SQLite database cannot be shared with worker processes.')
+        databases = {alias: connections[alias].settings_dict for alias in connections}
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(databases,)) as pool:
+            results = list(pool.map(compute_shard, bounds))
+
+    totals = dict.fromkeys(vendor_ids, EMPTY_TOTALS)
+    for shard_totals in results:
+        totals.update(shard_totals)
+    return totals
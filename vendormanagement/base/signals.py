@@ -0,0 +1,127 @@
+"""
+Keeps vendor metric accumulators in step with purchase order writes.
+
+In async mode (see base.metrics_queue) writes only mark the vendor dirty instead.
+"""
+import threading
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from . import performance_cache
+from .daily_metrics import (DAILY_CONTRIBUTION_FIELDS, daily_contribution, daily_contribution_of, negate_daily,
+                            subtract_daily)
+from .metrics import EMPTY_TOTALS, apply_delta, contribution, contribution_of
+from .metrics_queue import mark_vendor_dirty, metrics_async
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, VendorMetricAccumulator
+from .rollups import add_to_rollups
+
+# Vendors currently being deleted; their POs go with them, so there is nothing to update.
+_deleting = threading.local()
+
+
+def _vendors_being_deleted():
+    if not hasattr(_deleting, 'vendor_ids'):
+        _deleting.vendor_ids = set()
+    return _deleting.vendor_ids
+
+
+@receiver(post_save, sender=Vendor)
+def create_vendor_accumulator(sender, instance, created, raw=False, **kwargs):
+    """
+        Starts every new vendor with empty totals so its first PO write takes the fast path.
+    """
+    if created and not raw:
+        VendorMetricAccumulator.objects.get_or_create(vendor=instance)
+
+
+@receiver(pre_save, sender=PurchaseOrder)
+def capture_previous_contribution(sender, instance, raw=False, **kwargs):
+    """
+        Remembers what the stored version of the order contributed before it is overwritten.
+    """
+    instance._previous_contribution = None
+    if raw or instance.pk is None:
+        return
+    if metrics_async():
+        # Only the previous vendor is needed, in case the order moves to another one.
+        previous_vendor_id = PurchaseOrder.objects.filter(pk=instance.pk).values_list('vendor_id', flat=True).first()
+        instance._previous_contribution = (previous_vendor_id, None, None)
+        return
+    previous = PurchaseOrder.objects.filter(pk=instance.pk).values(*DAILY_CONTRIBUTION_FIELDS).first()
+    if previous is not None:
+        instance._previous_contribution = (previous['vendor_id'], contribution(previous),
+                                           daily_contribution(previous))
+
+
+@receiver(post_save, sender=PurchaseOrder)
+def apply_purchase_order_save(sender, instance, raw=False, **kwargs):
+    """
+        Applies the difference between the old and new contribution of a saved order.
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_previous_contribution', None)
+    if metrics_async():
+        mark_vendor_dirty(instance.vendor_id)
+        if previous is not None and previous[0] not in (None, instance.vendor_id):
+            mark_vendor_dirty(previous[0])
+        return
+
+    new = contribution_of(instance)
+    new_daily = daily_contribution_of(instance)
+
+    if previous is None:
+        apply_delta(instance.vendor_id, new, new_daily)
+        return
+
+    previous_vendor_id, old, old_daily = previous
+    if previous_vendor_id == instance.vendor_id:
+        apply_delta(instance.vendor_id, {name: new[name] - old[name] for name in EMPTY_TOTALS},
+                    subtract_daily(new_daily, old_daily))
+    else:
+        apply_delta(previous_vendor_id, {name: -value for name, value in old.items()}, negate_daily(old_daily))
+        apply_delta(instance.vendor_id, new, new_daily)
+
+
+@receiver(pre_delete, sender=Vendor)
+def mark_vendor_deleting(sender, instance, **kwargs):
+    _vendors_being_deleted().add(instance.pk)
+
+
+@receiver(post_delete, sender=Vendor)
+def unmark_vendor_deleting(sender, instance, **kwargs):
+    _vendors_being_deleted().discard(instance.pk)
+    performance_cache.invalidate([instance.pk])
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+def apply_purchase_order_delete(sender, instance, **kwargs):
+    """
+        Removes a deleted order's contribution from its vendor.
+    """
+    if instance.vendor_id in _vendors_being_deleted():
+        return
+    if metrics_async():
+        mark_vendor_dirty(instance.vendor_id)
+        return
+    apply_delta(instance.vendor_id, {name: -value for name, value in contribution_of(instance).items()},
+                negate_daily(daily_contribution_of(instance)))
+
+
+@receiver(post_save, sender=HistoricalPerformance)
+@receiver(post_delete, sender=HistoricalPerformance)
+def invalidate_vendor_performance(sender, instance, **kwargs):
+    """
+        Drops the cached performance payload whenever a vendor's snapshots change.
+    """
+    performance_cache.invalidate([instance.vendor_id])
+
+
+@receiver(post_save, sender=HistoricalPerformance)
+def add_snapshot_to_rollups(sender, instance, created, raw=False, **kwargs):
+    """
+        Folds a newly recorded snapshot into the hour/day/week rollups.
+    """
+    if created and not raw:
+        add_to_rollups([instance])
@@ -1,3 +1,852 @@
-from django.test import TestCase
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from base.metrics import (
+    EMPTY_TOTALS,
+    TOTAL_FIELDS,
+    _total_aggregates,
+    compute_metrics_for_vendors,
+    compute_totals,
+    compute_vendor_metrics,
+    contribution_of,
+    derive_metrics,
+    rebuild_vendor_metrics,
+    store_vendor_totals,
+)
+from base import importing, vectorized_metrics
+from base.daily_metrics import metrics_as_of, rebuild_daily_metrics
+from base.metrics_queue import mark_vendor_dirty, process_batch, queue_status, request_historical_performance
+from base.models import (
+    Vendor,
+    PurchaseOrder,
+    HistoricalPerformance,
+    HistoricalPerformanceRollup,
+    IdempotencyKey,
+    ImportCheckpoint,
+    VendorDailyMetrics,
+    VendorMetricAccumulator,
+    VendorMetricsQueue,
+    VendorRanking,
+)
+from base.rankings import top_vendors, vendor_rank
+from base.retention import compact_historical_performance
+from base.sharded_metrics import compute_totals_sharded, shard_bounds
+from base.rollups import bucket_start, rebuild_rollups, rollup_history
+
+
+def create_purchase_order(vendor, **kwargs):
+    now = datetime.now()
+    fields = {
+        'po_number': 'PO',
+        'order_date': now - timedelta(days=3),
+        'delivery_date': now + timedelta(days=1),
+        'items': {'test_item': 1},
+        'quantity': 1,
+        'status': 'pending',
+        'issue_date': now - timedelta(days=2),
+    }
+    fields.update(kwargs)
+    return PurchaseOrder.objects.create(vendor=vendor, **fields)
+
+
+class VendorMetricAccumulatorTest(TestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+
+    def assertAccumulatorConsistent(self, vendor):
+        """
+        Asserts the stored totals and Vendor fields match a full recomputation.
+        """
+        accumulator = VendorMetricAccumulator.objects.get(vendor=vendor)
+        expected = compute_totals([vendor.pk]).get(vendor.pk, EMPTY_TOTALS)
+        for name, value in expected.items():
+            self.assertAlmostEqual(getattr(accumulator, name), value, msg=name)
+        vendor.refresh_from_db()
+        for name, value in derive_metrics(expected).items():
+            self.assertAlmostEqual(getattr(vendor, name), value, msg=name)
+
+    def test_vendor_starts_with_empty_accumulator(self):
+        accumulator = VendorMetricAccumulator.objects.get(vendor=self.vendor)
+        self.assertEqual(accumulator.total_pos, 0)
+
+    def test_create_update_and_delete_keep_totals_consistent(self):
+        """
+        Tests the accumulator follows creates, status changes, acknowledgements and deletes.
+        """
+        create_purchase_order(self.vendor, status='completed', quality_rating=4.0)
+        late = create_purchase_order(self.vendor, status='completed', quality_rating=2.0,
+                                     delivery_date=datetime.now() - timedelta(days=1))
+        pending = create_purchase_order(self.vendor)
+        self.assertAccumulatorConsistent(self.vendor)
+        self.assertEqual(self.vendor.on_time_delivery_rate, 0.5)
+        self.assertEqual(self.vendor.quality_rating_avg, 3.0)
+        self.assertAlmostEqual(self.vendor.fulfillment_rate, 2 / 3)
+
+        pending.acknowledgement_date = pending.issue_date + timedelta(hours=6)
+        pending.save()
+        self.assertAccumulatorConsistent(self.vendor)
+        self.assertAlmostEqual(self.vendor.average_response_time, 6.0)
+
+        pending.status = 'completed'
+        pending.quality_rating = 3.0
+        pending.save()
+        self.assertAccumulatorConsistent(self.vendor)
+        self.assertEqual(self.vendor.fulfillment_rate, 1.0)
+
+        late.delete()
+        self.assertAccumulatorConsistent(self.vendor)
+        self.assertEqual(self.vendor.on_time_delivery_rate, 1.0)
+
+    def test_moving_order_to_another_vendor(self):
+        other = Vendor.objects.create(name="Other Vendor")
+        purchase_order = create_purchase_order(self.vendor, status='completed', quality_rating=5.0)
+
+        purchase_order.vendor = other
+        purchase_order.save()
+
+        self.assertAccumulatorConsistent(self.vendor)
+        self.assertAccumulatorConsistent(other)
+        self.assertEqual(VendorMetricAccumulator.objects.get(vendor=self.vendor).total_pos, 0)
+
+    def test_vendor_without_accumulator_is_rebuilt(self):
+        create_purchase_order(self.vendor, status='completed', quality_rating=4.0)
+        VendorMetricAccumulator.objects.filter(vendor=self.vendor).delete()
+
+        create_purchase_order(self.vendor)
+
+        self.assertAccumulatorConsistent(self.vendor)
+        self.assertEqual(VendorMetricAccumulator.objects.get(vendor=self.vendor).total_pos, 2)
+
+    def test_write_cost_does_not_grow_with_history(self):
+        """
+        Tests a PO update runs the same number of queries whatever the vendor's history.
+        """
+        purchase_order = create_purchase_order(self.vendor, status='completed', quality_rating=4.0)
+        with CaptureQueriesContext(connection) as context:
+            purchase_order.quality_rating = 4.5
+            purchase_order.save()
+
+        for _ in range(20):
+            create_purchase_order(self.vendor, status='completed', quality_rating=3.0)
+        with self.assertNumQueries(len(context.captured_queries)):
+            purchase_order.quality_rating = 5.0
+            purchase_order.save()
+
+    def test_deleting_vendor_skips_accumulator_updates(self):
+        for _ in range(3):
+            create_purchase_order(self.vendor)
+        self.vendor.delete()
+        self.assertFalse(VendorMetricAccumulator.objects.exists())
+
+
+class SinglePassMetricsTest(TestCase):
+
+    def setUp(self):
+        self.vendors = [Vendor.objects.create(name=f"Vendor {i}") for i in range(3)]
+        now = datetime.now()
+        for i, vendor in enumerate(self.vendors):
+            create_purchase_order(vendor, status='completed', quality_rating=4.0,
+                                  acknowledgement_date=now - timedelta(days=1, hours=i))
+            create_purchase_order(vendor, status='completed', quality_rating=None,
+                                  delivery_date=now - timedelta(days=1))
+            create_purchase_order(vendor)
+
+    def folded_metrics(self, vendor):
+        """
+        Computes the metrics by summing each order's contribution in Python.
+        """
+        totals = dict(EMPTY_TOTALS)
+        for purchase_order in PurchaseOrder.objects.filter(vendor=vendor):
+            for name, value in contribution_of(purchase_order).items():
+                totals[name] += value
+        return derive_metrics(totals)
+
+    def test_vendor_refresh_is_one_query(self):
+        vendor = self.vendors[0]
+        with self.assertNumQueries(1):
+            metrics = compute_vendor_metrics(vendor.pk)
+
+        expected = self.folded_metrics(vendor)
+        for name, value in expected.items():
+            self.assertAlmostEqual(metrics[name], value, msg=name)
+        self.assertAlmostEqual(metrics['average_response_time'], 24.0)
+
+    def test_many_vendors_refresh_is_one_query(self):
+        empty = Vendor.objects.create(name="No Orders")
+        vendor_ids = [vendor.pk for vendor in self.vendors] + [empty.pk]
+
+        with self.assertNumQueries(1):
+            metrics = compute_metrics_for_vendors(vendor_ids)
+
+        for vendor in self.vendors:
+            for name, value in self.folded_metrics(vendor).items():
+                self.assertAlmostEqual(metrics[vendor.pk][name], value, msg=name)
+        self.assertEqual(metrics[empty.pk]['fulfillment_rate'], 0.0)
+
+    def test_order_completed_before_completed_date_existed(self):
+        """
+        Tests a completed order without a completed_date counts as completed on its delivery date.
+        """
+        vendor = self.vendors[0]
+        purchase_order = create_purchase_order(vendor, status='completed', quality_rating=4.0,
+                                               delivery_date=datetime.now() - timedelta(days=2))
+        PurchaseOrder.objects.filter(pk=purchase_order.pk).update(completed_date=None)
+        purchase_order.refresh_from_db()
+
+        self.assertEqual(contribution_of(purchase_order)['on_time_pos'], 1)
+        self.assertEqual(compute_totals([vendor.pk])[vendor.pk]['on_time_pos'], 2)
+        self.assertEqual(compute_vendor_metrics(vendor.pk), self.folded_metrics(vendor))
+
+    def test_totals_match_accumulators(self):
+        totals = compute_totals()
+        for accumulator in VendorMetricAccumulator.objects.all():
+            for name, value in totals[accumulator.vendor_id].items():
+                self.assertAlmostEqual(getattr(accumulator, name), value, msg=name)
+
+
+class RebuildVendorMetricsCommandTest(TestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+        create_purchase_order(self.vendor, status='completed', quality_rating=4.0)
+
+    def test_check_passes_when_consistent(self):
+        out = StringIO()
+        call_command('rebuild_vendor_metrics', '--check', stdout=out)
+        self.assertIn('consistent', out.getvalue())
+
+    def test_check_fails_and_rebuild_repairs(self):
+        VendorMetricAccumulator.objects.filter(vendor=self.vendor).update(total_pos=10)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_vendor_metrics', '--check', stdout=StringIO())
+
+        call_command('rebuild_vendor_metrics', stdout=StringIO())
+        self.assertEqual(VendorMetricAccumulator.objects.get(vendor=self.vendor).total_pos, 1)
+        call_command('rebuild_vendor_metrics', '--check', stdout=StringIO())
+
+
+class VendorDailyMetricsTest(TestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+        self.other = Vendor.objects.create(name="Other Vendor")
+
+    def daily_rows(self):
+        return list(VendorDailyMetrics.objects.order_by('vendor_id', 'day').values_list(
+            'vendor_id', 'day', 'total_pos', 'completed_pos', 'on_time_pos', 'quality_rating_sum',
+            'acknowledged_pos', 'response_seconds_sum'))
+
+    def assertDailyConsistent(self):
+        """
+        Asserts the incrementally maintained rows hold the same totals as a rebuild.
+
+        Days the incremental path created but no longer has events on keep repeating
+        the previous totals (zeros before the first); they are dropped before comparing.
+        """
+        incremental = self.daily_rows()
+        rebuild_daily_metrics()
+        rebuilt = self.daily_rows()
+        zeros = tuple(EMPTY_TOTALS.values())
+        deduplicated = []
+        for index, row in enumerate(incremental):
+            first = index == 0 or row[0] != incremental[index - 1][0]
+            if row[2:] != (zeros if first else incremental[index - 1][2:]):
+                deduplicated.append(row)
+        self.assertEqual([row[2:] for row in deduplicated], [row[2:] for row in rebuilt])
+        for rebuilt_row in rebuilt:
+            as_of = metrics_as_of(rebuilt_row[0], rebuilt_row[1])
+            self.assertEqual(as_of, derive_metrics(dict(zip(TOTAL_FIELDS, rebuilt_row[2:]))))
+
+    def test_writes_keep_prefix_sums_consistent(self):
+        first = create_purchase_order(self.vendor, order_date=datetime(2024, 5, 1), issue_date=datetime(2024, 5, 1),
+                                      delivery_date=datetime(2024, 5, 10))
+        second = create_purchase_order(self.vendor, order_date=datetime(2024, 5, 3), issue_date=datetime(2024, 5, 3),
+                                       delivery_date=datetime(2024, 5, 4))
+        create_purchase_order(self.other, order_date=datetime(2024, 5, 2), issue_date=datetime(2024, 5, 2),
+                              delivery_date=datetime(2024, 5, 4))
+
+        first.acknowledgement_date = datetime(2024, 5, 2, 6)
+        first.status = 'completed'
+        first.completed_date = datetime(2024, 5, 8)
+        first.quality_rating = 4.0
+        first.save()
+        self.assertDailyConsistent()
+
+        # A backdated correction shifts every later day.
+        first.order_date = datetime(2024, 4, 28)
+        first.completed_date = datetime(2024, 5, 12)
+        first.save()
+        self.assertDailyConsistent()
+
+        second.vendor = self.other
+        second.save()
+        self.assertDailyConsistent()
+
+        first.delete()
+        self.assertDailyConsistent()
+
+    def test_metrics_as_of(self):
+        create_purchase_order(self.vendor, order_date=datetime(2024, 5, 1), issue_date=datetime(2024, 5, 1),
+                              delivery_date=datetime(2024, 5, 4), status='completed',
+                              completed_date=datetime(2024, 5, 3), quality_rating=5.0)
+
+        self.assertEqual(metrics_as_of(self.vendor.pk, date(2024, 5, 2))['fulfillment_rate'], 0.0)
+        self.assertEqual(metrics_as_of(self.vendor.pk, date(2024, 5, 3))['quality_rating_avg'], 5.0)
+        self.assertEqual(metrics_as_of(self.vendor.pk, date(2024, 4, 30)), derive_metrics(EMPTY_TOTALS))
+        self.assertIsNone(metrics_as_of(self.other.pk + 1, date(2024, 5, 3)))
+
+    def test_rebuild_vendor_metrics_rebuilds_daily_rows(self):
+        create_purchase_order(self.vendor, order_date=datetime(2024, 5, 1))
+        VendorDailyMetrics.objects.all().delete()
+
+        rebuild_vendor_metrics([self.vendor.pk])
+
+        self.assertEqual(self.daily_rows(), [(self.vendor.pk, date(2024, 5, 1), 1, 0, 0, 0.0, 0, 0.0)])
+
+
+class RecomputeMetricsCommandTest(TestCase):
+
+    def setUp(self):
+        now = datetime(2024, 5, 20, 12, 0, 0, 250000)
+        self.vendors = [Vendor.objects.create(name=f"Vendor {i}") for i in range(3)]
+        # The third vendor has no purchase orders.
+        for i in range(12):
+            create_purchase_order(
+                self.vendors[i % 2], po_number=f'PO-{i}',
+                status=['completed', 'pending', 'canceled'][i % 3],
+                delivery_date=now + timedelta(days=(-1) ** i),
+                completed_date=now if i % 3 == 0 else None,
+                quality_rating=[4.5, None, 3.25, 1.0][i % 4],
+                issue_date=now - timedelta(days=2, microseconds=i),
+                acknowledgement_date=now - timedelta(hours=i) if i % 5 else None,
+            )
+        # Completed late, but before completed_date was recorded.
+        PurchaseOrder.objects.filter(po_number='PO-3').update(completed_date=None)
+        rebuild_vendor_metrics()
+        self.expected = self.snapshot()
+        # Leave stale values behind for the recompute to fix.
+        Vendor.objects.update(on_time_delivery_rate=None, quality_rating_avg=None,
+                              average_response_time=None, fulfillment_rate=None)
+        VendorMetricAccumulator.objects.filter(vendor=self.vendors[0]).delete()
+        VendorRanking.objects.update(total_pos=0)
+        VendorDailyMetrics.objects.filter(vendor=self.vendors[1]).delete()
+
+    def snapshot(self):
+        return (
+            list(Vendor.objects.order_by('pk').values('pk', 'on_time_delivery_rate', 'quality_rating_avg',
+                                                      'average_response_time', 'fulfillment_rate')),
+            list(VendorMetricAccumulator.objects.order_by('pk').values()),
+            list(VendorRanking.objects.order_by('pk').values()),
+            list(VendorDailyMetrics.objects.order_by('vendor_id', 'day').values(
+                'vendor_id', 'day', *TOTAL_FIELDS)),
+        )
+
+    def test_store_vendor_totals_matches_rebuild(self):
+        totals = compute_totals()
+        for vendor in self.vendors:
+            totals.setdefault(vendor.pk, EMPTY_TOTALS)
+
+        store_vendor_totals(totals, batch_size=2)
+
+        self.assertEqual(self.snapshot(), self.expected)
+
+    @skipUnless(vectorized_metrics.available(), 'NumPy is not installed.')
+    def test_vectorized_totals_match_orm(self):
+        totals = vectorized_metrics.compute_totals_vectorized(chunk_size=5)
+
+        orm_totals = compute_totals()
+        for vendor in self.vendors:
+            self.assertEqual(totals[vendor.pk], orm_totals.get(vendor.pk, EMPTY_TOTALS))
+
+    @skipUnless(vectorized_metrics.available(), 'NumPy is not installed.')
+    def test_command_matches_orm(self):
+        out = StringIO()
+        call_command('recompute_metrics', '--chunk-size', '5', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(self.snapshot(), self.expected)
+        self.assertIn('Recomputed metrics for 3 vendor(s) from 12 purchase orders', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+
+    def test_requires_numpy(self):
+        with mock.patch.object(vectorized_metrics, 'np', None):
+            with self.assertRaisesMessage(CommandError, 'needs NumPy'):
+                call_command('recompute_metrics', stdout=StringIO())
+
+    def test_shard_bounds(self):
+        self.assertEqual(shard_bounds([7, 1, 3, 9, 4], 2), [(1, 4), (7, 9)])
+        self.assertEqual(shard_bounds([1, 2], 4), [(1, 1), (2, 2)])
+        self.assertEqual(shard_bounds([], 4), [])
+
+    def test_sharded_totals_match_orm(self):
+        totals = compute_totals_sharded(workers=1, shards=2)
+
+        orm_totals = compute_totals()
+        self.assertEqual(totals, {vendor.pk: orm_totals.get(vendor.pk, EMPTY_TOTALS) for vendor in self.vendors})
+
+    def test_sharded_command_matches_orm(self):
+        out = StringIO()
+        call_command('rebuild_vendor_metrics', '--workers', '1', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(self.snapshot(), self.expected)
+        self.assertIn('Rebuilt metrics for 3 vendor(s) with 1 worker(s)', out.getvalue())
+
+    @skipUnless(connection.vendor == 'sqlite', 'The test database is an in-memory SQLite database.')
+    def test_workers_need_a_shared_database(self):
+        with self.assertRaisesMessage(CommandError, 'in-memory SQLite database'):
+            call_command('rebuild_vendor_metrics', '--workers', '2', stdout=StringIO())
+
+    def test_workers_rebuild_every_vendor(self):
+        with self.assertRaises(CommandError):
+            call_command('rebuild_vendor_metrics', '--workers', '2', '--vendor', str(self.vendors[0].pk),
+                         stdout=StringIO())
+
+
+@override_settings(VENDOR_METRICS_ASYNC=True)
+class MetricsQueueTest(TestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+
+    def test_writes_coalesce_into_one_entry(self):
+        """
+        Tests many writes only queue the vendor once and leave its metrics untouched.
+        """
+        for _ in range(3):
+            purchase_order = create_purchase_order(self.vendor, status='completed', quality_rating=4.0)
+        purchase_order.delete()
+
+        entry = VendorMetricsQueue.objects.get()
+        self.assertEqual(entry.vendor_id, self.vendor.pk)
+        self.assertEqual(entry.version, 4)
+        self.assertEqual(VendorMetricAccumulator.objects.get(vendor=self.vendor).total_pos, 0)
+        self.assertEqual(queue_status()['pending'], 1)
+
+    def test_process_batch_recomputes_and_snapshots(self):
+        create_purchase_order(self.vendor, status='completed', quality_rating=4.0,
+                              acknowledgement_date=datetime.now())
+        request_historical_performance(self.vendor.pk)
+        self.assertFalse(HistoricalPerformance.objects.exists())
+
+        self.assertEqual(process_batch(10), 1)
+
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.quality_rating_avg, 4.0)
+        self.assertEqual(self.vendor.fulfillment_rate, 1.0)
+        self.assertEqual(HistoricalPerformance.objects.filter(vendor=self.vendor).count(), 1)
+        self.assertFalse(VendorMetricsQueue.objects.exists())
+        self.assertEqual(process_batch(10), 0)
+
+    def test_entry_marked_again_during_processing_stays_queued(self):
+        mark_vendor_dirty(self.vendor.pk)
+
+        with mock.patch('base.metrics_queue.rebuild_vendor_metrics',
+                        side_effect=lambda vendor_ids: mark_vendor_dirty(self.vendor.pk)):
+            process_batch(10)
+
+        self.assertTrue(VendorMetricsQueue.objects.filter(vendor=self.vendor).exists())
+
+    def test_moving_order_marks_both_vendors(self):
+        purchase_order = create_purchase_order(self.vendor)
+        VendorMetricsQueue.objects.all().delete()
+        other = Vendor.objects.create(name="Other Vendor")
+
+        purchase_order.vendor = other
+        purchase_order.save()
+
+        self.assertEqual(set(VendorMetricsQueue.objects.values_list('vendor_id', flat=True)),
+                         {self.vendor.pk, other.pk})
+
+    def test_command_drains_queue(self):
+        create_purchase_order(self.vendor, status='completed')
+        out = StringIO()
+        call_command('process_metrics_queue', '--once', '--batch-size', '5', stdout=out)
+        self.assertIn('Recomputed metrics for 1 vendor(s).', out.getvalue())
+        self.assertFalse(VendorMetricsQueue.objects.exists())
+
+
+class HistoricalPerformanceRollupTest(TestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+
+    def snapshot(self, date, value):
+        return HistoricalPerformance.objects.create(vendor=self.vendor, date=date, on_time_delivery_rate=value,
+                                                    quality_rating_avg=value, average_response_time=value,
+                                                    fulfillment_rate=value)
+
+    def test_bucket_start(self):
+        date = datetime(2024, 5, 8, 13, 45, 12)  # a Wednesday
+        self.assertEqual(bucket_start(date, 'hour'), datetime(2024, 5, 8, 13))
+        self.assertEqual(bucket_start(date, 'day'), datetime(2024, 5, 8))
+        self.assertEqual(bucket_start(date, 'week'), datetime(2024, 5, 6))
+
+    def test_snapshots_fold_into_buckets(self):
+        """
+        Tests min/max/avg/last per bucket, including a snapshot recorded out of order.
+        """
+        self.snapshot(datetime(2024, 5, 8, 10, 0), 0.5)
+        self.snapshot(datetime(2024, 5, 8, 10, 30), 0.9)
+        self.snapshot(datetime(2024, 5, 8, 10, 15), 0.1)
+        self.snapshot(datetime(2024, 5, 9, 9, 0), 0.7)
+
+        hours = rollup_history(self.vendor.pk, 'hour')
+        self.assertEqual([entry['start'] for entry in hours], [datetime(2024, 5, 8, 10), datetime(2024, 5, 9, 9)])
+        rate = hours[0]['on_time_delivery_rate']
+        self.assertEqual((hours[0]['count'], rate['min'], rate['max'], rate['last']), (3, 0.1, 0.9, 0.9))
+        self.assertAlmostEqual(rate['avg'], 0.5)
+
+        weeks = rollup_history(self.vendor.pk, 'week')
+        self.assertEqual(len(weeks), 1)
+        self.assertEqual((weeks[0]['count'], weeks[0]['fulfillment_rate']['last']), (4, 0.7))
+
+        days = rollup_history(self.vendor.pk, 'day', date_from=datetime(2024, 5, 9, 12))
+        self.assertEqual([entry['start'] for entry in days], [datetime(2024, 5, 9)])
+
+    def test_rebuild_matches_incremental(self):
+        for hour in range(5):
+            self.snapshot(datetime(2024, 5, 8, hour), hour / 10)
+        incremental = rollup_history(self.vendor.pk, 'hour')
+        HistoricalPerformanceRollup.objects.all().delete()
+
+        self.assertEqual(rebuild_rollups(), 5)
+        self.assertEqual(rollup_history(self.vendor.pk, 'hour'), incremental)
+
+
+class CompactHistoricalPerformanceTest(TestCase):
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+        self.now = datetime(2024, 12, 31, 12, 0)
+        ages = [
+            timedelta(days=1), timedelta(days=1, minutes=5),  # raw window: both kept
+            timedelta(days=10), timedelta(days=10, minutes=-20), timedelta(days=10, hours=2),  # hourly: 2 kept
+            timedelta(days=100), timedelta(days=100, hours=3), timedelta(days=101),  # daily: 2 kept
+        ]
+        for age in ages:
+            HistoricalPerformance.objects.create(vendor=self.vendor, date=self.now - age, on_time_delivery_rate=0.5,
+                                                 quality_rating_avg=4.0, average_response_time=1.0,
+                                                 fulfillment_rate=0.5)
+
+    def test_policy_keeps_latest_per_bucket(self):
+        rollups_before = list(HistoricalPerformanceRollup.objects.order_by('pk').values())
+
+        result = compact_historical_performance(raw_days=7, hourly_days=90, chunk_size=1, now=self.now)
+
+        self.assertEqual(result['rows_removed'], 2)
+        self.assertIn('bytes_reclaimed', result)
+        kept = set(HistoricalPerformance.objects.values_list('date', flat=True))
+        self.assertEqual(kept, {self.now - timedelta(days=1), self.now - timedelta(days=1, minutes=5),
+                                self.now - timedelta(days=10, minutes=-20), self.now - timedelta(days=10, hours=2),
+                                self.now - timedelta(days=100), self.now - timedelta(days=101)})
+        self.assertEqual(list(HistoricalPerformanceRollup.objects.order_by('pk').values()), rollups_before)
+
+    def test_dry_run_deletes_nothing(self):
+        result = compact_historical_performance(dry_run=True, now=self.now)
+        self.assertEqual(result['rows_removed'], 2)
+        self.assertEqual(HistoricalPerformance.objects.count(), 8)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('compact_performance_history', '--raw-days', '0', '--hourly-days', '0', stdout=out)
+        self.assertIn('Removed', out.getvalue())
+        # One snapshot per day remains: 2024-12-30, 12-21, 09-22 and 09-21.
+        self.assertEqual(HistoricalPerformance.objects.count(), 4)
+
+        with self.assertRaises(CommandError):
+            call_command('compact_performance_history', '--raw-days', '30', '--hourly-days', '7', stdout=out)
+
+
+class VendorRankingTest(TestCase):
+
+    def setUp(self):
+        self.vendors = [Vendor.objects.create(name=f"Vendor {i}") for i in range(4)]
+
+    def complete(self, vendor, count, quality_rating, po_prefix):
+        for i in range(count):
+            create_purchase_order(vendor, po_number=f'{po_prefix}{i}', status='completed',
+                                  quality_rating=quality_rating)
+
+    def test_rows_follow_metric_changes(self):
+        """
+        Tests that PO writes refresh the vendor's ranking row incrementally.
+        """
+        vendor = self.vendors[0]
+        purchase_order = create_purchase_order(vendor, po_number='PO1')
+        ranking = VendorRanking.objects.get(vendor=vendor)
+        self.assertEqual(ranking.total_pos, 1)
+        self.assertIsNone(ranking.quality_rating_avg)
+        self.assertIsNone(ranking.average_response_time)
+        self.assertEqual(ranking.fulfillment_rate, 0.0)
+
+        purchase_order.status = 'completed'
+        purchase_order.quality_rating = 3.0
+        purchase_order.acknowledgement_date = purchase_order.issue_date + timedelta(hours=2)
+        purchase_order.save()
+        ranking.refresh_from_db()
+        self.assertEqual(ranking.quality_rating_avg, 3.0)
+        self.assertAlmostEqual(ranking.average_response_time, 2.0)
+        self.assertEqual(ranking.fulfillment_rate, 1.0)
+
+    def test_top_vendors_and_ties(self):
+        self.complete(self.vendors[0], 2, 4.0, 'A')
+        self.complete(self.vendors[1], 3, 5.0, 'B')
+        self.complete(self.vendors[2], 1, 4.0, 'C')
+
+        results = top_vendors('quality_rating_avg', limit=3)
+        self.assertEqual([(row['vendor'], row['rank']) for row in results],
+                         [(self.vendors[1].id, 1), (self.vendors[0].id, 2), (self.vendors[2].id, 2)])
+        self.assertEqual(vendor_rank(self.vendors[2].id, 'quality_rating_avg')['rank'], 2)
+        self.assertEqual(top_vendors('quality_rating_avg', direction='asc', limit=1)[0]['value'], 4.0)
+
+        # min_pos leaves out vendors with too few orders.
+        self.assertEqual([row['vendor'] for row in top_vendors('quality_rating_avg', min_pos=2)],
+                         [self.vendors[1].id, self.vendors[0].id])
+        self.assertIsNone(vendor_rank(self.vendors[2].id, 'quality_rating_avg', min_pos=2)['rank'])
+
+    def test_rebuild_backfills_rows(self):
+        self.complete(self.vendors[0], 1, 4.0, 'A')
+        VendorRanking.objects.all().delete()
+        rebuild_vendor_metrics()
+        self.assertEqual(VendorRanking.objects.count(), len(self.vendors))
+        self.assertEqual(vendor_rank(self.vendors[0].id, 'fulfillment_rate')['rank'], 1)
+
+
+class ImportCommandTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', newline='') as f:
+            f.write(content)
+        return path
+
+    def write_pos(self, name, vendor_ids, count):
+        lines = []
+        for i in range(count):
+            lines.append(json.dumps({
+                'po_number': f'PO-{i}', 'vendor': vendor_ids[i % len(vendor_ids)],
+                'order_date': '2024-05-01T10:00:00', 'delivery_date': '2024-05-10T10:00:00',
+                'items': {'item': i}, 'quantity': 1, 'status': 'completed' if i % 3 else 'pending',
+                'quality_rating': float(i % 5) + 1 if i % 3 else None, 'issue_date': '2024-05-01T10:00:00',
+                'acknowledgement_date': '2024-05-01T12:00:00', 'completed_date': '2024-05-09T10:00:00' if i % 3 else None,
+            }))
+        return self.write(name, '\n'.join(lines) + '\n')
+
+    def test_import_vendors_csv(self):
+        path = self.write('vendors.csv', 'id,name,contact_details,address,vendor_code\n'
+                                         '41,Acme,acme@example.com,"1 Main St\nSpringfield",AC\n'
+                                         ',Globex,globex@example.com,2 Side St,GX\n')
+        out = StringIO()
+        call_command('import_vendors', path, stdout=out)
+
+        self.assertIn('2 records read (2 imported, 0 invalid)', out.getvalue())
+        acme = Vendor.objects.get(pk=41)
+        self.assertEqual(acme.address, '1 Main St\nSpringfield')
+        self.assertTrue(Vendor.objects.filter(name='Globex').exists())
+        # bulk_create skips the signal that creates accumulators, the import makes up for it.
+        self.assertEqual(VendorMetricAccumulator.objects.count(), 2)
+        self.assertEqual(VendorRanking.objects.count(), 2)
+
+    def test_import_pos_recomputes_metrics_once(self):
+        vendors = [Vendor.objects.create(name=f'Vendor {i}') for i in range(2)]
+        path = self.write_pos('pos.ndjson', [vendor.pk for vendor in vendors], 25)
+
+        with mock.patch('base.importing.rebuild_vendor_metrics', wraps=importing.rebuild_vendor_metrics) as rebuild:
+            call_command('import_pos', path, '--batch-size', '10', stdout=StringIO())
+
+        rebuild.assert_called_once()
+        self.assertEqual(PurchaseOrder.objects.count(), 25)
+        for vendor in Vendor.objects.all():
+            with self.subTest(vendor=vendor.pk):
+                expected = compute_vendor_metrics(vendor.pk)
+                self.assertAlmostEqual(vendor.on_time_delivery_rate, expected['on_time_delivery_rate'])
+                self.assertAlmostEqual(vendor.quality_rating_avg, expected['quality_rating_avg'])
+                self.assertAlmostEqual(vendor.fulfillment_rate, expected['fulfillment_rate'])
+                self.assertEqual(HistoricalPerformance.objects.filter(vendor=vendor).count(), 1)
+
+    def test_csv_values(self):
+        vendor = Vendor.objects.create(name="Vendor")
+        path = self.write('pos.csv', 'po_number,vendor,order_date,delivery_date,items,quantity,status,'
+                                     'quality_rating,issue_date,acknowledgement_date\n'
+                                     f'PO-1,{vendor.pk},2024-05-01T10:00:00,2024-05-10T10:00:00,'
+                                     '"{""item"": [1, 2]}",3,pending,,2024-05-01T10:00:00,\n')
+
+        call_command('import_pos', path, stdout=StringIO())
+
+        purchase_order = PurchaseOrder.objects.get()
+        self.assertEqual(purchase_order.items, {'item': [1, 2]})
+        self.assertEqual(purchase_order.quantity, 3)
+        self.assertIsNone(purchase_order.quality_rating)
+        self.assertIsNone(purchase_order.acknowledgement_date)
+        self.assertEqual(purchase_order.order_date, datetime(2024, 5, 1, 10))
+
+    def test_invalid_records_are_reported_and_skipped(self):
+        vendor = Vendor.objects.create(name="Vendor")
+        valid = {'po_number': 'PO-1', 'vendor': vendor.pk, 'order_date': '2024-05-01',
+                 'delivery_date': '2024-05-10', 'items': {'item': 1}, 'quantity': 1, 'status': 'pending',
+                 'issue_date': '2024-05-01'}
+        path = self.write('pos.ndjson', '\n'.join([
+            json.dumps(valid),
+            json.dumps({**valid, 'vendor': vendor.pk + 100}),
+            json.dumps({**valid, 'order_date': 'yesterday'}),
+            '{not json',
+        ]))
+        out, err = StringIO(), StringIO()
+
+        call_command('import_pos', path, stdout=out, stderr=err)
+
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+        self.assertIn('4 records read (1 imported, 3 invalid)', out.getvalue())
+        errors = err.getvalue()
+        self.assertIn(f'Record 2: {{\'vendor\': [\'Vendor {vendor.pk + 100} does not exist.\']}}', errors)
+        self.assertIn('Record 3: {\'order_date\'', errors)
+        self.assertIn('Record 4: {\'record\': [\'Malformed record.\']}', errors)
+
+    def test_too_many_errors(self):
+        path = self.write('pos.ndjson', '{}\n{}\n')
+
+        with self.assertRaisesMessage(CommandError, 'More than 1 invalid records'):
+            call_command('import_pos', path, '--max-errors', '1', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(ImportCheckpoint.objects.get().records, 0)
+
+    def test_resumes_after_a_crash(self):
+        vendor = Vendor.objects.create(name="Vendor")
+        path = self.write_pos('pos.ndjson', [vendor.pk], 25)
+        build_instance = importing.build_instance
+
+        def crash_on_record_15(kind, record, text=False):
+            if record['po_number'] == 'PO-14':
+                raise RuntimeError('Simulated crash')
+            return build_instance(kind, record, text)
+
+        with mock.patch('base.importing.build_instance', side_effect=crash_on_record_15):
+            with self.assertRaises(RuntimeError):
+                call_command('import_pos', path, '--batch-size', '10', stdout=StringIO())
+        self.assertEqual(PurchaseOrder.objects.count(), 10)
+        self.assertEqual(ImportCheckpoint.objects.get().records, 10)
+
+        call_command('import_pos', path, '--batch-size', '10', stdout=StringIO())
+
+        self.assertEqual(sorted(PurchaseOrder.objects.values_list('po_number', flat=True)),
+                         sorted(f'PO-{i}' for i in range(25)))
+        self.assertTrue(ImportCheckpoint.objects.get().completed)
+        vendor.refresh_from_db()
+        self.assertAlmostEqual(vendor.fulfillment_rate, compute_vendor_metrics(vendor.pk)['fulfillment_rate'])
+
+        out = StringIO()
+        call_command('import_pos', path, stdout=out)
+        self.assertIn('already imported', out.getvalue())
+        self.assertEqual(PurchaseOrder.objects.count(), 25)
+
+    def test_resumes_csv_after_a_multiline_record(self):
+        path = self.write('vendors.csv', 'name,contact_details,address,vendor_code\n'
+                                         'A,a,"line 1\nline 2",A\n'
+                                         'B,b,b,B\n')
+        offsets = [offset for _, offset in importing.read_records(path, 'csv')]
+
+        resumed = list(importing.read_records(path, 'csv', offsets[0]))
+
+        self.assertEqual([record['name'] for record, _ in resumed], ['B'])
+
+
+class PurgeIdempotencyKeysCommandTest(TestCase):
+
+    def test_purges_expired_keys(self):
+        now = datetime.now()
+        for index, expires_at in enumerate([now - timedelta(hours=1), now - timedelta(seconds=1),
+                                            now + timedelta(hours=1)]):
+            IdempotencyKey.objects.create(key=f'key-{index}', method='POST', path='/api/purchase_orders',
+                                          request_hash='', status_code=200, body='{}', expires_at=expires_at)
+        out = StringIO()
+
+        call_command('purge_idempotency_keys', '--chunk-size', '1', stdout=out)
+
+        self.assertIn('Removed 2 expired idempotency key(s).', out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['key-2'])
+
+
+class RefreshReadReplicaCommandTest(TransactionTestCase):
+    """
+    The copy has to run outside a transaction, hence TransactionTestCase.
+    """
+
+    @skipUnless(connection.vendor == 'sqlite', 'Copies SQLite databases only.')
+    def test_copies_primary(self):
+        """
+        Tests that the replica file becomes a copy of the primary, replacing the old file.
+        """
+        Vendor.objects.create(name="Vendor", contact_details="Contact", address="Address", vendor_code="Code")
+        with tempfile.TemporaryDirectory() as directory:
+            target = os.path.join(directory, 'replica.sqlite3')
+            with open(target, 'w') as f:
+                f.write('stale')
+
+            out = StringIO()
+            call_command('refresh_read_replica', '--target', target, stdout=out)
+
+            self.assertIn('Refreshed', out.getvalue())
+            self.assertFalse(os.path.exists(f'{target}.partial'))
+            replica = sqlite3.connect(target)
+            try:
+                names = replica.execute('SELECT name FROM base_vendor').fetchall()
+            finally:
+                replica.close()
+        self.assertEqual(names, [('Vendor',)])
+
+    def test_requires_a_replica(self):
+        with self.assertRaises(CommandError):
+            call_command('refresh_read_replica', stdout=StringIO())
+
+
+class HotQueryPlanTest(TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on the hot metric and lookup queries and fails if any
+    of them reads a table with a full scan.
+    """
+
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor")
+
+    def hot_queries(self):
+        now = datetime.now()
+        purchase_orders = PurchaseOrder.objects.filter(vendor=self.vendor)
+        return {
+            'vendor+status': purchase_orders.filter(status='completed').values('vendor').annotate(n=Count('pk')),
+            'vendor+status+delivery_date': purchase_orders.filter(
+                status='completed', delivery_date__lte=now).values('vendor').annotate(n=Count('pk')),
+            'vendor+acknowledged': purchase_orders.filter(
+                acknowledgement_date__isnull=False).values('acknowledgement_date', 'issue_date'),
+            'vendor totals': purchase_orders.values('vendor_id').annotate(**_total_aggregates()),
+            'latest performance': HistoricalPerformance.objects.filter(vendor=self.vendor).order_by('-date')[:1],
+            'ranking top N': VendorRanking.objects.filter(
+                quality_rating_avg__isnull=False, total_pos__gte=5,
+            ).order_by('-quality_rating_avg', '-total_pos', '-vendor_id')[:10],
+            'ranking count': VendorRanking.objects.filter(
+                average_response_time__isnull=False, total_pos__gte=5, average_response_time__lt=2.0,
+            ).values('pk'),
+        }
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plan assertions are written for SQLite EXPLAIN QUERY PLAN output.')
+    def test_no_full_table_scans(self):
+        for name, queryset in self.hot_queries().items():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertNotIn('SCAN base_', plan, msg=f'{name} falls back to a full table scan:\n{plan}')
+                self.assertNotIn('TEMP B-TREE', plan, msg=f'{name} sorts without an index:\n{plan}')
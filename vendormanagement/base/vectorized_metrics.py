@@ -0,0 +1,117 @@
+"""
+Fleet-wide metric recompute with NumPy.
+
+``compute_totals_vectorized`` reads the purchase order columns the metrics
+depend on in primary-key chunks, as tuples rather than model instances. Each
+chunk becomes one array per column: vendor index, completed flag, timestamps in
+epoch microseconds and quality rating. The chunk is folded into per-vendor
+totals with ``bincount``. The totals are the ones ``compute_totals`` gets from
+SQL, so ``derive_metrics`` and ``store_vendor_totals`` take it from there.
+
+NumPy is optional; ``available()`` tells whether this path can be used.
+"""
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is not installed
+    np = None
+
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+from .metrics import CONTRIBUTION_FIELDS, TOTAL_FIELDS
+from .models import PurchaseOrder, Vendor
+
+
+def available():
+    return np is not None
+
+
+def _timestamps(values):
+    # ISO strings or datetimes; None becomes NaT. datetime64[us] keeps microsecond
+    # precision like the SQL path.
+    return np.array(values, dtype='datetime64[us]')
+
+
+def fold_chunk(rows, vendor_index, totals):
+    """
+        Adds a chunk of purchase orders to the per-vendor total arrays.
+
+        Args:
+            rows (list): Tuples of CONTRIBUTION_FIELDS.
+            vendor_index (ndarray): Sorted vendor ids; a vendor's position indexes ``totals``.
+            totals (dict): name in TOTAL_FIELDS -> array with one slot per vendor;
+                response times are summed as integer microseconds.
+    """
+    vendor_id, status, delivery_date, completed_date, quality_rating, issue_date, acknowledgement_date = zip(*rows)
+    vendor_id = np.array(vendor_id, dtype=np.int64)
+    vendors = np.searchsorted(vendor_index, vendor_id)
+    if not np.array_equal(vendor_index.take(vendors, mode='clip'), vendor_id):
+        raise ValueError('Purchase orders reference vendors created after the recompute started.')
+    completed = np.array(status, dtype=object) == 'completed'
+    delivery_date = _timestamps(delivery_date)
+    completed_date = _timestamps(completed_date)
+    quality_rating = np.array(quality_rating, dtype=np.float64)
+    acknowledgement_date = _timestamps(acknowledgement_date)
+    acknowledged = ~np.isnat(acknowledgement_date)
+    response = np.where(acknowledged, (acknowledgement_date - _timestamps(issue_date)).astype(np.int64), 0)
+
+    size = len(vendor_index)
+    totals['total_pos'] += np.bincount(vendors, minlength=size)
+    totals['completed_pos'] += np.bincount(vendors, weights=completed, minlength=size).astype(np.int64)
+    # Orders completed before completed_date was recorded (NaT) count as on time.
+    on_time = completed & (np.isnat(completed_date) | (completed_date <= delivery_date))
+    totals['on_time_pos'] += np.bincount(vendors, weights=on_time, minlength=size).astype(np.int64)
+    rated = completed & ~np.isnan(quality_rating)
+    totals['quality_rating_sum'] += np.bincount(vendors, weights=np.where(rated, quality_rating, 0.0),
+                                                minlength=size)
+    totals['acknowledged_pos'] += np.bincount(vendors, weights=acknowledged, minlength=size).astype(np.int64)
+    # Integer accumulation: float weights would lose microseconds on large fleets.
+    np.add.at(totals['response_seconds_sum'], vendors, response)
+
+
+def compute_totals_vectorized(chunk_size=50000, on_chunk=None):
+    """
+        Recomputes every vendor's totals from the purchase orders.
+
+        Args:
+            chunk_size (int): Purchase orders read per query.
+            on_chunk: Called with the number of purchase orders read so far after each chunk.
+
+        Returns:
+            dict: vendor id -> totals for every vendor, zeros for vendors without orders;
+            the same values ``compute_totals`` returns.
+    """
+    vendor_index = np.array(sorted(Vendor.objects.values_list('pk', flat=True)), dtype=np.int64)
+    totals = {name: np.zeros(len(vendor_index), dtype=np.int64) for name in TOTAL_FIELDS}
+    totals['quality_rating_sum'] = np.zeros(len(vendor_index), dtype=np.float64)
+
+    # Timestamps are selected as text so the database driver does not build a datetime
+    # per value; NumPy parses each column in one call instead.
+    text = {name: Cast(name, TextField()) for name in CONTRIBUTION_FIELDS if name.endswith('_date')}
+    columns = ['pk', *(f'{name}_text' if name in text else name for name in CONTRIBUTION_FIELDS)]
+    last_pk = None
+    read = 0
+    while True:
+        purchase_orders = PurchaseOrder.objects.annotate(
+            **{f'{name}_text': expression for name, expression in text.items()}).order_by('pk')
+        if last_pk is not None:
+            purchase_orders = purchase_orders.filter(pk__gt=last_pk)
+        rows = list(purchase_orders.values_list(*columns)[:chunk_size])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        read += len(rows)
+        fold_chunk([row[1:] for row in rows], vendor_index, totals)
+        if on_chunk:
+            on_chunk(read)
+
+    response_microseconds = totals.pop('response_seconds_sum')
+    results = {}
+    quality_rating_sum = totals.pop('quality_rating_sum')
+    for position, vendor_id in enumerate(vendor_index.tolist()):
+        vendor_totals = {name: int(values[position]) for name, values in totals.items()}
+        vendor_totals['quality_rating_sum'] = float(quality_rating_sum[position])
+        # Same division timedelta.total_seconds() does on the SQL path's microsecond sum.
+        vendor_totals['response_seconds_sum'] = int(response_microseconds[position]) / 10 ** 6
+        results[vendor_id] = vendor_totals
+    return results
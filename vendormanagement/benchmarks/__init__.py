@@ -0,0 +1,40 @@
+"""
+Benchmarks for the vendor management API.
+
+Run them from the project directory:
+
+    python -m benchmarks.run --output results.json   # every endpoint
+    python -m benchmarks.compare old.json new.json   # spot regressions
+    python -m benchmarks.bulk_ingest                 # bulk vs per-row PO ingestion
+    python -m benchmarks.serialization               # ModelSerializer vs values() lists
+    python -m benchmarks.async_reads                 # WSGI vs ASGI read throughput
+    python -m benchmarks.sharded_recompute           # metric recompute with 1, 2, 4 worker processes
+
+Each benchmark runs against a throwaway test database, never against db.sqlite3.
+"""
+import contextlib
+import os
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vendormanagement.settings')
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database():
+    """
+        Creates a fresh test database for the duration of the block.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,161 @@
+"""
+Compares concurrent read throughput of the WSGI and ASGI deployments.
+
+Usage: python -m benchmarks.async_reads [--concurrency 32] [--requests 2000] [--db-latency-ms 0]
+
+Three set-ups serve the same mix of read requests (vendor list/detail, PO
+list/detail, performance) from ``concurrency`` simultaneous clients:
+
+    wsgi        the sync views behind a threaded WSGI server (one thread per connection)
+    asgi_sync   the sync views under ASGI, which Django runs on a single shared thread
+    asgi_async  the api/async/... views under ASGI, with queries on the ASYNC_DB_POOL_SIZE pool
+
+The applications are called in-process, so the numbers exclude socket and HTTP
+parsing costs. SQLite answers in microseconds; ``--db-latency-ms`` adds a delay
+to every query to approximate a database server over the network.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import setup_django, test_database
+from .fixtures import seed
+
+
+def request_mix(rng, data, count, prefix):
+    """
+        Returns ``count`` (path, query string) pairs spread over the read endpoints.
+    """
+    vendor_id = lambda: rng.choice(data['vendor_ids'])
+    po_id = lambda: rng.choice(data['purchase_order_ids'])
+    templates = [
+        lambda: (f'{prefix}vendors', 'page_size=50'),
+        lambda: (f'{prefix}vendors/{vendor_id()}', ''),
+        lambda: (f'{prefix}purchase_orders', 'page_size=50'),
+        lambda: (f'{prefix}purchase_orders/{po_id()}', ''),
+        lambda: (f'{prefix}vendors/{vendor_id()}/performance/', ''),
+    ]
+    return [rng.choice(templates)() for _ in range(count)]
+
+
+def wsgi_get(application, path, query):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'HTTP_HOST': 'testserver',
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http', 'wsgi.input': None,
+        'wsgi.errors': None, 'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    statuses = []
+    b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+    return int(statuses[0].split()[0])
+
+
+async def asgi_get(application, path, query):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(b'host', b'testserver')], 'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages[0]['status']
+
+
+def run_wsgi(requests, concurrency):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    application = WSGIHandler()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        statuses = list(pool.map(lambda request: wsgi_get(application, *request), requests))
+        return time.perf_counter() - start, statuses
+
+
+def run_asgi(requests, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    application = ASGIHandler()
+
+    async def main():
+        pending = iter(requests)
+        statuses = []
+
+        async def client():
+            for request in pending:
+                statuses.append(await asgi_get(application, *request))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - start, statuses
+
+    return asyncio.run(main())
+
+
+def add_query_latency(seconds):
+    """
+        Delays every query on every (current and future) connection by ``seconds``.
+    """
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all():
+        connection.execute_wrappers.append(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--vendors', type=int, default=50)
+    parser.add_argument('--pos-per-vendor', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=32, help='Simultaneous clients.')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per set-up.')
+    parser.add_argument('--db-latency-ms', type=float, default=0.0, help='Artificial delay added to every query.')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    with test_database():
+        data = seed(vendors=args.vendors, pos_per_vendor=args.pos_per_vendor, random_seed=args.seed)
+        if args.db_latency_ms:
+            add_query_latency(args.db_latency_ms / 1000)
+
+        results = {}
+        for name, runner, prefix in [('wsgi', run_wsgi, '/api/'), ('asgi_sync', run_asgi, '/api/'),
+                                     ('asgi_async', run_asgi, '/api/async/')]:
+            requests = request_mix(random.Random(args.seed), data, args.requests, prefix)
+            seconds, statuses = runner(requests, args.concurrency)
+            failed = sum(status >= 400 for status in statuses)
+            if failed:
+                raise RuntimeError(f'{name}: {failed} requests failed')
+            results[name] = {'seconds': round(seconds, 3), 'requests_per_second': round(len(statuses) / seconds, 1)}
+
+    report = {
+        'meta': {'concurrency': args.concurrency, 'requests': args.requests, 'db_latency_ms': args.db_latency_ms,
+                 'async_db_pool_size': getattr(settings, 'ASYNC_DB_POOL_SIZE', 8)},
+        'results': results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Compares posting purchase orders one at a time with the bulk endpoint.
+
+Usage: python -m benchmarks.bulk_ingest [--rows 1000] [--vendors 10]
+"""
+import argparse
+import json
+import time
+
+from . import setup_django, test_database
+
+
+def make_items(vendor_ids, rows, prefix):
+    return [
+        {'po_number': f'{prefix}-{i}', 'vendor': vendor_ids[i % len(vendor_ids)],
+         'order_date': '2024-05-01T10:00:00', 'delivery_date': '2024-05-10T10:00:00',
+         'issue_date': '2024-05-01T10:00:00', 'acknowledgement_date': '2024-05-01T12:00:00',
+         'items': {'item': i}, 'quantity': 1, 'status': 'completed' if i % 3 else 'pending',
+         'quality_rating': float(i % 5)}
+        for i in range(rows)
+    ]
+
+
+def measure(connection, run):
+    # Counted with a wrapper: CaptureQueriesContext keeps at most 9000 queries and stops
+    # the per-request reset of that log, so long runs come out wrong.
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+    return seconds, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--vendors', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from base.models import Vendor
+
+    with test_database() as connection:
+        client = APIClient()
+        vendor_ids = [Vendor.objects.create(name=f'Vendor {i}').pk for i in range(args.vendors)]
+
+        def per_row():
+            for item in make_items(vendor_ids, args.rows, 'ROW'):
+                assert client.post(reverse('purchase_order_ops'), item, format='json').status_code == 200
+
+        def bulk():
+            response = client.post(reverse('bulk_purchase_orders'), make_items(vendor_ids, args.rows, 'BULK'),
+                                   format='json')
+            assert response.status_code == 201, response.data
+
+        results = {}
+        for name, run in [('per_row', per_row), ('bulk', bulk)]:
+            seconds, queries = measure(connection, run)
+            results[name] = {'rows': args.rows, 'seconds': round(seconds, 4),
+                             'rows_per_second': round(args.rows / seconds, 1), 'queries': queries}
+        results['speedup'] = round(results['per_row']['seconds'] / results['bulk']['seconds'], 1)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares two ``benchmarks.run`` result files.
+
+Usage: python -m benchmarks.compare baseline.json candidate.json [--threshold 0.2]
+
+Prints old -> new p50/p95/p99 and query counts per endpoint and exits with
+status 1 if any endpoint regressed: a latency percentile grew by more than
+``threshold`` (a fraction) or the mean query count per request went up.
+"""
+import argparse
+import json
+import sys
+
+LATENCY_KEYS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def compare(baseline, candidate, threshold):
+    """
+        Returns (lines, regressions) describing how ``candidate`` differs from ``baseline``.
+    """
+    lines = []
+    regressions = []
+    if baseline['meta'].get('vendors') != candidate['meta'].get('vendors') or \
+            baseline['meta'].get('pos_per_vendor') != candidate['meta'].get('pos_per_vendor'):
+        lines.append('warning: the runs used different data sizes')
+
+    for name, old in sorted(baseline['endpoints'].items()):
+        new = candidate['endpoints'].get(name)
+        if new is None:
+            lines.append(f'{name}: missing from candidate')
+            continue
+        parts = []
+        for key in LATENCY_KEYS:
+            change = (new[key] - old[key]) / old[key] if old[key] else 0.0
+            parts.append(f'{key} {old[key]:.2f} -> {new[key]:.2f} ({change:+.0%})')
+            if change > threshold:
+                regressions.append(f'{name} {key} {change:+.0%}')
+        parts.append(f"queries {old['queries_mean']} -> {new['queries_mean']}")
+        if new['queries_mean'] > old['queries_mean']:
+            regressions.append(f"{name} queries {old['queries_mean']} -> {new['queries_mean']}")
+        lines.append(f'{name}: ' + ', '.join(parts))
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files.')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative latency increase before flagging a regression.')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    lines, regressions = compare(baseline, candidate, args.threshold)
+    print('\n'.join(lines))
+    if regressions:
+        print('\nRegressions:\n  ' + '\n  '.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Fast, reproducible benchmark data.
+
+Vendors and purchase orders are inserted with bulk_create; vendor metrics and
+accumulators are then rebuilt once, and a few performance snapshots are recorded
+per vendor so the performance endpoints have data to serve.
+"""
+import random
+from datetime import datetime, timedelta
+
+BATCH_SIZE = 1000
+
+STATUSES = ('completed', 'completed', 'completed', 'pending', 'canceled')
+
+
+def vendor_weights(vendors, skew):
+    """
+        Returns Zipf-like weights: vendor i gets 1 / (i + 1) ** skew (skew 0 is uniform).
+    """
+    return [1 / (i + 1) ** skew for i in range(vendors)]
+
+
+def seed(vendors=10, pos_per_vendor=100, skew=0.0, snapshots_per_vendor=5, random_seed=42):
+    """
+        Populates the current database.
+
+        Args:
+            vendors (int): Number of vendors.
+            pos_per_vendor (int): Average purchase orders per vendor; the total is vendors * pos_per_vendor.
+            skew (float): How unevenly orders are spread over vendors (0 = uniform).
+            snapshots_per_vendor (int): HistoricalPerformance rows recorded per vendor.
+            random_seed (int): Makes the data identical between runs.
+
+        Returns:
+            dict: The ids of the created vendors and purchase orders.
+    """
+    from base.metrics import rebuild_vendor_metrics
+    from base.models import Vendor, PurchaseOrder, HistoricalPerformance
+    from base.rollups import add_to_rollups
+
+    rng = random.Random(random_seed)
+    Vendor.objects.bulk_create(
+        [Vendor(name=f'Vendor {i}', contact_details=f'contact-{i}@example.com', address=f'{i} Main Street',
+                vendor_code=f'V{i:06d}') for i in range(vendors)],
+        batch_size=BATCH_SIZE,
+    )
+    vendor_ids = list(Vendor.objects.order_by('id').values_list('id', flat=True))
+
+    now = datetime.now().replace(microsecond=0)
+    chosen = rng.choices(vendor_ids, weights=vendor_weights(vendors, skew), k=vendors * pos_per_vendor)
+    purchase_orders = []
+    for i, vendor_id in enumerate(chosen):
+        issue_date = now - timedelta(days=rng.randint(1, 365), seconds=rng.randint(0, 86399))
+        delivery_date = issue_date + timedelta(days=rng.randint(1, 30))
+        status = rng.choice(STATUSES)
+        acknowledged = rng.random() < 0.8
+        purchase_orders.append(PurchaseOrder(
+            po_number=f'BENCH-{i:08d}',
+            vendor_id=vendor_id,
+            order_date=issue_date - timedelta(hours=rng.randint(0, 48)),
+            delivery_date=delivery_date,
+            items={f'item-{j}': rng.randint(1, 20) for j in range(rng.randint(1, 5))},
+            quantity=rng.randint(1, 500),
+            status=status,
+            quality_rating=round(rng.uniform(1, 5), 1) if status == 'completed' else None,
+            issue_date=issue_date,
+            acknowledgement_date=issue_date + timedelta(hours=rng.randint(1, 72)) if acknowledged else None,
+            completed_date=(delivery_date + timedelta(days=rng.randint(-5, 3)) if status == 'completed' else None),
+        ))
+        if len(purchase_orders) >= BATCH_SIZE:
+            PurchaseOrder.objects.bulk_create(purchase_orders)
+            purchase_orders = []
+    PurchaseOrder.objects.bulk_create(purchase_orders)
+
+    rebuild_vendor_metrics(vendor_ids)
+
+    snapshots = [
+        HistoricalPerformance(vendor_id=vendor_id, date=now - timedelta(hours=6 * j),
+                              on_time_delivery_rate=rng.random(), quality_rating_avg=rng.uniform(1, 5),
+                              average_response_time=rng.uniform(1, 72), fulfillment_rate=rng.random())
+        for vendor_id in vendor_ids for j in range(snapshots_per_vendor)
+    ]
+    add_to_rollups(HistoricalPerformance.objects.bulk_create(snapshots, batch_size=BATCH_SIZE))
+
+    return {
+        'vendor_ids': vendor_ids,
+        'purchase_order_ids': list(PurchaseOrder.objects.order_by('id').values_list('id', flat=True)),
+    }
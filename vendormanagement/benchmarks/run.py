@@ -0,0 +1,204 @@
+"""
+Drives every API endpoint against seeded data and reports latency and query counts.
+
+Usage: python -m benchmarks.run [--vendors 50] [--pos-per-vendor 200] [--skew 1.0]
+                                [--requests 200] [--output results.json]
+
+Requests go through the Django test client against a throwaway test database.
+For each endpoint the report holds p50/p95/p99/mean latency in milliseconds,
+throughput in requests per second and the mean/max SQL query count per
+request. Compare two result files with ``python -m benchmarks.compare``.
+"""
+import argparse
+import json
+import platform
+import random
+import time
+from datetime import datetime, timedelta
+
+from . import setup_django, test_database
+from .fixtures import seed
+
+
+def percentile(sorted_values, fraction):
+    """
+        Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def scenarios(rng, data):
+    """
+        Returns name -> callable(client) for every endpoint; each call makes one request.
+
+        Deletes are ``(prepare, request)`` pairs instead: ``prepare()`` creates the
+        row to delete outside the measurement and ``request(client, pk)`` deletes it.
+    """
+    from django.urls import reverse
+
+    from base.models import PurchaseOrder, Vendor
+
+    vendor_ids = data['vendor_ids']
+    po_ids = data['purchase_order_ids']
+    created = iter(range(10 ** 9))
+
+    def new_purchase_order():
+        return {'po_number': f'RUN-{next(created)}', 'vendor': rng.choice(vendor_ids),
+                'order_date': '2024-05-01T10:00:00', 'delivery_date': '2024-05-10T10:00:00',
+                'issue_date': '2024-05-01T10:00:00', 'items': {'item': 1}, 'quantity': 1,
+                'status': 'completed', 'quality_rating': 4.0}
+
+    def new_vendor():
+        number = next(created)
+        return {'name': f'Run vendor {number}', 'contact_details': 'bench@example.com',
+                'address': f'{number} Bench Street', 'vendor_code': f'RUN-{number}'}
+
+    def spare_vendor():
+        return Vendor.objects.create(**new_vendor()).pk
+
+    def spare_purchase_order():
+        issued = datetime(2024, 5, 1, 10)
+        return PurchaseOrder.objects.create(
+            po_number=f'RUN-{next(created)}', vendor_id=rng.choice(vendor_ids), order_date=issued,
+            delivery_date=issued + timedelta(days=9), issue_date=issued, items={'item': 1}, quantity=1,
+            status='pending').pk
+
+    def export(client):
+        response = client.get(reverse('export_purchase_orders'), {'vendor': rng.choice(vendor_ids)})
+        # Rows are only read while the body streams.
+        b''.join(response.streaming_content)
+        return response
+
+    return {
+        'vendors_list': lambda client: client.get(reverse('vendor_ops'), {'page_size': 100}),
+        'vendor_detail': lambda client: client.get(
+            reverse('get_vendor_by_id', kwargs={'vendor_id': rng.choice(vendor_ids)})),
+        'vendor_create': lambda client: client.post(reverse('vendor_ops'), new_vendor(), format='json'),
+        'vendor_update': lambda client: client.put(
+            reverse('get_vendor_by_id', kwargs={'vendor_id': rng.choice(vendor_ids)}),
+            {'address': f'{next(created)} Bench Street'}, format='json'),
+        'vendor_delete': (spare_vendor, lambda client, pk: client.delete(
+            reverse('get_vendor_by_id', kwargs={'vendor_id': pk}))),
+        'purchase_orders_list': lambda client: client.get(reverse('purchase_order_ops'), {'page_size': 100}),
+        'purchase_order_detail': lambda client: client.get(
+            reverse('get_po_by_id', kwargs={'po_id': rng.choice(po_ids)})),
+        'purchase_order_create': lambda client: client.post(
+            reverse('purchase_order_ops'), new_purchase_order(), format='json'),
+        'purchase_order_update': lambda client: client.put(
+            reverse('get_po_by_id', kwargs={'po_id': rng.choice(po_ids)}),
+            {'status': 'completed', 'quality_rating': round(rng.uniform(1, 5), 1)}, format='json'),
+        'purchase_order_acknowledge': lambda client: client.post(
+            reverse('acknowledge_purchase_order', kwargs={'po_id': rng.choice(po_ids)})),
+        'purchase_order_delete': (spare_purchase_order, lambda client, pk: client.delete(
+            reverse('get_po_by_id', kwargs={'po_id': pk}))),
+        'purchase_orders_bulk': lambda client: client.post(
+            reverse('bulk_purchase_orders'), [new_purchase_order() for _ in range(100)], format='json'),
+        'purchase_orders_export': export,
+        'vendor_performance': lambda client: client.get(
+            reverse('get_vendor_performance', kwargs={'vendor_id': rng.choice(vendor_ids)})),
+        'vendor_performance_history': lambda client: client.get(
+            reverse('get_vendor_performance_history', kwargs={'vendor_id': rng.choice(vendor_ids)}),
+            {'bucket': 'day'}),
+        'vendor_rankings': lambda client: client.get(
+            reverse('get_vendor_rankings'), {'metric': 'quality_rating_avg', 'limit': 10}),
+        'vendor_rank': lambda client: client.get(
+            reverse('get_vendor_rank', kwargs={'vendor_id': rng.choice(vendor_ids)}),
+            {'metric': 'on_time_delivery_rate'}),
+        'performance_cache_stats': lambda client: client.get(reverse('get_performance_cache_stats')),
+        'metrics_queue_status': lambda client: client.get(reverse('get_metrics_queue_status')),
+    }
+
+
+def measure(connection, client, request, count, prepare=None):
+    """
+        Runs ``request`` ``count`` times and summarizes latency and query counts.
+
+        When ``prepare`` is given, its result is passed to every request and the time
+        and queries it takes are not counted.
+    """
+    from django.test.utils import CaptureQueriesContext
+
+    latencies = []
+    queries = []
+    elapsed = 0.0
+    for _ in range(count):
+        args = (prepare(),) if prepare is not None else ()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = request(client, *args)
+            latencies.append((time.perf_counter() - start) * 1000)
+        elapsed += latencies[-1] / 1000
+        if response.status_code >= 400:
+            raise RuntimeError(f'Request failed with {response.status_code}: {response.content[:200]!r}')
+        queries.append(len(context.captured_queries))
+
+    latencies.sort()
+    return {
+        'requests': count,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(sum(latencies) / count, 3),
+        'throughput_rps': round(count / elapsed, 1),
+        'queries_mean': round(sum(queries) / count, 2),
+        'queries_max': max(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every API endpoint.')
+    parser.add_argument('--vendors', type=int, default=50)
+    parser.add_argument('--pos-per-vendor', type=int, default=200)
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of POs per vendor (0 = uniform).')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', action='append', help='Only run this endpoint (may be repeated).')
+    parser.add_argument('--output', help='Write the JSON report to this file as well as stdout.')
+    args = parser.parse_args()
+
+    setup_django()
+    import django
+    from rest_framework.test import APIClient
+
+    with test_database() as connection:
+        started = time.perf_counter()
+        data = seed(vendors=args.vendors, pos_per_vendor=args.pos_per_vendor, skew=args.skew,
+                    random_seed=args.seed)
+        seed_seconds = time.perf_counter() - started
+
+        rng = random.Random(args.seed)
+        client = APIClient()
+        endpoints = {}
+        for name, request in scenarios(rng, data).items():
+            if args.only and name not in args.only:
+                continue
+            prepare, request = request if isinstance(request, tuple) else (None, request)
+            request(client, *((prepare(),) if prepare is not None else ()))  # warm-up
+            endpoints[name] = measure(connection, client, request, args.requests, prepare=prepare)
+
+    report = {
+        'meta': {
+            'vendors': args.vendors,
+            'pos_per_vendor': args.pos_per_vendor,
+            'skew': args.skew,
+            'requests': args.requests,
+            'seed': args.seed,
+            'seed_seconds': round(seed_seconds, 3),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+        },
+        'endpoints': endpoints,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares ModelSerializer with the values()-based list serialization.
+
+Usage: python -m benchmarks.serialization [--rows 10000] [--repeat 5]
+
+Both paths read the same purchase orders and vendors and render them to JSON;
+the report gives the best time per 10k rows for each, split into the database
+read and the serialization itself.
+"""
+import argparse
+import json
+import time
+
+from . import setup_django, test_database
+from .fixtures import seed
+
+
+def best_of(repeat, run):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def compare(queryset, serializer_class, repeat):
+    from rest_framework.renderers import JSONRenderer
+    from api.fast_serialization import values_serializer
+
+    fast = values_serializer(serializer_class)
+    instances = list(queryset)
+    rows = list(queryset.values(*fast.sources))
+    assert JSONRenderer().render(serializer_class(instances, many=True).data) == \
+        JSONRenderer().render(fast.serialize(rows))
+
+    per_10k = 10000 / len(rows)
+    results = {
+        'rows': len(rows),
+        'model_serializer': {
+            'read_ms': best_of(repeat, lambda: list(queryset.all())) * per_10k * 1000,
+            'serialize_ms': best_of(repeat, lambda: serializer_class(instances, many=True).data) * per_10k * 1000,
+        },
+        'values_serializer': {
+            'read_ms': best_of(repeat, lambda: list(queryset.values(*fast.sources))) * per_10k * 1000,
+            'serialize_ms': best_of(repeat, lambda: fast.serialize(rows)) * per_10k * 1000,
+        },
+    }
+    for name in ('model_serializer', 'values_serializer'):
+        timings = results[name]
+        timings['total_ms'] = timings['read_ms'] + timings['serialize_ms']
+        results[name] = {key: round(value, 2) for key, value in timings.items()}
+    results['speedup'] = round(results['model_serializer']['total_ms'] / results['values_serializer']['total_ms'], 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000, help='Purchase orders (and vendors) to serialize.')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from api.serializers import PurchaseOrderSerializer, VendorSerializer
+    from base.models import PurchaseOrder, Vendor
+
+    with test_database():
+        seed(vendors=args.rows, pos_per_vendor=1, snapshots_per_vendor=0)
+        report = {
+            'per': '10k rows',
+            'purchase_orders': compare(PurchaseOrder.objects.order_by('id'), PurchaseOrderSerializer, args.repeat),
+            'vendors': compare(Vendor.objects.order_by('id'), VendorSerializer, args.repeat),
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
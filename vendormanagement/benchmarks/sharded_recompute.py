@@ -0,0 +1,67 @@
+"""
+Measures the sharded metric recompute with a growing number of worker processes.
+
+Usage: python -m benchmarks.sharded_recompute [--vendors 2000] [--pos-per-vendor 200] [--workers 1 2 4]
+
+The test database is a file (worker processes cannot open an in-memory one).
+Every worker count recomputes all vendors. The report gives the compute time,
+the speedup over one worker, and the time spent writing. The run fails if two
+worker counts produce different totals.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from . import setup_django, test_database
+from .fixtures import seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--vendors', type=int, default=2000)
+    parser.add_argument('--pos-per-vendor', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from base.metrics import store_vendor_totals
+    from base.sharded_metrics import compute_totals_sharded
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        with test_database():
+            seed(vendors=args.vendors, pos_per_vendor=args.pos_per_vendor, snapshots_per_vendor=0,
+                 random_seed=args.seed)
+
+            results = {}
+            reference = None
+            for workers in args.workers:
+                start = time.perf_counter()
+                totals = compute_totals_sharded(workers)
+                computed = time.perf_counter()
+                store_vendor_totals(totals)
+                written = time.perf_counter()
+
+                if reference is None:
+                    reference = totals
+                elif totals != reference:
+                    raise RuntimeError(f'{workers} workers computed different totals')
+                results[workers] = {'compute_seconds': round(computed - start, 3),
+                                    'write_seconds': round(written - computed, 3)}
+
+    baseline = results[args.workers[0]]['compute_seconds']
+    for result in results.values():
+        result['speedup'] = round(baseline / result['compute_seconds'], 2)
+    report = {
+        'meta': {'vendors': args.vendors, 'pos_per_vendor': args.pos_per_vendor, 'cpus': os.cpu_count()},
+        'results': results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
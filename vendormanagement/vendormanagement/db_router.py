@@ -0,0 +1,102 @@
+"""
+Read/write splitting between the primary database and a read replica.
+
+When a replica alias (READ_REPLICA_ALIAS, ``'replica'`` by default) is configured
+in DATABASES, ``ReadReplicaMiddleware`` lets GET/HEAD requests read from it while
+every write, and every read outside such a request, goes to ``default``.
+
+A client that has just written is pinned to the primary for
+READ_REPLICA_STICKY_SECONDS through a cookie, so it reads its own writes even
+though the replica only catches up when it is refreshed.
+"""
+import asyncio
+import contextvars
+import time
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+
+STICKY_COOKIE = 'primary_until'
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+def replica_alias():
+    """
+        Returns the configured replica alias, or None when there is no replica.
+    """
+    alias = getattr(settings, 'READ_REPLICA_ALIAS', 'replica')
+    return alias if alias and alias in settings.DATABASES else None
+
+
+class ReadReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the primary, so objects from either may be related.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == replica_alias():
+            # The replica gets its schema from the primary when it is refreshed.
+            return False
+        return None
+
+
+class ReadReplicaMiddleware:
+    # Async-capable, so under ASGI the async views are not adapted onto the sync thread.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sticky_seconds = getattr(settings, 'READ_REPLICA_STICKY_SECONDS', 10)
+        self._is_async = asyncio.iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self._is_async:
+            return self.__acall__(request)
+        if replica_alias() is None:
+            return self.get_response(request)
+
+        token = _use_replica.set(self._reads_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+        return self._process_response(request, response)
+
+    async def __acall__(self, request):
+        if replica_alias() is None:
+            return await self.get_response(request)
+
+        token = _use_replica.set(self._reads_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+        return self._process_response(request, response)
+
+    def _reads_replica(self, request):
+        return request.method in ('GET', 'HEAD') and not self._pinned(request)
+
+    def _process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            response.set_cookie(STICKY_COOKIE, f'{time.time() + self.sticky_seconds:.3f}',
+                                max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+        return response
+
+    def _pinned(self, request):
+        try:
+            return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,168 @@
+"""
+Opt-in per-request instrumentation.
+
+Add ``'vendormanagement.middleware.RequestTimingMiddleware'`` at the top of
+MIDDLEWARE to record, for every request, the number of SQL queries, the time
+spent in the database, in serializers and in the view. The numbers are sent back
+in a ``Server-Timing`` header and logged as one JSON line on the
+``vendormanagement.request_timing`` logger; requests over the configured
+budgets are logged as warnings.
+"""
+import asyncio
+import contextlib
+import contextvars
+import json
+import logging
+import time
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('vendormanagement.request_timing')
+
+_current = contextvars.ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """
+    Timings collected for one request. Durations are in seconds.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.spans = {}
+        self._active = set()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+@contextlib.contextmanager
+def timing_span(name):
+    """
+        Adds the time spent in the block to the ``name`` span of the current request.
+
+        Does nothing outside an instrumented request; nested spans of the same
+        name are only counted once.
+    """
+    timing = _current.get()
+    if timing is None or name in timing._active:
+        yield
+        return
+    timing._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.spans[name] = timing.spans.get(name, 0.0) + time.perf_counter() - start
+        timing._active.discard(name)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    return timing.execute_wrapper(execute, sql, params, many, context)
+
+
+def instrument_connections():
+    """
+        Counts the queries of this thread's connections towards the request being timed.
+
+        The wrapper stays on the connections and reports to whichever request is
+        current when a query runs. The middleware calls this on the thread that
+        runs the view; code that queries for a request from another thread (the
+        async views' database pool) calls it there. Does nothing outside an
+        instrumented request.
+    """
+    if _current.get() is None:
+        return
+    for connection in connections.all():
+        if _timed_execute not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_timed_execute)
+
+
+class RequestTimingMiddleware:
+    # Async-capable, so under ASGI the async views are not adapted onto the sync thread.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = getattr(settings, 'REQUEST_TIMING_QUERY_BUDGET', None)
+        self.latency_budget_ms = getattr(settings, 'REQUEST_TIMING_LATENCY_BUDGET_MS', None)
+        self._is_async = asyncio.iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+            # Django would run a sync process_view on the sync thread for every request.
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if self._is_async:
+            return self.__acall__(request)
+        timing = RequestTiming()
+        token = _current.set(timing)
+        start = time.perf_counter()
+        try:
+            instrument_connections()
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, timing, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, timing, time.perf_counter() - start)
+
+    def _report(self, request, response, timing, total):
+        view = getattr(request, '_timing_view_start', None)
+        durations = {
+            'db': timing.db,
+            'serializer': timing.spans.get('serializer', 0.0),
+            'view': time.perf_counter() - view if view is not None else 0.0,
+            'total': total,
+        }
+        over_budget = []
+        if self.query_budget is not None and timing.queries > self.query_budget:
+            over_budget.append('queries')
+        if self.latency_budget_ms is not None and total * 1000 > self.latency_budget_ms:
+            over_budget.append('latency')
+
+        header = [f'db;dur={durations["db"] * 1000:.2f};desc="{timing.queries} queries"']
+        header += [f'{name};dur={durations[name] * 1000:.2f}' for name in ('serializer', 'view', 'total')]
+        if over_budget:
+            header.append(f'budget;desc="exceeded: {",".join(over_budget)}"')
+        response['Server-Timing'] = ', '.join(header)
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': timing.queries,
+            **{f'{name}_ms': round(duration * 1000, 2) for name, duration in durations.items()},
+            'over_budget': over_budget,
+        }
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(record))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_view_start = time.perf_counter()
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_view_start = time.perf_counter()
+        if not asyncio.iscoroutinefunction(view_func):
+            # Django runs a sync view on the thread sync code shares; count its queries there.
+            await sync_to_async(instrument_connections)()
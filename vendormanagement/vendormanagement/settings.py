@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'vendormanagement.db_router.ReadReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,6 +53,15 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request timing is opt-in: put 'vendormanagement.middleware.RequestTimingMiddleware'
+# first in MIDDLEWARE to get a Server-Timing header and a JSON log line per request
+# (logger 'vendormanagement.request_timing'). Requests over either budget are logged
+# as warnings; set a budget to None to disable it.
+
+REQUEST_TIMING_QUERY_BUDGET = 20
+
+REQUEST_TIMING_LATENCY_BUDGET_MS = 500
+
 ROOT_URLCONF = 'vendormanagement.urls'
 
 TEMPLATES = [
@@ -82,6 +93,94 @@ DATABASES = {
     }
 }
 
+# Read replica (opt-in)
+# Set VENDORMANAGEMENT_READ_REPLICA to the path of a second SQLite file to serve GET requests
+# from it; `python manage.py refresh_read_replica [--interval N]` copies the primary into it.
+# After a write, a client reads from the primary for READ_REPLICA_STICKY_SECONDS.
+
+if os.environ.get('VENDORMANAGEMENT_READ_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['VENDORMANAGEMENT_READ_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['vendormanagement.db_router.ReadReplicaRouter']
+
+READ_REPLICA_ALIAS = 'replica'
+
+READ_REPLICA_STICKY_SECONDS = 10
+
+
+# API list endpoints
+# Default and maximum number of items per page for the cursor-paginated lists.
+
+API_PAGE_SIZE = 100
+
+API_MAX_PAGE_SIZE = 1000
+
+# Serialize list pages from values() rows (api.fast_serialization) instead of
+# ModelSerializer instances; the output is identical.
+
+API_FAST_LIST_SERIALIZATION = True
+
+# Maximum number of purchase orders accepted by one bulk request.
+
+API_BULK_MAX_ITEMS = 5000
+
+
+# Async read endpoints (api/async/...)
+# Threads in the pool that runs their database work; bounds concurrent DB access per process.
+
+ASYNC_DB_POOL_SIZE = 8
+
+
+# Vendor metrics
+# When VENDOR_METRICS_ASYNC is True, PO writes only queue the vendor for recomputation
+# and `python manage.py process_metrics_queue` recomputes the queued vendors.
+
+VENDOR_METRICS_ASYNC = False
+
+VENDOR_METRICS_QUEUE_BATCH_SIZE = 100
+
+VENDOR_METRICS_QUEUE_POLL_INTERVAL = 1.0
+
+# Seconds a response stored for an Idempotency-Key header is replayed (see api.idempotency);
+# `python manage.py purge_idempotency_keys` deletes expired keys.
+
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Defaults for `python manage.py compact_performance_history`: keep every snapshot for
+# raw_days, one per vendor and hour until hourly_days, then one per vendor and day.
+
+HISTORICAL_PERFORMANCE_RETENTION = {
+    'raw_days': 7,
+    'hourly_days': 90,
+    'chunk_size': 500,
+}
+
+
+# Caches
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+#
+# 'vendor_performance' holds the /performance payloads. Local memory is per process;
+# for multi-process deployments use a shared backend, e.g.
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#   'LOCATION': '/var/tmp/vendor_performance_cache',
+# or 'django.core.cache.backends.db.DatabaseCache' with `python manage.py createcachetable`.
+# TIMEOUT (seconds) is a safety net; writes invalidate entries directly.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'vendor_performance': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'vendor-performance',
+        'TIMEOUT': 300,
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators